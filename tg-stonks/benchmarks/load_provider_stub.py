@@ -0,0 +1,84 @@
+"""
+Load test of the provider layer against local Alpha Vantage stand-in (no network, no token):
+many concurrent users asking for a few tickers - with and without quote cache & single-flight
+
+    pdm run python benchmarks/load_provider_stub.py --users 500 --latency 0.05
+
+with `--check` it fails (exit code 1) when coalescing variants stop saving API requests (as in CI)
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from tg_stonks.impl.alpha_vantage_provider import AlphaVantageAPI
+from tg_stonks.impl.alpha_vantage_stub import AlphaVantageStub, StubConfig, STUB_INSTRUMENTS
+from tg_stonks.providers.protocols import IDataProviderStockMarket
+from tg_stonks.providers.quote_cache import CachedProvider
+from tg_stonks.providers.single_flight import SingleFlightProvider
+
+
+async def run_users(prov: IDataProviderStockMarket, users: int, tickers: list[str]) -> list[float]:
+    async def user_lookup() -> float:
+        started_at = time.perf_counter()
+        await prov.get_security_by_ticker(random.choice(tickers))
+        return time.perf_counter() - started_at
+
+    return await asyncio.gather(*(user_lookup() for _ in range(users)))
+
+
+def report(name: str, latencies: list[float], stub: AlphaVantageStub) -> int:
+    ordered = sorted(latencies)
+    api_requests = sum(stub.requests.values())
+    print(
+        f"{name:>24}: p50 {statistics.median(ordered) * 1000:7.1f}ms"
+        f" | p95 {ordered[int(0.95 * len(ordered)) - 1] * 1000:7.1f}ms"
+        f" | API requests: {api_requests}"
+    )
+    return api_requests
+
+
+def check(api_requests: dict[str, int], users: int, tickers: list[str]) -> list[str]:
+    """Regressions of request counts: every lookup of a burst is made at once,
+    so coalescing variants should request each ticker once at most
+    """
+    failed = []
+    if api_requests["plain"] != users:
+        failed.append(f"plain: {api_requests['plain']} API requests, expected one per user ({users})")
+
+    for name in ("single-flight", "cache + single-flight"):
+        if api_requests[name] > len(tickers):
+            failed.append(f"{name}: {api_requests[name]} API requests, expected {len(tickers)} at most")
+
+    return failed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load test of the provider layer against local stand-in API")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--max-connections", type=int, default=10)
+    parser.add_argument("--check", action="store_true", help="fail on regressions of API request counts")
+    args = parser.parse_args()
+
+    tickers = list(STUB_INSTRUMENTS)
+    config = StubConfig(latency=args.latency, jitter=args.jitter, seed=1)
+    api_requests = {}
+    for name, wrap in (
+            ("plain", lambda prov: prov),
+            ("single-flight", SingleFlightProvider),
+            ("cache + single-flight", lambda prov: CachedProvider(SingleFlightProvider(prov))),
+    ):
+        async with AlphaVantageStub(config) as stub:
+            async with AlphaVantageAPI("stub", base_url=stub.url, max_connections=args.max_connections) as av_api:
+                latencies = await run_users(wrap(av_api), args.users, tickers)
+                api_requests[name] = report(name, latencies, stub)
+
+    if args.check and (failed := check(api_requests, args.users, tickers)):
+        raise SystemExit("Load test failed:\n  " + "\n  ".join(failed))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark of Alpha Vantage payloads parsing (payloads of local stand-in, no network):
+model by model validation vs. prebuilt list adapters vs. trusted mode (no full validation)
+
+    pdm run python benchmarks/parse_payloads.py --items 1000 --repeat 20
+"""
+import argparse
+import timeit
+
+from tg_stonks.impl.alpha_vantage_models import (
+    ExchangePairAV,
+    SearchQueryResAV,
+    StockMarketInstrumentAV,
+    parse_pair,
+    parse_quotes,
+    parse_search_results,
+)
+from tg_stonks.impl.alpha_vantage_stub import (
+    STUB_CURRENCIES,
+    STUB_INSTRUMENTS,
+    exchange_rate,
+    global_quote,
+    symbol_search,
+)
+
+
+def with_provider(payloads: list[dict]) -> list[dict]:
+    return [{**p, "data_provider": "alpha_vantage"} for p in payloads]
+
+
+def report(name: str, items: int, repeat: int, call) -> float:
+    best = min(timeit.repeat(call, number=1, repeat=repeat))
+    print(f"{name:>32}: {best * 1000:8.2f}ms | {best / items * 1e6:6.2f}us per item")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark of provider payloads parsing")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    symbols = list(STUB_INSTRUMENTS)
+    codes = list(STUB_CURRENCIES)
+    quotes = with_provider([global_quote(symbols[i % len(symbols)]) for i in range(args.items)])
+    pairs = with_provider([exchange_rate(codes[i % len(codes)], "USD") for i in range(args.items)])
+    found = with_provider((symbol_search("a") * args.items)[:args.items])
+
+    for kind, payloads, model, parse, strict in (
+            ("quotes", quotes, StockMarketInstrumentAV, parse_quotes, False),
+            ("pairs", pairs, ExchangePairAV, lambda ps, trusted=False: [parse_pair(p, trusted) for p in ps], False),
+            ("search results", found, SearchQueryResAV, parse_search_results, True),
+    ):
+        print(f"{kind} ({len(payloads)} items):")
+        validated = report(
+            "model_validate one by one", len(payloads), args.repeat,
+            lambda: [model.model_validate(p, strict=strict) for p in payloads]
+        )
+        adapter = report("list adapter", len(payloads), args.repeat, lambda: parse(payloads))
+        trusted = report("trusted", len(payloads), args.repeat, lambda: parse(payloads, trusted=True))
+        print(f"{'speedup (adapter | trusted)':>32}: {validated / adapter:8.2f}x | {validated / trusted:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,44 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
+from tg_stonks.providers.failover import FailoverProvider
 from tg_stonks.providers.helpers import filter_by_name, filter_by_protocol_impl
+from tg_stonks.providers.metrics import ProviderMetrics
 from tg_stonks.providers.protocols import IDataProvider, IDataProviderStockMarket
-from tg_stonks.database.protocols import IDatabase
+from tg_stonks.database.protocols import IDatabaseAsync
 
 
 @dataclass(frozen=True)
 class AppContainer:
-    database: IDatabase
+    database: IDatabaseAsync
     data_providers: list[IDataProvider]
+    # latency & errors of providers (see: MeteredProvider): drive routing with fallback providers
+    provider_metrics: ProviderMetrics = field(default_factory=ProviderMetrics)
+    hedge_percentile: float = 0.95
 
     def get_provider_by_name(self, name: str):
         return filter_by_name(self.data_providers, name)
 
-    def provider_stock_market_by_name(self, prov_name: str) -> IDataProviderStockMarket:
+    def provider_stock_market_by_name(
+            self,
+            prov_name: str,
+            allow_fallback: bool = False) -> IDataProviderStockMarket:
+        """Stock market data provider by name;
+        with `allow_fallback` calls are hedged & failed over to other stock market providers (if any)
+        """
         for prov in self.providers_stock_market():
             if prov.provider_name == prov_name:
-                return prov
+                alternates = [
+                    alt for alt in self.providers_stock_market()
+                    if alt.provider_name != prov_name
+                ]
+                if not allow_fallback or not alternates:
+                    return prov
+
+                return FailoverProvider(
+                    prov, alternates,
+                    metrics=self.provider_metrics,
+                    hedge_percentile=self.hedge_percentile
+                )
 
         raise Exception(f"No providers with '{prov_name}' name found")
 
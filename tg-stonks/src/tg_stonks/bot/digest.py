@@ -0,0 +1,101 @@
+import asyncio
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import final
+
+from loguru import logger
+
+from tg_stonks.bot.formatting import msg_instruments_digest
+from tg_stonks.bot.notify_dispatcher import NotificationDispatcher
+from tg_stonks.utils.other import parse_interval
+
+
+@dataclass
+class _UserDigest:
+    deadline: float
+    # instrument id -> latest (instrument_obj, tracking_obj) update
+    updates: dict[str, tuple[dict, dict]] = field(default_factory=dict)
+
+
+@final
+class DigestScheduler:
+    """
+    Collects instrument updates per user and sends them as one combined message:
+    the first pending update of a user starts the window - its length is
+    the tracking's 'notify_every' interval, or `default_window` seconds if it is not set;
+    later updates of the same instrument replace earlier ones
+    """
+
+    def __init__(self, dispatcher: NotificationDispatcher, default_window: float = 60.0):
+        self.dispatcher = dispatcher
+        self.default_window = default_window
+        self._digests: dict[int, _UserDigest] = {}
+        self._deadlines: list[tuple[float, int]] = []
+        self._wake_up = asyncio.Event()
+
+    def _window_of(self, tracking_obj: dict) -> float:
+        notify_every = tracking_obj.get("notify_every")
+        if notify_every is None:
+            return self.default_window
+
+        try:
+            return parse_interval(notify_every)
+        except ValueError:
+            logger.warning(f"<Digest> tracking '{tracking_obj.get('id')}' has incorrect interval: '{notify_every}'")
+            return self.default_window
+
+    def add(self, tg_user_id: int, instrument_obj: dict, tracking_obj: dict) -> None:
+        deadline = time.monotonic() + self._window_of(tracking_obj)
+        digest = self._digests.get(tg_user_id)
+        if digest is None:
+            digest = _UserDigest(deadline)
+            self._digests[tg_user_id] = digest
+            heapq.heappush(self._deadlines, (deadline, tg_user_id))
+            self._wake_up.set()
+
+        elif deadline < digest.deadline:
+            # shorter interval of another tracking: send earlier
+            digest.deadline = deadline
+            heapq.heappush(self._deadlines, (deadline, tg_user_id))
+            self._wake_up.set()
+
+        digest.updates[instrument_obj["id"]] = (instrument_obj, tracking_obj)
+
+    async def run(self) -> None:
+        while True:
+            self._wake_up.clear()
+            if not self._deadlines:
+                await self._wake_up.wait()
+                continue
+
+            deadline, tg_user_id = self._deadlines[0]
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                # new (earlier) deadline may be pushed while sleeping
+                try:
+                    await asyncio.wait_for(self._wake_up.wait(), timeout=delay)
+                except TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._deadlines)
+            digest = self._digests.get(tg_user_id)
+            # outdated heap entry: deadline of the digest was moved
+            if digest is None or digest.deadline != deadline:
+                continue
+
+            del self._digests[tg_user_id]
+            await self._send(tg_user_id, digest)
+
+    async def flush(self) -> None:
+        """Send all pending digests right away (e.g. at shutdown)
+        """
+        digests, self._digests = self._digests, {}
+        self._deadlines.clear()
+        for tg_user_id, digest in digests.items():
+            await self._send(tg_user_id, digest)
+
+    async def _send(self, tg_user_id: int, digest: _UserDigest) -> None:
+        for text in msg_instruments_digest(list(digest.updates.values())):
+            await self.dispatcher.send_message(tg_user_id, text)
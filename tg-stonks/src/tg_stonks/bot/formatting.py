@@ -68,9 +68,8 @@ def msg_list_providers(providers: list[IDataProvider]) -> str:
     return msg
 
 
-def msg_instrument_updated(instrument_obj: dict, tracking_obj: dict) -> str:
-    res_str = "⚡️**Instrument updated**⚡️\n"
-    res_str += f"\n• 👉 --Ticker / symbol--: `{instrument_obj['symbol']}`\n"
+def _instrument_update_body(instrument_obj: dict, tracking_obj: dict) -> str:
+    res_str = f"\n• 👉 --Ticker / symbol--: `{instrument_obj['symbol']}`\n"
     res_str += f"\n• 🕓 Updated at: *{instrument_obj['updated_at']}*"
 
     if tracking_obj.get("on_price") is not None:
@@ -91,3 +90,27 @@ def msg_instrument_updated(instrument_obj: dict, tracking_obj: dict) -> str:
     # last_upd_at = dt.datetime.fromisoformat(instrument_obj["updated_at"])
     res_str += f"\n• 🔮 Data from: `{instrument_obj['data_provider_code']}`"
     return res_str
+
+
+def msg_instrument_updated(instrument_obj: dict, tracking_obj: dict) -> str:
+    return "⚡️**Instrument updated**⚡️\n" + _instrument_update_body(instrument_obj, tracking_obj)
+
+
+def msg_instruments_digest(updates: list[tuple[dict, dict]], max_len: int = 4096) -> list[str]:
+    """Render (instrument_obj, tracking_obj) updates as few messages as possible,
+    each one no longer than `max_len` (telegram message limit)
+    """
+    if len(updates) == 1:
+        return [msg_instrument_updated(*updates[0])]
+
+    header = f"⚡️**{len(updates)} instruments updated**⚡️\n"
+    messages, current = [], header
+    for instrument_obj, tracking_obj in updates:
+        section = "\n" + _instrument_update_body(instrument_obj, tracking_obj) + "\n"
+        if len(current) + len(section) > max_len and current != header:
+            messages.append(current)
+            current = ""
+        current += section
+
+    messages.append(current)
+    return messages
@@ -3,20 +3,37 @@ from functools import partial
 from pyrogram import Client
 from pyrogram.handlers import CallbackQueryHandler
 from pyrogram.types import CallbackQuery
+from returns.result import Failure
 
 import tg_stonks.bot.custom_filters as flt
 from tg_stonks.bot.app_container import AppContainer
 from tg_stonks.bot.helpers import markup_chose_provider, make_prov_settings
 from tg_stonks.bot.formatting import msg_error, msg_ok
+from tg_stonks.database.helpers import try_get_settings_of_user_async
+from tg_stonks.database.user_settings import DataProviderConfig
+from tg_stonks.providers.provider_type import ProviderT
 
 
 async def provider_set_handler(_client: Client, query: CallbackQuery, app: AppContainer):
     params = query.data.replace("confirmed --cmd prov", "").strip()
     prov_t, prov_name = params.split()
-    prov_settings = make_prov_settings(prov_t, prov_name)
+    prov_conf = DataProviderConfig(name=prov_name, type=app.get_provider_by_name(prov_name).provider_type)
+    prov_settings = make_prov_settings(ProviderT(prov_t), prov_conf)
 
-    app.database.update_user(query.from_user.id, {
-        "settings": prov_settings
+    found_settings = await try_get_settings_of_user_async(app.database, query.from_user.id)
+    if isinstance(found_settings, Failure):
+        await query.answer(msg_error("Failed to retrieve settings: user not found"))
+        await query.message.delete()
+        return
+
+    # only providers of the chosen kinds are replaced: the rest of settings is kept
+    settings = found_settings.unwrap()
+    for settings_field, conf in prov_settings.items():
+        if conf is not None:
+            setattr(settings, settings_field, prov_conf)
+
+    await app.database.update_user(query.from_user.id, {
+        "settings": settings.model_dump(mode="json", exclude_none=True)
     })
 
     await query.message.reply(msg_ok("User settings updated!"))
@@ -43,7 +60,7 @@ async def cancellation_cb_handler(_client: Client, query: CallbackQuery, app: Ap
 
 
 async def confirmed_delete_me(_client: Client, query: CallbackQuery, app: AppContainer):
-    if app.database.delete_user_by_tg_id(query.from_user.id) is None:
+    if await app.database.delete_user_by_tg_id(query.from_user.id) is None:
         await query.answer(
             msg_error("Failed to delete user: database error")
         )
@@ -1,41 +1,94 @@
 from loguru import logger
-from pyrogram import Client as PyrogramClient
 
-from tg_stonks.bot.formatting import msg_instrument_updated
+from tg_stonks.bot.digest import DigestScheduler
+from tg_stonks.bot.periodic_quotes import PeriodicQuotes
+from tg_stonks.bot.streamed_quotes import StreamedQuotes
+from tg_stonks.bot.threshold_index import ThresholdIndex
+from tg_stonks.database.instrument_index import InstrumentIndex
+from tg_stonks.database.protocols import IDatabaseAsync
+from tg_stonks.database.user_cache import UserCache
 from tg_stonks.utils.other import ensure_has_key
-# TODO: user model paring with errors
-# from tg_stonks.database.helpers import to_user
-from tg_stonks.database.protocols import IDatabase
 
 
 async def notify_on_instrument_upd(payload: dict, **kwargs):
     instrument_obj = payload["record"]
-    tg_client: PyrogramClient = ensure_has_key(kwargs, "tg_client")
-    database: IDatabase = ensure_has_key(kwargs, "database")
-
-    # TODO: here we run multiple queries to determine which user
-    #   or users should be notified on instrument price/rate update
-    #   -> Instead, it's should be rewritten
-    #   using more efficient query - with JOINs (if possible)
-    matched_trackings = database.trackings_with({
-        "instrument": instrument_obj["id"]
-    })
-
-    # every user that have a tracking that
-    for tracking_obj in matched_trackings:
-        logger.info(f"User with id: '{tracking_obj['tracked_by']}' has a tracking:")
-        logger.info(tracking_obj)
-
-        users_who_track = database.user_with({
-            "id": tracking_obj["tracked_by"]
-        })
-
-        # inner DB id is unique for each user - so it's gotta be exactly one user
-        user = users_who_track[0]
-        await tg_client.send_message(
-            user["tg_user_id"],
-            msg_instrument_updated(
-                instrument_obj=instrument_obj,
-                tracking_obj=tracking_obj
-            )
-        )
+    digest: DigestScheduler = ensure_has_key(kwargs, "digest")
+    thresholds: ThresholdIndex = ensure_has_key(kwargs, "thresholds")
+
+    # only trackings which thresholds were crossed by this update;
+    # trackings are queried only when instrument is not in the index yet
+    matched_trackings = await thresholds.crossed(
+        instrument_obj,
+        payload.get("old_record")
+    )
+
+    if not matched_trackings:
+        return
+
+    logger.info(
+        f"Instrument '{instrument_obj['id']}' updated:"
+        f" notifying {len(matched_trackings)} tracking(s)"
+    )
+
+    # updates are collected into per-user digests: sent once per user's interval
+    for tracking_obj, tg_user_id in matched_trackings:
+        digest.add(tg_user_id, instrument_obj, tracking_obj)
+
+
+async def sync_on_tracking_change(payload: dict, **kwargs):
+    """Keep in-process indexes of trackings current on 'tracking' table events
+    """
+    thresholds: ThresholdIndex = ensure_has_key(kwargs, "thresholds")
+    periodic: PeriodicQuotes = ensure_has_key(kwargs, "periodic")
+    database: IDatabaseAsync = ensure_has_key(kwargs, "database")
+    # optional: set only when quotes are streamed
+    streamed: StreamedQuotes | None = kwargs.get("streamed")
+
+    # DELETE payload may have 'id' only (unless table has full replica identity)
+    tracking_obj = payload.get("record") or payload.get("old_record") or {}
+    tracking_id = tracking_obj.get("id")
+    if tracking_id is None:
+        return
+
+    thresholds.remove(tracking_id)
+    periodic.remove(tracking_id)
+    if tracking_obj.get("instrument") is not None:
+        thresholds.invalidate(tracking_obj["instrument"])
+
+    if payload.get("type") != "DELETE" and tracking_obj.get("notify_every") is not None:
+        for row in await database.periodic_trackings({"id": tracking_id}):
+            periodic.add(*row)
+
+    if streamed is not None:
+        await streamed.on_tracking_change(payload)
+
+
+async def sync_on_instrument_change(payload: dict, **kwargs):
+    """Keep in-memory index of instruments current on 'fin_instruments' events
+    (of all types: rows missed while disconnected are caught up as 'UPDATE' ones)
+    """
+    instruments: InstrumentIndex = ensure_has_key(kwargs, "instruments")
+
+    if payload.get("type") == "DELETE":
+        # DELETE payload may have 'id' only: enough to find it in the index
+        instrument_id = (payload.get("old_record") or {}).get("id")
+        if instrument_id is not None:
+            instruments.remove(instrument_id)
+        return
+
+    instruments.add(payload["record"])
+
+
+async def sync_on_user_change(payload: dict, **kwargs):
+    """Drop cached users on 'bot_users' table events (changes made by other processes included)
+    """
+    users: UserCache = ensure_has_key(kwargs, "users")
+
+    # DELETE payload may have 'id' only (unless table has full replica identity)
+    user_obj = payload.get("record") or payload.get("old_record") or {}
+    tg_user_id = user_obj.get("tg_user_id")
+    if tg_user_id is None:
+        users.clear()
+        return
+
+    users.invalidate(tg_user_id)
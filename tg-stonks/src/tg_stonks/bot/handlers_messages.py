@@ -20,14 +20,13 @@ from tg_stonks.providers.models import SearchQueryRes
 from tg_stonks.database.entity_models import (
     InstrumentType,
     InstrumentEntity,
-    make_tracking_obj_of_instrument
+    make_tracking_obj
 )
 from tg_stonks.database.errors import DbError
 from tg_stonks.database.helpers import (
     res_to_instrument,
-    try_get_user_by_id,
-    try_get_settings_of_user,
-    ensure_awaited
+    try_get_user_by_id_async,
+    try_get_settings_of_user_async
 )
 from tg_stonks.database.user_settings import UserSettings
 from tg_stonks.bot.formatting import (
@@ -39,7 +38,7 @@ from tg_stonks.bot.formatting import (
 
 
 async def cmd_delete_me(_client: Client, message: Message, app: AppContainer):
-    found_user: Result[dict, Any] = try_get_user_by_id(
+    found_user: Result[dict, Any] = await try_get_user_by_id_async(
         app.database,
         message.from_user.id
     )
@@ -69,7 +68,7 @@ async def cmd_delete_me(_client: Client, message: Message, app: AppContainer):
 
 
 async def cmd_settings(_client: Client, message: Message, app: AppContainer):
-    found_settings: Result[UserSettings, Any] = try_get_settings_of_user(
+    found_settings: Result[UserSettings, Any] = await try_get_settings_of_user_async(
         app.database,
         message.from_user.id
     )
@@ -136,10 +135,51 @@ async def cmd_providers(_client: Client, message: Message, app: AppContainer):
     )
 
 
+async def cmd_fallback_providers(_client: Client, message: Message, app: AppContainer):
+    arg = message.text.replace("/fallback_providers", "").strip().lower()
+    if arg not in ("on", "off"):
+        await message.reply(
+            msg_error(
+                "`fallback_providers`: incorrect argument"
+                "\nProvide `on` or `off`"
+                "\n\nWith fallback providers allowed, data of other providers is used"
+                " when the set one is slow or fails"
+            )
+        )
+        return
+
+    found_settings: Result[UserSettings, Any] = await try_get_settings_of_user_async(
+        app.database,
+        message.from_user.id
+    )
+    if isinstance(found_settings, Failure):
+        await message.reply(
+            msg_error(
+                "Failed to retrieve settings: user not found"
+                "\n👉 try `/sign_in_tg`"
+            )
+        )
+        return
+
+    settings: UserSettings = found_settings.unwrap()
+    settings.allow_fallback_providers = arg == "on"
+    await app.database.update_user(message.from_user.id, {
+        "settings": settings.model_dump(mode="json", exclude_none=True)
+    })
+    if settings.allow_fallback_providers and len(app.providers_stock_market()) < 2:
+        await message.reply(msg_ok(
+            "User settings updated!"
+            "\n(bot has no other stock market providers yet: takes effect once it has)"
+        ))
+        return
+
+    await message.reply(msg_ok("User settings updated!"))
+
+
 async def cmd_sign_in_tg(_client: Client, message: Message, app: AppContainer):
     _id = message.from_user.id
 
-    match try_get_user_by_id(app.database, _id):
+    match await try_get_user_by_id_async(app.database, _id):
         case Success(_):
             await message.reply(
                 msg_ok(
@@ -148,7 +188,7 @@ async def cmd_sign_in_tg(_client: Client, message: Message, app: AppContainer):
             )
 
         case Failure(_err):
-            user_added = app.database.add_new_user(_id)
+            user_added = await app.database.add_new_user(_id)
 
             if user_added is None:
                 await message.reply(
@@ -185,7 +225,7 @@ async def cmd_search_stock_market(_client: Client, message: Message, app: AppCon
         )
         return
 
-    res: Result[UserSettings, Any] = try_get_settings_of_user(app.database, message.from_user.id)
+    res: Result[UserSettings, Any] = await try_get_settings_of_user_async(app.database, message.from_user.id)
     match res:
         case Failure(err) if isinstance(err, DbError) and str(err) == "Query is empty":
             await message.reply(
@@ -215,14 +255,12 @@ async def cmd_search_stock_market(_client: Client, message: Message, app: AppCon
             # TODO: handle case when specified provider
             #  is not available or provider name was simply set incorrectly
             sm_prov = app.provider_stock_market_by_name(
-                settings.provider_stock_market.name
+                settings.provider_stock_market.name,
+                allow_fallback=settings.allow_fallback_providers
             )
 
             # retrieve available stocks, bond, currencies
-            search_res: list[SearchQueryRes] | None = ensure_awaited(
-                sm_prov.search_stock_market,
-                search_query
-            )
+            search_res: list[SearchQueryRes] | None = await sm_prov.search_stock_market(search_query)
 
             if search_res is None or search_res == []:
                 await message.reply(
@@ -257,7 +295,7 @@ async def cmd_track_stock(_client: Client, message: Message, app: AppContainer):
 
     ticker, price = args
     # TODO: rewrite to result returning functions
-    res: Result[UserSettings, Any] = try_get_settings_of_user(
+    res: Result[UserSettings, Any] = await try_get_settings_of_user_async(
         app.database,
         message.from_user.id
     )
@@ -293,44 +331,40 @@ async def cmd_track_stock(_client: Client, message: Message, app: AppContainer):
             # TODO: handle case when specified provider
             #  is not available or provider name was simply set incorrectly
             sm_prov = app.provider_stock_market_by_name(
-                settings.provider_stock_market.name
+                settings.provider_stock_market.name,
+                allow_fallback=settings.allow_fallback_providers
             )
 
-            security = ensure_awaited(sm_prov.get_security_by_ticker, ticker)
-            # TODO: rewrite to result-returning functions
-            instr_res = app.database.find_stock_market_instrument(
+            security = await sm_prov.get_security_by_ticker(ticker)
+            # inner id of the user: cached along with settings
+            user = await app.database.cached_user(message.from_user.id)
+
+            # known instruments are looked up in-process (see: InstrumentIndex)
+            instrument_id = await app.database.instrument_id_of(
+                InstrumentType.sm_instrument,
                 security.symbol,
                 security.data_provider
             )
 
-            if isinstance(instr_res, Success):
-                tracking_obj = make_tracking_obj_of_instrument(
-                    user=settings.unwrap(),
-                    instrument=instr_res.unwrap(),
-                    on_price=price,
-                )
-                _ = app.database.add_tracking(tracking_obj)
-                await message.reply(msg_ok("Added for tracking"))
-                return
-
-            else:
-                instr: InstrumentEntity = res_to_instrument(Success(app.database.add_instrument(
+            if instrument_id is None:
+                instr: InstrumentEntity = res_to_instrument(Success(await app.database.add_instrument(
                     {
-                        "symbol": ticker,
+                        "symbol": security.symbol,
                         "price": security.price,
                         "data_provider_code": security.data_provider,
                         "type": InstrumentType.sm_instrument.value
                     }
                 ))).unwrap()
+                instrument_id = instr.id
 
-                tracking_obj = make_tracking_obj_of_instrument(
-                    user=settings.unwrap(),
-                    instrument=instr,
-                    on_price=price,
-                )
-                _ = app.database.add_tracking(tracking_obj)
-                await message.reply(msg_ok("Added for tracking"))
-                return
+            tracking_obj = make_tracking_obj(
+                user_id=user.id,
+                instrument_id=instrument_id,
+                on_price=price,
+            )
+            _ = await app.database.add_tracking(tracking_obj)
+            await message.reply(msg_ok("Added for tracking"))
+            return
 
 
 def get_commands(x: AppContainer) -> list[MessageHandler]:
@@ -339,6 +373,7 @@ def get_commands(x: AppContainer) -> list[MessageHandler]:
         MessageHandler(partial(cmd_settings, app=x), filters.command("settings")),
         MessageHandler(partial(cmd_set_providers, app=x), filters.command("set_providers")),
         MessageHandler(partial(cmd_providers, app=x), filters.command("providers")),
+        MessageHandler(partial(cmd_fallback_providers, app=x), filters.command("fallback_providers")),
         MessageHandler(partial(cmd_sign_in_tg, app=x), filters.command("sign_in_tg")),
         MessageHandler(partial(cmd_search_stock_market, app=x), filters.command("search_stock_market")),
         MessageHandler(partial(cmd_track_stock, app=x), filters.command("track_stock"))
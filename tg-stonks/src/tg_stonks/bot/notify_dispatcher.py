@@ -0,0 +1,194 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import final
+
+from loguru import logger
+from pyrogram import Client as PyrogramClient
+from pyrogram.errors import FloodWait, RPCError
+
+from tg_stonks.utils.rate_limit import TokenBucket
+
+
+@dataclass
+class OutgoingMessage:
+    chat_id: int
+    text: str
+    attempt: int = 0
+
+
+@dataclass(frozen=True)
+class DispatcherStats:
+    sent: int
+    failed: int
+    rescheduled: int
+    queued: int
+    throughput: float  # messages per second over the last `window` seconds
+
+
+@final
+class NotificationDispatcher:
+    """
+    Sends notifications through pyrogram client concurrently, using a bounded pool of workers;
+    keeps sending rate within telegram flood limits (global and per chat) using token buckets,
+    messages which hit `FloodWait` are rescheduled after the required delay,
+    ones failed on network errors - after exponential backoff (from `retry_delay` seconds);
+    a message is given up on after `max_attempts`
+
+    NOTE: pyrogram client should be created with `sleep_threshold=0`,
+    otherwise it sleeps on `FloodWait` by itself - blocking the worker
+    """
+
+    def __init__(
+            self,
+            tg_client: PyrogramClient,
+            workers: int = 8,
+            global_rate: float = 25.0,
+            per_chat_rate: float = 1.0,
+            per_chat_burst: float = 3.0,
+            max_attempts: int = 5,
+            retry_delay: float = 1.0,
+            queue_size: int = 10_000,
+            report_every: float = 60.0):
+        self.tg_client = tg_client
+        self.workers_num = workers
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.report_every = report_every
+
+        self._queue: asyncio.Queue[OutgoingMessage] = asyncio.Queue(maxsize=queue_size)
+        self._global_bucket = TokenBucket(global_rate)
+        self._chat_buckets: dict[int, TokenBucket] = {}
+        self._workers: list[asyncio.Task] = []
+        self._delayed: set[asyncio.Task] = set()
+
+        self._sent = 0
+        self._failed = 0
+        self._rescheduled = 0
+        self._sent_at: deque[float] = deque(maxlen=100_000)
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+
+        for i in range(self.workers_num):
+            self._workers.append(asyncio.create_task(self._work(), name=f"notify-worker-{i}"))
+
+        if self.report_every > 0:
+            self._workers.append(asyncio.create_task(self._report(), name="notify-report"))
+
+        logger.info(f"<NotifyDispatcher> started with {self.workers_num} workers")
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        # give workers a chance to send what is already queued
+        if self._workers:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+            except TimeoutError:
+                logger.warning(f"<NotifyDispatcher> stopped with {self._queue.qsize()} messages not sent")
+
+        for task in [*self._workers, *self._delayed]:
+            task.cancel()
+
+        await asyncio.gather(*self._workers, *self._delayed, return_exceptions=True)
+        self._workers.clear()
+        self._delayed.clear()
+        logger.info(f"<NotifyDispatcher> stopped: {self.stats()}")
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        """Enqueue message for sending; waits only when the queue is full
+        """
+        await self._queue.put(OutgoingMessage(chat_id, text))
+
+    def throughput(self, window: float = 60.0) -> float:
+        since = time.monotonic() - window
+        return sum(1 for t in self._sent_at if t >= since) / window
+
+    def stats(self, window: float = 60.0) -> DispatcherStats:
+        return DispatcherStats(
+            sent=self._sent,
+            failed=self._failed,
+            rescheduled=self._rescheduled,
+            queued=self._queue.qsize() + len(self._delayed),
+            throughput=self.throughput(window)
+        )
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            # drop buckets of idle chats (fully refilled ones carry no state)
+            if len(self._chat_buckets) >= self._queue.maxsize:
+                self._chat_buckets = {
+                    k: v for k, v in self._chat_buckets.items()
+                    if not v.is_full
+                }
+
+            bucket = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+            self._chat_buckets[chat_id] = bucket
+
+        return bucket
+
+    def _reschedule(self, msg: OutgoingMessage, delay: float) -> None:
+        async def _put_later():
+            await asyncio.sleep(delay)
+            await self._queue.put(msg)
+
+        self._rescheduled += 1
+        task = asyncio.create_task(_put_later())
+        self._delayed.add(task)
+        task.add_done_callback(self._delayed.discard)
+
+    def _retry(self, msg: OutgoingMessage, delay: float, reason: str) -> None:
+        msg.attempt += 1
+        if msg.attempt >= self.max_attempts:
+            self._failed += 1
+            logger.error(f"<NotifyDispatcher> gave up on chat '{msg.chat_id}' after {msg.attempt} attempts: {reason}")
+            return
+
+        logger.warning(f"<NotifyDispatcher> retrying chat '{msg.chat_id}' in {delay:.1f}s: {reason}")
+        self._reschedule(msg, delay)
+
+    async def _work(self) -> None:
+        while True:
+            msg = await self._queue.get()
+            try:
+                await self._send(msg)
+            except Exception as err:
+                # worker keeps running whatever happens to a single message
+                self._failed += 1
+                logger.error(f"<NotifyDispatcher> failed to notify chat '{msg.chat_id}': {err!r}")
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, msg: OutgoingMessage) -> None:
+        # per chat limit is checked without waiting:
+        #   message for a "busy" chat should not block the worker
+        wait_for = self._chat_bucket(msg.chat_id).try_acquire()
+        if wait_for > 0:
+            self._reschedule(msg, wait_for)
+            return
+
+        await self._global_bucket.acquire()
+        try:
+            await self.tg_client.send_message(msg.chat_id, msg.text)
+            self._sent += 1
+            self._sent_at.append(time.monotonic())
+
+        except FloodWait as err:
+            self._retry(msg, float(err.value), f"flood wait of {err.value}s")
+
+        except OSError as err:
+            # connection errors and timeouts: sent again once the network is back
+            self._retry(msg, self.retry_delay * 2 ** msg.attempt, repr(err))
+
+        except RPCError as err:
+            self._failed += 1
+            logger.error(f"<NotifyDispatcher> failed to notify chat '{msg.chat_id}': {err}")
+
+    async def _report(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_every)
+            logger.info(f"<NotifyDispatcher> {self.stats(self.report_every)}")
@@ -0,0 +1,137 @@
+import asyncio
+import datetime as dt
+import math
+import time
+from dataclasses import dataclass
+from typing import final
+
+from loguru import logger
+
+from tg_stonks.bot.app_container import AppContainer
+from tg_stonks.bot.formatting import msg_instrument_updated
+from tg_stonks.bot.notify_dispatcher import NotificationDispatcher
+from tg_stonks.bot.quotes import fetch_instrument_quote
+from tg_stonks.providers.quota import CALL_PRIORITY, CallPriority
+from tg_stonks.utils.other import parse_interval
+from tg_stonks.utils.timers import TimerHeap
+
+
+@dataclass
+class _Periodic:
+    tracking_obj: dict
+    instrument_obj: dict
+    tg_user_id: int
+    interval: float
+    due: float = 0.0
+
+
+@final
+class PeriodicQuotes:
+    """
+    Sends current quote of tracked instrument every 'notify_every' interval of the tracking;
+    timers are kept in a heap and rounded up to `tick` seconds - so trackings due
+    at the same tick are grouped by instrument and each quote is fetched once per tick
+
+    Quotes are fetched by background tasks (at most `max_concurrent_fetches` at once),
+    so a slow fetch does not hold timers back; trackings falling due while their
+    instrument's quote is still being fetched get that quote
+    """
+
+    def __init__(
+            self,
+            app: AppContainer,
+            dispatcher: NotificationDispatcher,
+            tick: float = 1.0,
+            max_concurrent_fetches: int = 5):
+        self.app = app
+        self.dispatcher = dispatcher
+        self.tick = tick
+        self._timers = TimerHeap()
+        self._periodic: dict[str, _Periodic] = {}
+        self._fetch_slots = asyncio.Semaphore(max_concurrent_fetches)
+        # instrument id -> group being notified: at most one task per instrument
+        self._in_flight: dict[str, list[_Periodic]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._periodic)
+
+    def _round_up(self, moment: float) -> float:
+        return math.ceil(moment / self.tick) * self.tick
+
+    async def load(self) -> None:
+        for tracking_obj, instrument_obj, tg_user_id in await self.app.database.periodic_trackings():
+            self.add(tracking_obj, instrument_obj, tg_user_id)
+
+        logger.info(f"<PeriodicQuotes> loaded {len(self)} periodic trackings")
+
+    def add(self, tracking_obj: dict, instrument_obj: dict, tg_user_id: int) -> None:
+        try:
+            interval = max(parse_interval(tracking_obj["notify_every"]), self.tick)
+        except ValueError:
+            logger.warning(f"<PeriodicQuotes> tracking '{tracking_obj['id']}' has incorrect interval, skipped")
+            return
+
+        periodic = _Periodic(tracking_obj, instrument_obj, tg_user_id, interval)
+        periodic.due = self._round_up(time.monotonic() + interval)
+        self._periodic[tracking_obj["id"]] = periodic
+        self._timers.schedule(tracking_obj["id"], periodic.due)
+
+    def remove(self, tracking_id: str) -> None:
+        self._periodic.pop(tracking_id, None)
+        self._timers.cancel(tracking_id)
+
+    async def run(self) -> None:
+        # periodic quotes give way to user commands when out of quota
+        CALL_PRIORITY.set(CallPriority.BACKGROUND)
+        try:
+            while True:
+                await asyncio.sleep(self.tick)
+                for tracking_id in self._timers.pop_due(time.monotonic()):
+                    periodic = self._periodic[tracking_id]
+                    self._notify_later(periodic)
+                    # next due is counted from the previous one: no drift
+                    periodic.due = self._round_up(periodic.due + periodic.interval)
+                    self._timers.schedule(tracking_id, periodic.due)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+    def _notify_later(self, periodic: _Periodic) -> None:
+        instrument_id = periodic.instrument_obj["id"]
+        group = self._in_flight.get(instrument_id)
+        if group is not None:
+            # joins the group being notified (even if it is being sent already)
+            group.append(periodic)
+            return
+
+        group = self._in_flight[instrument_id] = [periodic]
+        task = asyncio.create_task(self._notify(instrument_id, group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _notify(self, instrument_id: str, group: list[_Periodic]) -> None:
+        instrument_obj = group[0].instrument_obj
+        try:
+            async with self._fetch_slots:
+                quote = await fetch_instrument_quote(self.app, instrument_obj)
+
+            instrument_obj = {
+                **instrument_obj,
+                **quote,
+                "updated_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")
+            }
+            # group may grow while messages are sent: iterated till its end
+            for periodic in group:
+                periodic.instrument_obj = instrument_obj
+                await self.dispatcher.send_message(
+                    periodic.tg_user_id,
+                    msg_instrument_updated(instrument_obj, periodic.tracking_obj)
+                )
+
+        except Exception as err:
+            logger.error(f"<PeriodicQuotes> failed to notify quote of '{instrument_obj['symbol']}': {err}")
+
+        finally:
+            # no awaits since the last message: nobody joined the group unnoticed
+            del self._in_flight[instrument_id]
@@ -0,0 +1,80 @@
+import asyncio
+import datetime as dt
+import time
+from typing import final
+
+from loguru import logger
+
+from tg_stonks.bot.app_container import AppContainer
+from tg_stonks.bot.quotes import fetch_instrument_quotes
+from tg_stonks.providers.quota import CALL_PRIORITY, CallPriority
+
+
+@final
+class PriceRefresher:
+    """
+    Keeps prices of tracked instruments in 'fin_instruments' current:
+    every `interval` seconds instruments with trackings are refreshed in batches,
+    most tracked and least recently checked ones first;
+    only changed prices are written, so realtime listener wakes up for real moves only
+    """
+
+    def __init__(self, app: AppContainer, interval: float = 60.0, batch_size: int = 100):
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self.written = 0
+        self.unchanged = 0
+        # unchanged instruments are not written: last check is remembered here (by instrument id)
+        self._checked_at: dict[str, float] = {}
+
+    async def run(self) -> None:
+        # refreshing gives way to user commands when out of quota
+        CALL_PRIORITY.set(CallPriority.BACKGROUND)
+        while True:
+            try:
+                await self.refresh()
+            except Exception as err:
+                logger.error(f"<PriceRefresher> failed to refresh prices: {err}")
+
+            await asyncio.sleep(self.interval)
+
+    def _order(self, tracked: list[tuple[dict, int]]) -> list[dict]:
+        by_priority = sorted(
+            tracked,
+            key=lambda row: (-row[1], self._checked_at.get(row[0]["id"], 0.0), row[0]["updated_at"] or "")
+        )
+        return [instrument_obj for instrument_obj, _ in by_priority]
+
+    async def refresh(self) -> None:
+        instrument_objs = self._order(await self.app.database.tracked_instruments())
+        # untracked instruments are forgotten
+        tracked_ids = {instrument_obj["id"] for instrument_obj in instrument_objs}
+        self._checked_at = {id_: at for id_, at in self._checked_at.items() if id_ in tracked_ids}
+        for i in range(0, len(instrument_objs), self.batch_size):
+            await self._refresh_batch(instrument_objs[i:i + self.batch_size])
+
+        logger.info(
+            f"<PriceRefresher> refreshed {len(instrument_objs)} instruments"
+            f" (written: {self.written}, unchanged: {self.unchanged} in total)"
+        )
+
+    async def _refresh_batch(self, instrument_objs: list[dict]) -> None:
+        quotes = await fetch_instrument_quotes(self.app, instrument_objs)
+        updated_at = dt.datetime.now(dt.timezone.utc).isoformat()
+        changed = []
+        for instrument_obj in instrument_objs:
+            quote = quotes.get(instrument_obj["id"])
+            if quote is None:
+                continue
+
+            self._checked_at[instrument_obj["id"]] = time.monotonic()
+            if all(instrument_obj.get(field) == value for field, value in quote.items()):
+                self.unchanged += 1
+                continue
+
+            changed.append({**instrument_obj, **quote, "updated_at": updated_at})
+
+        if changed:
+            await self.app.database.upsert_instruments(changed)
+            self.written += len(changed)
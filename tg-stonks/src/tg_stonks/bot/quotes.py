@@ -0,0 +1,87 @@
+import asyncio
+
+from loguru import logger
+
+from tg_stonks.bot.app_container import AppContainer
+from tg_stonks.database.entity_models import InstrumentType
+from tg_stonks.providers.errors import BulkQuotesUnavailable
+from tg_stonks.providers.protocols import (
+    IDataProviderStockMarket,
+    IDataProviderCurrencyEx,
+    IDataProviderCryptoEx
+)
+
+
+async def fetch_instrument_quote(app: AppContainer, instrument_obj: dict) -> dict:
+    """Fetch current quote of an instrument ('fin_instruments' row) from its data provider;
+    returns instrument fields to update: 'price' for stock market instruments, 'exchange_rate' for pairs
+    """
+    prov = app.get_provider_by_name(instrument_obj["data_provider_code"])
+    symbol = instrument_obj["symbol"]
+
+    match InstrumentType(instrument_obj["type"]):
+        case InstrumentType.sm_instrument if isinstance(prov, IDataProviderStockMarket):
+            security = await prov.get_security_by_ticker(symbol)
+            return {"price": security.price}
+
+        case InstrumentType.curr_pair if isinstance(prov, IDataProviderCurrencyEx):
+            # pairs are stored as '<code_from>_<code_to>'
+            code_from, code_to = symbol.split("_")
+            pair = await prov.get_curr_pair(code_from, code_to)
+            return {"exchange_rate": pair.rate}
+
+        case InstrumentType.crypto_pair if isinstance(prov, IDataProviderCryptoEx):
+            code_from, code_to = symbol.split("_")
+            pair = await prov.get_crypto_pair(code_from, code_to)
+            return {"exchange_rate": pair.rate}
+
+        case instr_type:
+            raise RuntimeError(
+                f"Data provider '{prov.provider_name}'"
+                f" does not provide data of '{instr_type}'"
+            )
+
+
+async def fetch_instrument_quotes(
+        app: AppContainer,
+        instrument_objs: list[dict],
+        max_concurrent: int = 5) -> dict[str, dict]:
+    """Fetch current quotes of many instruments ('fin_instruments' rows): stock market instruments
+    of a provider are requested at once (bulk quotes), pairs - one by one;
+    returns instrument fields to update by instrument id (failed ones are missing)
+    """
+    quotes: dict[str, dict] = {}
+    tickers_of_provider: dict[str, dict[str, str]] = {}
+    pairs = []
+    for instrument_obj in instrument_objs:
+        if InstrumentType(instrument_obj["type"]) == InstrumentType.sm_instrument:
+            tickers = tickers_of_provider.setdefault(instrument_obj["data_provider_code"], {})
+            tickers[instrument_obj["symbol"]] = instrument_obj["id"]
+        else:
+            pairs.append(instrument_obj)
+
+    for prov_name, tickers in tickers_of_provider.items():
+        prov = app.get_provider_by_name(prov_name)
+        if not isinstance(prov, IDataProviderStockMarket):
+            logger.error(f"Data provider '{prov_name}' does not provide stock market data")
+            continue
+
+        try:
+            securities = await prov.get_securities_by_tickers(list(tickers))
+        except BulkQuotesUnavailable:
+            # called again through all wrappers of the provider: quota is charged for quotes one by one
+            securities = await prov.get_securities_by_tickers(list(tickers))
+        for ticker, security in securities.items():
+            quotes[tickers[ticker]] = {"price": security.price}
+
+    slots = asyncio.Semaphore(max_concurrent)
+
+    async def fetch_pair(instrument_obj: dict) -> None:
+        try:
+            async with slots:
+                quotes[instrument_obj["id"]] = await fetch_instrument_quote(app, instrument_obj)
+        except Exception as err:
+            logger.error(f"Failed to fetch quote of '{instrument_obj['symbol']}': {err}")
+
+    await asyncio.gather(*(fetch_pair(pair) for pair in pairs))
+    return quotes
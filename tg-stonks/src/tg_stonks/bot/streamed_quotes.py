@@ -0,0 +1,141 @@
+from typing import final
+
+from loguru import logger
+
+from tg_stonks.bot.digest import DigestScheduler
+from tg_stonks.bot.threshold_index import ThresholdIndex
+from tg_stonks.database.entity_models import InstrumentType
+from tg_stonks.database.protocols import IDatabaseAsync
+from tg_stonks.providers.models import QuoteTick
+from tg_stonks.providers.protocols import IDataProviderStreaming
+
+# source of updates passed to threshold index (see: `ThresholdIndex.crossed`)
+STREAMED_SOURCE = "streamed"
+
+
+@final
+class StreamedQuotes:
+    """
+    Notifies on quotes pushed by streaming data provider: tracked instruments of the provider
+    are subscribed to, each tick goes straight to threshold index and users' digests -
+    no polling and no DB round trip (unlike updates of 'fin_instruments');
+    subscriptions follow trackings: call `on_tracking_change` on each 'tracking' event
+    """
+
+    def __init__(
+            self,
+            provider: IDataProviderStreaming,
+            database: IDatabaseAsync,
+            digest: DigestScheduler,
+            thresholds: ThresholdIndex):
+        self.provider = provider
+        self.database = database
+        self.digest = digest
+        self.thresholds = thresholds
+        self.ticks = 0
+        # symbol -> latest known instrument ('fin_instruments' row) of tracked instruments of the provider
+        self._instruments: dict[str, dict] = {}
+        # symbol -> ids of its trackings: unsubscribed from when the last one is gone
+        self._trackings: dict[str, set[str]] = {}
+        # tracking id -> symbol: DELETE payload may have tracking 'id' only
+        self._symbol_of: dict[str, str] = {}
+
+    def _track(self, tracking_id: str, instrument_obj: dict) -> str | None:
+        """Returns symbol of instrument tracked for the first time
+        """
+        if instrument_obj["data_provider_code"] != self.provider.provider_name:
+            return None
+
+        symbol = instrument_obj["symbol"]
+        self._symbol_of[tracking_id] = symbol
+        self._trackings.setdefault(symbol, set()).add(tracking_id)
+        # streamed values are fresher than stored ones
+        if symbol in self._instruments:
+            return None
+
+        self._instruments[symbol] = instrument_obj
+        return symbol
+
+    def _untrack(self, tracking_id: str) -> str | None:
+        """Returns symbol of instrument which is not tracked anymore
+        """
+        symbol = self._symbol_of.pop(tracking_id, None)
+        if symbol is None:
+            return None
+
+        trackings = self._trackings[symbol]
+        trackings.discard(tracking_id)
+        if trackings:
+            return None
+
+        del self._trackings[symbol]
+        del self._instruments[symbol]
+        return symbol
+
+    async def load(self) -> None:
+        for tracking_obj, instrument_obj in await self.database.tracking_instruments():
+            self._track(tracking_obj["id"], instrument_obj)
+
+    async def on_tracking_change(self, payload: dict) -> None:
+        """Subscribe to instrument of the provider tracked for the first time,
+        unsubscribe from the one which lost its last tracking; only the changed tracking is queried
+        """
+        tracking_obj = payload.get("record") or payload.get("old_record") or {}
+        tracking_id = tracking_obj.get("id")
+        if tracking_id is None:
+            return
+
+        instrument_objs = []
+        if payload.get("type") != "DELETE":
+            instrument_objs = [
+                obj for _, obj in await self.database.tracking_instruments({"id": tracking_id})
+                if obj["data_provider_code"] == self.provider.provider_name
+            ]
+        # updated tracking still tracks the same instrument: nothing to change
+        if [obj["symbol"] for obj in instrument_objs] == [self._symbol_of.get(tracking_id)]:
+            return
+
+        added, removed = set(), set()
+        symbol = self._untrack(tracking_id)
+        if symbol is not None:
+            removed.add(symbol)
+        for instrument_obj in instrument_objs:
+            symbol = self._track(tracking_id, instrument_obj)
+            if symbol is not None:
+                added.add(symbol)
+
+        if added:
+            await self.provider.subscribe(list(added))
+        if removed:
+            await self.provider.unsubscribe(list(removed))
+        if added or removed:
+            logger.info(f"<StreamedQuotes> subscribed: +{len(added)} / -{len(removed)} symbols")
+
+    async def run(self) -> None:
+        await self.load()
+        logger.info(f"<StreamedQuotes> streaming quotes of {len(self._instruments)} symbols")
+        async for tick in self.provider.stream_quotes(list(self._instruments)):
+            try:
+                await self.on_tick(tick)
+            except Exception as err:
+                logger.error(f"<StreamedQuotes> failed to process tick of '{tick.symbol}': {err}")
+
+    async def on_tick(self, tick: QuoteTick) -> None:
+        instrument_obj = self._instruments.get(tick.symbol)
+        if instrument_obj is None:
+            return
+
+        self.ticks += 1
+        instr_field = "price" if InstrumentType(instrument_obj["type"]) == InstrumentType.sm_instrument \
+            else "exchange_rate"
+        if instrument_obj.get(instr_field) == tick.price:
+            return
+
+        updated_obj = {**instrument_obj, instr_field: tick.price}
+        self._instruments[tick.symbol] = updated_obj
+
+        # same path as updates of 'fin_instruments' (see: notify_on_instrument_upd),
+        #   compared with the previous streamed value only: stored prices may differ from streamed ones
+        crossed = await self.thresholds.crossed(updated_obj, instrument_obj, source=STREAMED_SOURCE)
+        for tracking_obj, tg_user_id in crossed:
+            self.digest.add(tg_user_id, updated_obj, tracking_obj)
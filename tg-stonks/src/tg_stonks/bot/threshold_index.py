@@ -0,0 +1,178 @@
+import bisect
+import time
+from dataclasses import dataclass, field
+from typing import final
+
+from loguru import logger
+
+from tg_stonks.database.protocols import IDatabaseAsync
+
+# instrument field -> tracking field holding the threshold for it
+THRESHOLD_FIELDS = {
+    "price": "on_price",
+    "exchange_rate": "on_rate",
+}
+
+# source of updates of instruments stored in 'fin_instruments' (see: `ThresholdIndex.crossed`)
+STORED_SOURCE = "stored"
+
+
+@dataclass
+class _SortedThresholds:
+    keys: list[float] = field(default_factory=list)
+    rows: list[tuple[dict, int]] = field(default_factory=list)
+
+    def insert(self, key: float, row: tuple[dict, int]) -> None:
+        i = bisect.bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.rows.insert(i, row)
+
+    def remove(self, tracking_id: str) -> bool:
+        for i, (tracking_obj, _) in enumerate(self.rows):
+            if tracking_obj["id"] == tracking_id:
+                del self.keys[i]
+                del self.rows[i]
+                return True
+        return False
+
+    def crossed(self, old: float, new: float) -> list[tuple[dict, int]]:
+        if new > old:
+            # moving up: old < threshold <= new
+            lo, hi = bisect.bisect_right(self.keys, old), bisect.bisect_right(self.keys, new)
+        elif new < old:
+            # moving down: new <= threshold < old
+            lo, hi = bisect.bisect_left(self.keys, new), bisect.bisect_left(self.keys, old)
+        else:
+            return []
+        return self.rows[lo:hi]
+
+
+@dataclass
+class _InstrumentTrackings:
+    loaded_at: float
+    by_field: dict[str, _SortedThresholds] = field(
+        default_factory=lambda: {f: _SortedThresholds() for f in THRESHOLD_FIELDS}
+    )
+
+
+@final
+class ThresholdIndex:
+    """
+    In-memory index of trackings (with telegram ids of users who track them)
+    per instrument, sorted by threshold ('on_price' / 'on_rate');
+    on instrument update only trackings whose threshold lies
+    between old and new values are selected (binary search)
+
+    Trackings of an instrument are loaded lazily, on its first update,
+    and reloaded once they are older than `max_age` seconds (`None` - never);
+    trackings loaded while some of them changed (see: `invalidate`, `remove`)
+    are used for that update only - not kept, as they may miss the change
+    """
+
+    def __init__(self, database: IDatabaseAsync, max_age: float | None = 300.0):
+        self.database = database
+        self.max_age = max_age
+        self._instruments: dict[str, _InstrumentTrackings] = {}
+        # tracking id -> (instrument id, instrument fields it is indexed by): removal without scans
+        self._locations: dict[str, tuple[str, list[str]]] = {}
+        # instrument id -> number of changes of its trackings; changes of trackings of unknown instruments
+        #   are counted in `_unknown_changes`: loads which overlapped either are not published
+        self._versions: dict[str, int] = {}
+        self._unknown_changes = 0
+        # instrument id -> source of updates -> last seen values of instrument fields:
+        #   used when update from the same source has no old record
+        self._last_values: dict[str, dict[str, dict[str, float]]] = {}
+
+    def _is_stale(self, entry: _InstrumentTrackings) -> bool:
+        return self.max_age is not None and time.monotonic() - entry.loaded_at > self.max_age
+
+    async def load(self, instrument_id: str) -> _InstrumentTrackings:
+        version = (self._versions.get(instrument_id, 0), self._unknown_changes)
+        entry = _InstrumentTrackings(loaded_at=time.monotonic())
+        rows = await self.database.trackings_with_tg_ids({"instrument": instrument_id})
+        for tracking_obj, tg_user_id in rows:
+            self._insert(entry, instrument_id, tracking_obj, tg_user_id)
+
+        # published only when fully loaded, and only if nothing changed meanwhile
+        if version == (self._versions.get(instrument_id, 0), self._unknown_changes):
+            self._instruments[instrument_id] = entry
+            logger.debug(f"<ThresholdIndex> loaded trackings of instrument '{instrument_id}'")
+        else:
+            logger.debug(f"<ThresholdIndex> trackings of instrument '{instrument_id}' changed while loading")
+
+        return entry
+
+    def remove(self, tracking_id: str) -> None:
+        location = self._locations.pop(tracking_id, None)
+        if location is None:
+            # could be among trackings being loaded right now
+            self._unknown_changes += 1
+            return
+
+        instrument_id, instr_fields = location
+        self._bump(instrument_id)
+        entry = self._instruments.get(instrument_id)
+        # dropped meanwhile: reloaded without this tracking
+        if entry is None:
+            return
+
+        # from all fields: a tracking may have both 'on_price' and 'on_rate'
+        for instr_field in instr_fields:
+            entry.by_field[instr_field].remove(tracking_id)
+
+    def invalidate(self, instrument_id: str) -> None:
+        """Drop loaded trackings of the instrument (reloaded on its next update),
+        last seen values are kept - so the next update could still cross thresholds
+        """
+        self._bump(instrument_id)
+        self._instruments.pop(instrument_id, None)
+
+    def _bump(self, instrument_id: str) -> None:
+        self._versions[instrument_id] = self._versions.get(instrument_id, 0) + 1
+
+    async def crossed(
+            self,
+            instrument_obj: dict,
+            old_instrument_obj: dict | None = None,
+            source: str = STORED_SOURCE) -> list[tuple[dict, int]]:
+        """Select trackings (with telegram ids) which thresholds were crossed by instrument update;
+        values are compared with the previous ones of the same `source` only: sources quoting
+        slightly different prices (e.g. streamed and refreshed ones) do not flip-flop around a threshold,
+        though each of them notifies of a crossing once
+        """
+        instrument_id = instrument_obj["id"]
+        entry = self._instruments.get(instrument_id)
+        if entry is None or self._is_stale(entry):
+            entry = await self.load(instrument_id)
+
+        last_values = self._last_values.setdefault(instrument_id, {})
+        old_values = last_values.get(source, {})
+        new_values = {}
+        matched = []
+        for instr_field in THRESHOLD_FIELDS:
+            new = instrument_obj.get(instr_field)
+            if new is None:
+                continue
+
+            new_values[instr_field] = float(new)
+            old = (old_instrument_obj or {}).get(instr_field)
+            if old is None:
+                old = old_values.get(instr_field)
+            # previous value is unknown: nothing could be crossed
+            if old is None:
+                continue
+
+            matched.extend(entry.by_field[instr_field].crossed(float(old), float(new)))
+
+        last_values[source] = new_values
+        return matched
+
+    def _insert(self, entry: _InstrumentTrackings, instrument_id: str, tracking_obj: dict, tg_user_id: int) -> None:
+        instr_fields = []
+        for instr_field, tracking_field in THRESHOLD_FIELDS.items():
+            threshold = tracking_obj.get(tracking_field)
+            if threshold is not None:
+                entry.by_field[instr_field].insert(float(threshold), (tracking_obj, tg_user_id))
+                instr_fields.append(instr_field)
+
+        self._locations[tracking_obj["id"]] = (instrument_id, instr_fields)
@@ -1,3 +1,8 @@
+import os
+
+from tg_stonks.providers.provider_type import ProviderT
+from tg_stonks.providers.quota import QuotaLimits
+from tg_stonks.upd_listener.work_queue import OverflowPolicy
 from tg_stonks.utils import creds
 
 # ensure needed environment variables are loaded
@@ -10,7 +15,70 @@ TELEGRAM_BOT_TOKEN = creds.get_from_env("TELEGRAM_BOT_TOKEN")
 DEFAULT_BOT_SESSION_NAME = "stonks-tg-stonks"
 DEFAULT_DATA_PROVIDER = "alpha_vantage"
 ALPHA_VANTAGE_KEY = creds.get_from_env("ALPHA_VANTAGE_TOKEN")
+# size of the pool of keep-alive connections shared by all alpha-vantage API calls
+ALPHA_VANTAGE_MAX_CONNECTIONS = 10
+# deadline of every API request (seconds)
+ALPHA_VANTAGE_REQUEST_TIMEOUT = 10.0
+# e.g. local stand-in server (see: impl/alpha_vantage_stub.py) for offline runs
+ALPHA_VANTAGE_BASE_URL = os.environ.get("ALPHA_VANTAGE_BASE_URL", "https://www.alphavantage.co/query")
+# API quota (free plan): calls over it are queued, user commands go first;
+#   a fifth of it is kept for user commands, which wait for quota for at most half a minute
+ALPHA_VANTAGE_QUOTA = QuotaLimits(per_minute=5, per_day=25, interactive_reserve=0.2, interactive_max_wait=30.0)
+# payloads are remapped and coerced without full validation ('model_construct'): with pydantic 2
+#   it is slower than validation by prebuilt adapters (see: benchmarks/parse_payloads.py), so it is off
+ALPHA_VANTAGE_TRUSTED_PAYLOADS = False
+
+# quotes cache (seconds): quotes are served from cache for TTL of their kind,
+#   then stale for QUOTE_CACHE_STALE_TTL more while refreshed in the background
+QUOTE_CACHE_TTL = {
+    ProviderT.STOCK_MARKET: 60.0,
+    ProviderT.CURR_FOREX: 60.0,
+    ProviderT.CURR_CRYPTO: 30.0,
+}
+QUOTE_CACHE_STALE_TTL = 30.0
+QUOTE_CACHE_SIZE = 1024
+# search results cache: results of a query are kept for SEARCH_CACHE_TTL (seconds)
+SEARCH_CACHE_TTL = 6 * 60 * 60
+SEARCH_CACHE_SIZE = 256
+# answer longer queries from results of their prefix (approximate: provider's matching is fuzzy)
+SEARCH_CACHE_DERIVE_FROM_PREFIX = False
+# users allowing fallback providers get a hedged request to another provider
+#   when the set one is slower than this percentile of its recent latency
+HEDGE_PERCENTILE = 0.95
+# circuit breaker of each provider method: opened by consecutive timeouts / connection errors,
+#   calls fail fast while it's open, then a single probe call is let through
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOL_DOWN = 30.0
+# daily price history is stored locally (memory-mapped columns), only missing days are requested
+PRICE_HISTORY_DIR = "../../data/price_history"
 
 SUPABASE_URL = creds.get_from_env("SUPABASE_URL")
 SUPABASE_KEY = creds.get_from_env("SUPABASE_SEC_KEY")
 SUPABASE_ID = creds.get_from_env("SUPABASE_ID")
+# users (inner ids & parsed settings) cached by telegram id: dropped on changes,
+#   expire after USER_CACHE_TTL (seconds) in case a change was missed
+USER_CACHE_SIZE = 4096
+USER_CACHE_TTL = 15 * 60.0
+
+# notifications sending (telegram limits: ~30 msg/sec overall, ~1 msg/sec per chat)
+NOTIFY_WORKERS = 8
+NOTIFY_GLOBAL_RATE = 25.0
+NOTIFY_PER_CHAT_RATE = 1.0
+# updates are sent as per-user digests: once per tracking's 'notify_every' or this window (seconds)
+DIGEST_DEFAULT_WINDOW = 60.0
+# periodic quotes ('notify every N minutes' trackings) are checked once per tick (seconds)
+PERIODIC_QUOTES_TICK = 1.0
+
+# prices of tracked instruments are refreshed every PRICE_REFRESH_INTERVAL seconds
+PRICE_REFRESH_INTERVAL = 5 * 60.0
+PRICE_REFRESH_BATCH_SIZE = 100
+# CSV of 'symbol,price' ticks replayed as quotes pushed by default data provider (offline runs), e.g.
+#   QUOTE_REPLAY_FEED=../../data/ticks.csv
+QUOTE_REPLAY_FEED = os.environ.get("QUOTE_REPLAY_FEED")
+QUOTE_REPLAY_INTERVAL = 1.0
+
+# realtime updates processing
+LISTENER_WORKERS = 4
+LISTENER_QUEUE_SIZE = 1000
+LISTENER_OVERFLOW_POLICY = OverflowPolicy.COALESCE
+LISTENER_COALESCE_WINDOW = 1.0  # seconds; 0 - disabled
@@ -1,7 +1,7 @@
 import datetime
 from enum import unique, StrEnum
 from typing import Optional
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field
 from pydantic.types import UUID4
@@ -71,16 +71,16 @@ class TrackingEntity(BaseModel):
     notify_every: Optional[str] = None
 
 
-def make_tracking_obj_of_instrument(
-        user: UserEntity,
-        instrument: InstrumentEntity,
+def make_tracking_obj(
+        user_id: UUID,
+        instrument_id: UUID,
         on_price: float | None = None,
         on_rate: float | None = None,
         notify_every: str | None = None) -> dict:
     # set everything except "id", and "created_at" field
     return {
-        "instrument": str(instrument.id),
-        "tracked_by": str(user.id),
+        "instrument": str(instrument_id),
+        "tracked_by": str(user_id),
         "on_price": on_price,
         "on_rate": on_rate,
         "notify_every": notify_every
@@ -1,14 +1,15 @@
 import asyncio
-from typing import Callable, Any
+import functools
+from typing import Callable, Any, Awaitable
 
-from returns.result import Success, Result, safe
+from returns.result import Success, Failure, Result, safe
 
 from tg_stonks.database.entity_models import (
     UserEntity,
     InstrumentEntity,
     TrackingEntity
 )
-from tg_stonks.database.protocols import IDatabase
+from tg_stonks.database.protocols import IDatabase, IDatabaseAsync
 from tg_stonks.database.user_settings import DataProviderConfig, UserSettings
 
 
@@ -68,10 +69,21 @@ def try_get_user_by_id(db: IDatabase, tg_user_id: int):
     return db.user_with_tg_id(tg_user_id)
 
 
-@safe
-def try_get_settings_of_user(db: IDatabase, tg_user_id: int):
-    settings: dict = db.settings_of_tg_id(tg_user_id)
+def safe_async(func: Callable[..., Awaitable]) -> Callable[..., Awaitable[Result]]:
+    """Same as `returns.result.safe`, but for coroutine functions:
+    awaited result is wrapped into `Success`, raised exception - into `Failure`
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> Result:
+        try:
+            return Success(await func(*args, **kwargs))
+        except Exception as exc:
+            return Failure(exc)
+
+    return wrapper
 
+
+def to_settings(settings: dict | None) -> UserSettings:
     # 'settings' column could be NULL
     # - so, this should prevent validation error
     if settings is None:
@@ -87,6 +99,23 @@ def try_get_settings_of_user(db: IDatabase, tg_user_id: int):
     )
 
 
+@safe
+def try_get_settings_of_user(db: IDatabase, tg_user_id: int):
+    return to_settings(db.settings_of_tg_id(tg_user_id))
+
+
+@safe_async
+async def try_get_user_by_id_async(db: IDatabaseAsync, tg_user_id: int):
+    return await db.user_with_tg_id(tg_user_id)
+
+
+@safe_async
+async def try_get_settings_of_user_async(db: IDatabaseAsync, tg_user_id: int):
+    user = await db.cached_user(tg_user_id)
+    # cached settings are shared: callers get their own copy to modify
+    return user.settings.model_copy(deep=True)
+
+
 @safe
 def try_get_provider(db: IDatabase, tg_user_id: int, provider_t: str):
     settings: dict = db.settings_of_tg_id(tg_user_id)
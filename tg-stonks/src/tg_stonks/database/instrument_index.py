@@ -0,0 +1,55 @@
+from typing import final
+from uuid import UUID
+
+from tg_stonks.database.entity_models import InstrumentType
+
+# (type, data provider code, symbol)
+InstrumentKey = tuple[InstrumentType, str, str]
+
+
+def key_of(instrument_obj: dict) -> InstrumentKey:
+    return (
+        InstrumentType(instrument_obj["type"]),
+        instrument_obj["data_provider_code"],
+        instrument_obj["symbol"]
+    )
+
+
+@final
+class InstrumentIndex:
+    """
+    In-memory index of ids of 'fin_instruments' rows by (type, data provider code, symbol):
+    loaded in bulk at startup, kept current by inserted instruments and realtime events;
+    lookups it misses (e.g. until it is loaded) are answered by the database
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._ids: dict[InstrumentKey, UUID] = {}
+        # id -> key: DELETE events may have 'id' only
+        self._keys: dict[UUID, InstrumentKey] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def load(self, instrument_objs: list[dict]) -> None:
+        self._ids.clear()
+        self._keys.clear()
+        for instrument_obj in instrument_objs:
+            self.add(instrument_obj)
+        self.loaded = True
+
+    def add(self, instrument_obj: dict) -> None:
+        instrument_id = UUID(str(instrument_obj["id"]))
+        key = key_of(instrument_obj)
+        self.remove(instrument_id)
+        self._ids[key] = instrument_id
+        self._keys[instrument_id] = key
+
+    def remove(self, instrument_id: UUID | str) -> None:
+        key = self._keys.pop(UUID(str(instrument_id)), None)
+        if key is not None:
+            self._ids.pop(key, None)
+
+    def id_of(self, type_of_instr: InstrumentType, symbol: str, data_provider: str) -> UUID | None:
+        return self._ids.get((type_of_instr, data_provider, symbol))
@@ -1,5 +1,9 @@
 from abc import abstractmethod
 from typing import Protocol, runtime_checkable
+from uuid import UUID
+
+from tg_stonks.database.entity_models import InstrumentType
+from tg_stonks.database.user_cache import CachedUser
 
 
 @runtime_checkable
@@ -48,6 +52,48 @@ class IDatabase(Protocol):
     def trackings_with(self, fields: dict) -> list[dict]:
         ...
 
+    @abstractmethod
+    def trackings_with_tg_ids(self, fields: dict) -> list[tuple[dict, int]]:
+        """Select trackings from 'tracking' table which fields values match specified dictionary,
+        each paired with 'tg_user_id' of the user who tracks it; done in a single query (JOIN on 'bot_users')
+        """
+        ...
+
+    @abstractmethod
+    def periodic_trackings(self, fields: dict | None = None) -> list[tuple[dict, dict, int]]:
+        """Select trackings with 'notify_every' set (and fields values matching optional dictionary),
+        each with its instrument ('fin_instruments' row)
+        and 'tg_user_id' of the user who tracks it; done in a single query
+        """
+        ...
+
+    @abstractmethod
+    def instruments_updated_since(self, since: str) -> list[dict]:
+        """Select instruments from 'fin_instruments' table updated after 'since' timestamp (ISO format),
+        ordered by 'updated_at' field
+        """
+        ...
+
+    @abstractmethod
+    def tracking_instruments(self, fields: dict | None = None) -> list[tuple[dict, dict]]:
+        """Select trackings (fields values matching optional dictionary),
+        each paired with its instrument ('fin_instruments' row); done in a single query
+        """
+        ...
+
+    @abstractmethod
+    def tracked_instruments(self) -> list[tuple[dict, int]]:
+        """Select instruments ('fin_instruments' rows) tracked by at least one user,
+        each paired with the number of its trackings; done in a single query (JOIN on 'tracking')
+        """
+        ...
+
+    @abstractmethod
+    def upsert_instruments(self, instruments: list[dict]):
+        """Insert or update (by 'id') full 'fin_instruments' rows in a single query
+        """
+        ...
+
     @abstractmethod
     def add_new_user(self, tg_user_id: int):
         ...
@@ -87,3 +133,148 @@ class IDatabase(Protocol):
     @abstractmethod
     def update_instrument(self):
         ...
+
+
+# Non-blocking variant of 'IDatabase': same methods, but every one of them should be awaited
+@runtime_checkable
+class IDatabaseAsync(Protocol):
+    @abstractmethod
+    async def user_with(self, fields: dict) -> list[dict]:
+        """Select users from 'bot_users' table which fields values match specified dictionary
+        """
+        ...
+
+    @abstractmethod
+    async def user_with_tg_id(self, tg_user_id: int) -> dict:
+        """Get user from 'bot_users' table with matching 'tg_user_id' field;
+        Expected exactly one user with matching 'tg_user_id'
+        """
+        ...
+
+    @abstractmethod
+    async def settings_of_tg_id(self, tg_user_id: int) -> dict:
+        """Get settings (user's settings stored in JSON) of the user with specified 'tg_user_id' field;
+        Expected exactly one user = exactly one user settings JSON
+        """
+        ...
+
+    @abstractmethod
+    async def cached_user(self, tg_user_id: int) -> CachedUser:
+        """Get inner id and parsed settings of the user with specified 'tg_user_id' field,
+        read through in-process cache (dropped on changes of the user);
+        Expected exactly one user with matching 'tg_user_id'
+        """
+        ...
+
+    @abstractmethod
+    async def find_curr_pair(self, code_from: str, code_to: str, data_provider: str) -> dict:
+        ...
+
+    @abstractmethod
+    async def find_crypto_pair(self, code_from: str, code_to: str, data_provider: str) -> dict:
+        ...
+
+    @abstractmethod
+    async def find_stock_market_instrument(self, symbol: str, data_provider: str) -> dict:
+        ...
+
+    @abstractmethod
+    async def instrument_id_of(self, type_of_instr: InstrumentType, symbol: str, data_provider: str) -> UUID | None:
+        """Get id of instrument from 'fin_instruments' table by its type, symbol and data provider code
+        (from in-memory index, misses are looked up in the table); `None` if there is no such instrument
+        """
+        ...
+
+    @abstractmethod
+    async def find_instrument_with(self, fields: dict) -> dict:
+        ...
+
+    @abstractmethod
+    async def find_tracking_with(self, fields: dict) -> dict:
+        ...
+
+    @abstractmethod
+    async def trackings_with(self, fields: dict) -> list[dict]:
+        ...
+
+    @abstractmethod
+    async def trackings_with_tg_ids(self, fields: dict) -> list[tuple[dict, int]]:
+        """Select trackings from 'tracking' table which fields values match specified dictionary,
+        each paired with 'tg_user_id' of the user who tracks it; done in a single query (JOIN on 'bot_users')
+        """
+        ...
+
+    @abstractmethod
+    async def periodic_trackings(self, fields: dict | None = None) -> list[tuple[dict, dict, int]]:
+        """Select trackings with 'notify_every' set (and fields values matching optional dictionary),
+        each with its instrument ('fin_instruments' row)
+        and 'tg_user_id' of the user who tracks it; done in a single query
+        """
+        ...
+
+    @abstractmethod
+    async def instruments_updated_since(self, since: str) -> list[dict]:
+        """Select instruments from 'fin_instruments' table updated after 'since' timestamp (ISO format),
+        ordered by 'updated_at' field
+        """
+        ...
+
+    @abstractmethod
+    async def tracking_instruments(self, fields: dict | None = None) -> list[tuple[dict, dict]]:
+        """Select trackings (fields values matching optional dictionary),
+        each paired with its instrument ('fin_instruments' row); done in a single query
+        """
+        ...
+
+    @abstractmethod
+    async def tracked_instruments(self) -> list[tuple[dict, int]]:
+        """Select instruments ('fin_instruments' rows) tracked by at least one user,
+        each paired with the number of its trackings; done in a single query (JOIN on 'tracking')
+        """
+        ...
+
+    @abstractmethod
+    async def upsert_instruments(self, instruments: list[dict]):
+        """Insert or update (by 'id') full 'fin_instruments' rows in a single query
+        """
+        ...
+
+    @abstractmethod
+    async def add_new_user(self, tg_user_id: int):
+        ...
+
+    @abstractmethod
+    async def add_curr_pair(self):
+        ...
+
+    @abstractmethod
+    async def add_crypto_pair(self):
+        ...
+
+    @abstractmethod
+    async def add_instrument(self, instrument_fields: dict):
+        ...
+
+    @abstractmethod
+    async def add_tracking(self, tracking_fields: dict):
+        ...
+
+    @abstractmethod
+    async def delete_user_by_tg_id(self, tg_user_id: int):
+        ...
+
+    @abstractmethod
+    async def delete_instrument(self):
+        ...
+
+    @abstractmethod
+    async def delete_tracking(self):
+        ...
+
+    @abstractmethod
+    async def update_user(self, user_id: int, fields: dict):
+        ...
+
+    @abstractmethod
+    async def update_instrument(self):
+        ...
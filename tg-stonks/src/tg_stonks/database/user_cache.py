@@ -0,0 +1,54 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, final
+from uuid import UUID
+
+from tg_stonks.database.user_settings import UserSettings
+from tg_stonks.utils.ttl_cache import CacheStats, TTLCache
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    Inner id and parsed settings of a bot user
+    """
+    id: UUID
+    tg_user_id: int
+    settings: UserSettings
+
+
+@final
+class UserCache:
+    """
+    Bounded cache of users by telegram id (least recently used ones are evicted);
+    entries are dropped on changes of users (see: SupabaseDBAsync, sync_on_user_change)
+    and expire after `ttl` seconds - in case a change was missed
+    """
+
+    def __init__(self, max_size: int = 4096, ttl: float = 15 * 60.0, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._cache: TTLCache[CachedUser] = TTLCache(max_size, clock=clock)
+        # bumped by every invalidation: users read before it are not cached (they may be outdated)
+        self.generation = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._cache.stats
+
+    def get(self, tg_user_id: int) -> CachedUser | None:
+        entry = self._cache.get(tg_user_id)
+        return entry.value if entry is not None else None
+
+    def put(self, user: CachedUser, generation: int) -> None:
+        """Cache user read when cache was at `generation`
+        """
+        if generation == self.generation:
+            self._cache.put(user.tg_user_id, user, self.ttl)
+
+    def invalidate(self, tg_user_id: int) -> None:
+        self.generation += 1
+        self._cache.invalidate(tg_user_id)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._cache.clear()
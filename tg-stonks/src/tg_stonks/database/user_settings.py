@@ -28,6 +28,8 @@ class UserSettings(BaseModel):
     provider_currency: Optional[DataProviderConfig] = None
     provider_crypto: Optional[DataProviderConfig] = None
     other_settings: Optional[dict] = None
+    # data of other providers may be used when the set one is slow or fails
+    allow_fallback_providers: bool = False
 
     @field_validator("other_settings", mode="before")
     def prevent_none(cls, value):
@@ -47,8 +49,10 @@ class UserSettings(BaseModel):
         ns = "⚠️ not set"
         msg_beg = "🔧 Settings:"
         msg_end = (
-            "\n➜ Other settings: "
-            + ns if self.other_settings is None else str(self.other_settings)
+            "\n➜ Fallback providers: "
+            + ("allowed" if self.allow_fallback_providers else "not allowed")
+            + "\n➜ Other settings: "
+            + (ns if self.other_settings is None else str(self.other_settings))
         )
         if self.is_all_providers_null():
             return msg_beg + "\n➜ Providers: ⚠️ *providers not set*" + msg_end
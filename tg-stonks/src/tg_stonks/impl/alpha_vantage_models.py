@@ -1,7 +1,8 @@
 import datetime as dt
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar
 
-from pydantic import Field, field_validator
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 
 from tg_stonks.providers.models import (
     StockMarketInstrument,
@@ -63,3 +64,100 @@ class SearchQueryResAV(SearchQueryRes):
             f"\n• ⏰ Open from __{self.market_open}__ to __{self.market_close}__" \
             f"\n• Timezone: {self.timezone}"
         return super().to_markdown() + md_str_end
+
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# adapters are built once: validating a list in one call is cheaper than model by model
+SEARCH_RESULTS_ADAPTER = TypeAdapter(list[SearchQueryResAV])
+QUOTES_ADAPTER = TypeAdapter(list[StockMarketInstrumentAV])
+
+
+def _int_or_float(value) -> int | float:
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def _optional_float(value) -> float | None:
+    return None if value in (None, "", "-") else float(value)
+
+
+# trusted mode coercion of API values (strings mostly) by field annotation, the rest is kept as is
+_COERCE_BY_ANNOTATION: dict[Any, Callable[[Any], Any]] = {
+    float: float,
+    int | float: _int_or_float,
+    Optional[float]: _optional_float,
+    dt.date: dt.date.fromisoformat,
+    dt.datetime: dt.datetime.fromisoformat,
+}
+
+
+@dataclass(frozen=True)
+class _TrustedFields:
+    kept: list[tuple[str, str]]                         # (payload key, field name) of required fields
+    coerced: list[tuple[str, str, Callable[[Any], Any]]]  # (payload key, field name, coerce) of required fields
+    optional: list[tuple[str, str, Any]]                # (payload key, field name, default), kept as is
+
+
+_trusted_fields_cache: dict[type[BaseModel], _TrustedFields] = {}
+
+
+def _trusted_fields(model: type[BaseModel]) -> _TrustedFields:
+    if model not in _trusted_fields_cache:
+        kept, coerced, optional = [], [], []
+        for name, info in model.model_fields.items():
+            key = info.alias or name
+            coerce = _COERCE_BY_ANNOTATION.get(info.annotation)
+            if not info.is_required():
+                optional.append((key, name, info.get_default(call_default_factory=True)))
+            elif coerce is None:
+                kept.append((key, name))
+            else:
+                coerced.append((key, name, coerce))
+
+        _trusted_fields_cache[model] = _TrustedFields(kept, coerced, optional)
+    return _trusted_fields_cache[model]
+
+
+def construct_trusted(model: type[ModelT], payload: dict) -> ModelT:
+    """Build model of a trusted payload: keys are remapped and numbers coerced,
+    nothing else is validated (unlike `model_validate`)
+    """
+    spec = _trusted_fields(model)
+    try:
+        fields = {name: payload[key] for key, name in spec.kept}
+        for key, name, coerce in spec.coerced:
+            fields[name] = coerce(payload[key])
+    except KeyError as err:
+        raise ValueError(f"{model.__name__}: {err} is missing in payload") from err
+    for key, name, default in spec.optional:
+        fields[name] = payload.get(key, default)
+
+    return model.model_construct(**fields)
+
+
+def parse_search_results(results: list[dict], trusted: bool = False) -> list[SearchQueryResAV]:
+    if trusted:
+        return [construct_trusted(SearchQueryResAV, r) for r in results]
+    return SEARCH_RESULTS_ADAPTER.validate_python(results, strict=True)
+
+
+def parse_quotes(quotes: list[dict], trusted: bool = False) -> list[StockMarketInstrumentAV]:
+    if trusted:
+        return [construct_trusted(StockMarketInstrumentAV, q) for q in quotes]
+    # API returns numbers as strings: validated in lax mode
+    return QUOTES_ADAPTER.validate_python(quotes)
+
+
+def parse_quote(quote: dict, trusted: bool = False) -> StockMarketInstrumentAV:
+    if trusted:
+        return construct_trusted(StockMarketInstrumentAV, quote)
+    return StockMarketInstrumentAV.model_validate(quote)
+
+
+def parse_pair(pair: dict, trusted: bool = False) -> ExchangePairAV:
+    if trusted:
+        return construct_trusted(ExchangePairAV, pair)
+    return ExchangePairAV.model_validate(pair)
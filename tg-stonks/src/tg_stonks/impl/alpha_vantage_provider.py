@@ -1,22 +1,58 @@
+import asyncio
+import datetime as dt
+import math
 from typing import final
 
+import aiohttp
+from alpha_vantage.async_support.alphavantage import AlphaVantage as AlphaVantageAsync
 from alpha_vantage.async_support.cryptocurrencies import CryptoCurrencies as CryptoCurrenciesAsync
 from alpha_vantage.async_support.foreignexchange import ForeignExchange as ForeignExchangeAsync
 from alpha_vantage.async_support.timeseries import TimeSeries as TimeSeriesAsync
 
+from loguru import logger
+
 from tg_stonks.impl.alpha_vantage_models import (
     StockMarketInstrumentAV,
     ExchangePairAV,
-    SearchQueryResAV
+    SearchQueryResAV,
+    parse_pair,
+    parse_quote,
+    parse_quotes,
+    parse_search_results
 )
 from tg_stonks.providers.api_client_middleware import ApiClientMiddleware
+from tg_stonks.providers.errors import BulkQuotesUnavailable
+from tg_stonks.providers.price_history import PriceHistory
 from tg_stonks.providers.protocols import (
     IDataProviderStockMarket,
     IDataProviderCurrencyEx,
-    IDataProviderCryptoEx
+    IDataProviderCryptoEx,
+    IDataProviderTimeSeries
 )
 from tg_stonks.providers.provider_type import ProviderT
 
+API_URL = "https://www.alphavantage.co/query"
+# symbols per request of realtime bulk quotes endpoint
+BULK_QUOTES_MAX_SYMBOLS = 100
+# days of daily time series in 'compact' output (the rest - in 'full' one)
+COMPACT_SERIES_DAYS = 100
+
+
+def bulk_quote_to_global_quote(quote: dict) -> dict:
+    # realtime bulk quotes use plain keys, global quote endpoint uses numbered ones
+    return {
+        "01. symbol": quote["symbol"],
+        "02. open": quote["open"],
+        "03. high": quote["high"],
+        "04. low": quote["low"],
+        "05. price": quote["close"],
+        "06. volume": quote["volume"],
+        "07. latest trading day": quote["timestamp"][:10],
+        "08. previous close": quote["previous_close"],
+        "09. change": quote["change"],
+        "10. change percent": quote["change_percent"],
+    }
+
 
 @final
 class ClientTimeSeries(ApiClientMiddleware):
@@ -36,11 +72,39 @@ class ClientCryptoEx(ApiClientMiddleware):
         self._client = CryptoCurrenciesAsync(key)
 
 
+class _AtBaseUrl:
+    """
+    Mixin of alpha-vantage clients: API calls go to `base_url`
+    (e.g. local stand-in server, see: alpha_vantage_stub) instead of the real API
+    """
+    base_url: str = API_URL
+
+    async def _handle_api_call(self, url: str):
+        url = url.replace(AlphaVantageAsync._ALPHA_VANTAGE_API_URL, f"{self.base_url}?", 1)
+        return await super()._handle_api_call(url)
+
+
+@final
+class _TimeSeries(_AtBaseUrl, TimeSeriesAsync):
+    pass
+
+
+@final
+class _ForeignExchange(_AtBaseUrl, ForeignExchangeAsync):
+    pass
+
+
+@final
+class _CryptoCurrencies(_AtBaseUrl, CryptoCurrenciesAsync):
+    pass
+
+
 @final
 class AlphaVantageAPI(
     IDataProviderStockMarket,
     IDataProviderCurrencyEx,
-    IDataProviderCryptoEx
+    IDataProviderCryptoEx,
+    IDataProviderTimeSeries
 ):
     data_provider_name: str = "alpha_vantage"
 
@@ -52,46 +116,197 @@ class AlphaVantageAPI(
     def provider_type(self) -> ProviderT:
         return ProviderT.UNIVERSAL
 
-    def __init__(self, key: str):
+    def __init__(
+            self,
+            key: str,
+            base_url: str = API_URL,
+            max_connections: int = 10,
+            keepalive_timeout: float = 30.0,
+            max_concurrent_quotes: int = 5,
+            trusted_payloads: bool = False,
+            request_timeout: float | None = 10.0):
         self._api_key = key
+        # payloads of trusted API are remapped and coerced without full validation (cheaper on CPU)
+        self.trusted_payloads = trusted_payloads
+        self.base_url = base_url
+        # realtime bulk quotes are premium: on free plan quotes are fetched one by one
+        self.bulk_quotes_available = True
+        self._max_concurrent_quotes = max_concurrent_quotes
+        self._max_connections = max_connections
+        self._keepalive_timeout = keepalive_timeout
+        # deadline (seconds) of every API request: hanging API fails calls instead of piling them up
+        self._request_timeout = request_timeout
+        # one pooled session shared by all alpha-vantage clients:
+        #   opened on startup (or on first call) and closed on shutdown
+        self._session: aiohttp.ClientSession | None = None
+        self._ts: _TimeSeries | None = None
+        self._fx: _ForeignExchange | None = None
+        self._cc: _CryptoCurrencies | None = None
+
+    async def open(self) -> None:
+        if self._session is not None and not self._session.closed:
+            return
+
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self._max_connections,
+                keepalive_timeout=self._keepalive_timeout
+            ),
+            timeout=aiohttp.ClientTimeout(total=self._request_timeout)
+        )
+        self._ts, self._fx, self._cc = (
+            _TimeSeries(self._api_key),
+            _ForeignExchange(self._api_key),
+            _CryptoCurrencies(self._api_key)
+        )
+        for client in (self._ts, self._fx, self._cc):
+            client.session = self._session
+            client.base_url = self.base_url
+
+        logger.info(f"API session opened ({self.__class__.__name__})")
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info(f"API session closed ({self.__class__.__name__})")
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.close()
+
+    async def _time_series(self) -> _TimeSeries:
+        await self.open()
+        return self._ts
+
+    async def _forex(self) -> _ForeignExchange:
+        await self.open()
+        return self._fx
+
+    async def _crypto(self) -> _CryptoCurrencies:
+        await self.open()
+        return self._cc
 
     async def search_stock_market(self, query: str) -> list[SearchQueryResAV]:
-        async with ClientTimeSeries(self._api_key) as ts:
-            # run search query and retrieve matching instruments
-            results, _ = await ts.client.get_symbol_search(query)
-            # add data provider field
-            for res_dict in results:
-                res_dict["data_provider"] = self.data_provider_name
+        ts = await self._time_series()
+        # run search query and retrieve matching instruments
+        results, _ = await ts.get_symbol_search(query)
+        # add data provider field
+        for res_dict in results:
+            res_dict["data_provider"] = self.data_provider_name
 
-            return [SearchQueryResAV.model_validate(r, strict=True) for r in results]
+        return parse_search_results(results, trusted=self.trusted_payloads)
 
     async def get_security_by_ticker(self, ticker: str) -> StockMarketInstrumentAV:
-        # init alpha-vantage client for stock market data
-        async with ClientTimeSeries(self._api_key) as ts:
-            # retrieve stock data by specified ticker symbol
-            resp, _ = await ts.client.get_quote_endpoint(symbol=ticker)
-            resp["data_provider"] = self.data_provider_name
-            instrument = StockMarketInstrumentAV.model_validate(resp, strict=True)
-            return instrument
+        ts = await self._time_series()
+        # retrieve stock data by specified ticker symbol
+        resp, _ = await ts.get_quote_endpoint(symbol=ticker)
+        resp["data_provider"] = self.data_provider_name
+        return parse_quote(resp, trusted=self.trusted_payloads)
+
+    async def get_securities_by_tickers(self, tickers: list[str]) -> dict[str, StockMarketInstrumentAV]:
+        # the call was charged as bulk one (see: quota_cost), so once bulk quotes turn out
+        #   to be unavailable it fails: fetched one by one when called again
+        if self.bulk_quotes_available:
+            return await self._bulk_quotes(tickers)
+
+        return await self._quotes_one_by_one(tickers)
+
+    def quota_cost(self, method: str, *args, **kwargs) -> int:
+        """Number of API requests made by a call of the method
+        """
+        if method != "get_securities_by_tickers":
+            return 1
+
+        tickers = args[0] if args else kwargs["tickers"]
+        if self.bulk_quotes_available:
+            return math.ceil(len(tickers) / BULK_QUOTES_MAX_SYMBOLS)
+        return len(tickers)
+
+    async def _bulk_quotes(self, tickers: list[str]) -> dict[str, StockMarketInstrumentAV]:
+        await self.open()
+        requested = {ticker.upper(): ticker for ticker in tickers}
+        securities = {}
+        for i in range(0, len(tickers), BULK_QUOTES_MAX_SYMBOLS):
+            async with self._session.get(self.base_url, params={
+                "function": "REALTIME_BULK_QUOTES",
+                "symbol": ",".join(tickers[i:i + BULK_QUOTES_MAX_SYMBOLS]),
+                "apikey": self._api_key
+            }) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
+
+            if "data" not in data:
+                # premium endpoint (as well as rate limit) answers with a message only
+                message = str(data.get("Information") or data.get("message") or data)
+                if "premium endpoint" in message.lower():
+                    logger.warning(f"<AlphaVantageAPI> bulk quotes are not available: {message}")
+                    self.bulk_quotes_available = False
+                    raise BulkQuotesUnavailable(message)
+                raise ValueError(message)
+
+            quotes = [bulk_quote_to_global_quote(quote) for quote in data["data"]]
+            for resp_dict in quotes:
+                resp_dict["data_provider"] = self.data_provider_name
+            # whole chunk is parsed at once
+            for security in parse_quotes(quotes, trusted=self.trusted_payloads):
+                securities[requested.get(security.symbol.upper(), security.symbol)] = security
+
+        return securities
+
+    async def _quotes_one_by_one(self, tickers: list[str]) -> dict[str, StockMarketInstrumentAV]:
+        slots = asyncio.Semaphore(self._max_concurrent_quotes)
+
+        async def get_quote(ticker: str) -> StockMarketInstrumentAV:
+            async with slots:
+                return await self.get_security_by_ticker(ticker)
+
+        results = await asyncio.gather(*(get_quote(t) for t in tickers), return_exceptions=True)
+        securities = {}
+        for ticker, res in zip(tickers, results):
+            if isinstance(res, Exception):
+                logger.error(f"<AlphaVantageAPI> failed to get quote of '{ticker}': {res}")
+                continue
+            securities[ticker] = res
+
+        return securities
+
+    async def get_daily_history(self, symbol: str, since: dt.date) -> PriceHistory:
+        ts = await self._time_series()
+        # compact output holds ~100 trading days: enough for short tails
+        outputsize = "compact" if (dt.date.today() - since).days < COMPACT_SERIES_DAYS else "full"
+        series, _ = await ts.get_daily(symbol=symbol, outputsize=outputsize)
+        rows = {}
+        for day_str, values in series.items():
+            day = dt.date.fromisoformat(day_str)
+            if day >= since:
+                rows[day] = (
+                    float(values["1. open"]),
+                    float(values["2. high"]),
+                    float(values["3. low"]),
+                    float(values["4. close"]),
+                    float(values["5. volume"])
+                )
+
+        return PriceHistory.from_rows(rows)
 
     async def get_curr_pair(self, symbol_from: str, symbol_to: str) -> ExchangePairAV:
-        # init alpha-vantage client for foreign exchange data
-        async with ClientForEx(self._api_key) as fx:
-            # retrieve foreign exchange data by specified currency codes/symbols
-            resp, _ = await fx.client.get_currency_exchange_rate(
-                from_currency=symbol_from,
-                to_currency=symbol_to
-            )
-            resp["data_provider"] = self.data_provider_name
-            instrument = ExchangePairAV.model_validate(resp, strict=True)
-            return instrument
+        fx = await self._forex()
+        # retrieve foreign exchange data by specified currency codes/symbols
+        resp, _ = await fx.get_currency_exchange_rate(
+            from_currency=symbol_from,
+            to_currency=symbol_to
+        )
+        resp["data_provider"] = self.data_provider_name
+        return parse_pair(resp, trusted=self.trusted_payloads)
 
     async def get_crypto_pair(self, symbol_from: str, symbol_to: str) -> ExchangePairAV:
-        async with ClientCryptoEx(self._api_key) as cc:
-            resp, _ = await cc.client.get_digital_currency_exchange_rate(
-                from_currency=symbol_from,
-                to_currency=symbol_to
-            )
-            resp["data_provider"] = self.data_provider_name
-            instrument = ExchangePairAV.model_validate(resp, strict=True)
-            return instrument
+        cc = await self._crypto()
+        resp, _ = await cc.get_digital_currency_exchange_rate(
+            from_currency=symbol_from,
+            to_currency=symbol_to
+        )
+        resp["data_provider"] = self.data_provider_name
+        return parse_pair(resp, trusted=self.trusted_payloads)
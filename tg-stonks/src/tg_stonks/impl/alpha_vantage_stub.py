@@ -0,0 +1,362 @@
+"""
+Local stand-in of Alpha Vantage API: serves payloads shaped as the real ones
+with configurable latency, errors and rate limiting - for offline tests and benchmarks
+of the provider layer (point `AlphaVantageAPI(base_url=...)` at it)
+
+Run standalone:
+    python -m tg_stonks.impl.alpha_vantage_stub --port 8089 --latency 0.05 --error-rate 0.01 --per-minute 75
+"""
+import argparse
+import asyncio
+import datetime as dt
+import random
+import time
+import zlib
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import final
+
+from aiohttp import web
+from loguru import logger
+
+# instruments known to the stub: symbol -> (name, type, region, currency)
+STUB_INSTRUMENTS: dict[str, tuple[str, str, str, str]] = {
+    "AAPL": ("Apple Inc", "Equity", "United States", "USD"),
+    "AAPL34.SAO": ("Apple Inc", "Equity", "Brazil/Sao Paolo", "BRL"),
+    "APLE": ("Apple Hospitality REIT Inc", "Equity", "United States", "USD"),
+    "IBM": ("International Business Machines Corp", "Equity", "United States", "USD"),
+    "MSFT": ("Microsoft Corporation", "Equity", "United States", "USD"),
+    "TSLA": ("Tesla Inc", "Equity", "United States", "USD"),
+    "TSCO.LON": ("Tesco PLC", "Equity", "United Kingdom", "GBX"),
+    "SBER.ME": ("Sberbank Rossii PAO", "Equity", "Russia", "RUB"),
+    "SPY": ("SPDR S&P 500 ETF Trust", "ETF", "United States", "USD"),
+}
+
+# currencies known to the stub: code -> (name, price in USD)
+STUB_CURRENCIES: dict[str, tuple[str, float]] = {
+    "USD": ("United States Dollar", 1.0),
+    "EUR": ("Euro", 1.08),
+    "GBP": ("British Pound Sterling", 1.27),
+    "JPY": ("Japanese Yen", 0.0067),
+    "RUB": ("Russian Ruble", 0.011),
+    "CNY": ("Chinese Yuan", 0.14),
+    "BTC": ("Bitcoin", 43000.0),
+    "ETH": ("Ethereum", 2300.0),
+    "XMR": ("Monero", 160.0),
+}
+
+RATE_LIMIT_MESSAGE = (
+    "Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day."
+    " Please subscribe to any of the premium plans to instantly remove all daily rate limits."
+)
+PREMIUM_MESSAGE = (
+    "Thank you for using Alpha Vantage! This is a premium endpoint."
+    " You may subscribe to any of the premium plans to instantly unlock all premium endpoints"
+)
+
+
+@dataclass
+class StubConfig:
+    latency: float = 0.0            # seconds, added to every response
+    jitter: float = 0.0             # seconds, random extra latency: 0..jitter
+    error_rate: float = 0.0         # share of requests answered with HTTP 503
+    per_minute: int | None = None   # requests over the limit are answered with rate limit message
+    bulk_quotes: bool = False       # realtime bulk quotes (premium) are available
+    seed: int | None = None
+
+
+def _price_of(symbol: str, base: float | None = None, moment: float | None = None) -> float:
+    # deterministic per symbol, slowly drifting with time: same moment - same price
+    seed = zlib.crc32(symbol.encode())
+    base = base if base is not None else 10 + seed % 490
+    minute = int((moment if moment is not None else time.time()) // 60)
+    drift = ((zlib.crc32(f"{symbol}{minute}".encode()) % 2001) - 1000) / 100_000
+    return round(base * (1 + drift), 4)
+
+
+def _pair_rate(code_from: str, code_to: str) -> float:
+    (_, usd_from), (_, usd_to) = STUB_CURRENCIES[code_from], STUB_CURRENCIES[code_to]
+    return _price_of(f"{code_from}_{code_to}", base=usd_from / usd_to)
+
+
+def global_quote(symbol: str) -> dict:
+    price = _price_of(symbol)
+    prev_close = _price_of(symbol, moment=time.time() - 24 * 60 * 60)
+    change = round(price - prev_close, 4)
+    return {
+        "01. symbol": symbol,
+        "02. open": f"{prev_close:.4f}",
+        "03. high": f"{max(price, prev_close) * 1.01:.4f}",
+        "04. low": f"{min(price, prev_close) * 0.99:.4f}",
+        "05. price": f"{price:.4f}",
+        "06. volume": str(zlib.crc32(symbol.encode()) % 10_000_000),
+        "07. latest trading day": dt.date.today().isoformat(),
+        "08. previous close": f"{prev_close:.4f}",
+        "09. change": f"{change:.4f}",
+        "10. change percent": f"{change / prev_close * 100:.4f}%",
+    }
+
+
+def bulk_quote(symbol: str) -> dict:
+    quote = global_quote(symbol)
+    return {
+        "symbol": symbol,
+        "timestamp": f"{quote['07. latest trading day']} 16:00:00.000",
+        "open": quote["02. open"],
+        "high": quote["03. high"],
+        "low": quote["04. low"],
+        "close": quote["05. price"],
+        "volume": quote["06. volume"],
+        "previous_close": quote["08. previous close"],
+        "change": quote["09. change"],
+        "change_percent": quote["10. change percent"].rstrip("%"),
+    }
+
+
+def exchange_rate(code_from: str, code_to: str) -> dict:
+    rate = _pair_rate(code_from, code_to)
+    return {
+        "1. From_Currency Code": code_from,
+        "2. From_Currency Name": STUB_CURRENCIES[code_from][0],
+        "3. To_Currency Code": code_to,
+        "4. To_Currency Name": STUB_CURRENCIES[code_to][0],
+        "5. Exchange Rate": f"{rate:.8f}",
+        "6. Last Refreshed": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "7. Time Zone": "UTC",
+        "8. Bid Price": f"{rate * 0.9999:.8f}",
+        "9. Ask Price": f"{rate * 1.0001:.8f}",
+    }
+
+
+def symbol_search(keywords: str) -> list[dict]:
+    keywords = keywords.strip().casefold()
+    matches = [
+        (symbol, info) for symbol, info in STUB_INSTRUMENTS.items()
+        if symbol.casefold().startswith(keywords) or keywords in info[0].casefold()
+    ]
+    return [
+        {
+            "1. symbol": symbol,
+            "2. name": name,
+            "3. type": instr_type,
+            "4. region": region,
+            "5. marketOpen": "09:30",
+            "6. marketClose": "16:00",
+            "7. timezone": "UTC-04",
+            "8. currency": currency,
+            "9. matchScore": "1.0000" if symbol.casefold() == keywords else "0.8000",
+        }
+        for symbol, (name, instr_type, region, currency) in matches[:10]
+    ]
+
+
+def time_series_daily(symbol: str, days: int = 100) -> dict:
+    today = dt.date.today()
+    series = {}
+    for days_ago in range(days):
+        day = today - dt.timedelta(days=days_ago)
+        if day.weekday() >= 5:
+            # no trading on weekends
+            continue
+        close = _price_of(symbol, moment=time.time() - days_ago * 24 * 60 * 60)
+        series[day.isoformat()] = {
+            "1. open": f"{close * 0.995:.4f}",
+            "2. high": f"{close * 1.02:.4f}",
+            "3. low": f"{close * 0.98:.4f}",
+            "4. close": f"{close:.4f}",
+            "5. volume": str(zlib.crc32(f"{symbol}{day}".encode()) % 10_000_000),
+        }
+
+    return {
+        "Meta Data": {
+            "1. Information": "Daily Prices (open, high, low, close) and Volumes",
+            "2. Symbol": symbol,
+            "3. Last Refreshed": today.isoformat(),
+            "4. Output Size": "Compact" if days <= 140 else "Full size",
+            "5. Time Zone": "US/Eastern",
+        },
+        "Time Series (Daily)": series,
+    }
+
+
+def digital_currency_daily(symbol: str, market: str, days: int = 100) -> dict:
+    today = dt.date.today()
+    series = {}
+    for days_ago in range(days):
+        day = today - dt.timedelta(days=days_ago)
+        close = _price_of(f"{symbol}_{market}", base=_pair_rate(symbol, market),
+                          moment=time.time() - days_ago * 24 * 60 * 60)
+        series[day.isoformat()] = {
+            "1. open": f"{close * 0.995:.8f}",
+            "2. high": f"{close * 1.02:.8f}",
+            "3. low": f"{close * 0.98:.8f}",
+            "4. close": f"{close:.8f}",
+            "5. volume": f"{zlib.crc32(day.isoformat().encode()) % 100_000}.0",
+        }
+
+    return {
+        "Meta Data": {
+            "1. Information": "Daily Prices and Volumes for Digital Currency",
+            "2. Digital Currency Code": symbol,
+            "3. Digital Currency Name": STUB_CURRENCIES[symbol][0],
+            "4. Market Code": market,
+            "5. Market Name": STUB_CURRENCIES[market][0],
+            "6. Last Refreshed": today.isoformat(),
+            "7. Time Zone": "UTC",
+        },
+        "Time Series (Digital Currency Daily)": series,
+    }
+
+
+@final
+class AlphaVantageStub:
+    """
+    Alpha Vantage stand-in HTTP server, use as async context manager:
+    `async with AlphaVantageStub(StubConfig(latency=0.05)) as stub: ... AlphaVantageAPI(key, base_url=stub.url)`;
+    `requests` counts served requests by API function
+    """
+
+    def __init__(self, config: StubConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self.host = host
+        self.port = port
+        self.requests: Counter[str] = Counter()
+        self.rate_limited = 0
+        self.failed = 0
+        self._random = random.Random(self.config.seed)
+        self._served_at: deque[float] = deque()
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/query"
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/query", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # port 0 - any free port
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"<AlphaVantageStub> serving at {self.url}")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.stop()
+
+    def _is_rate_limited(self) -> bool:
+        if self.config.per_minute is None:
+            return False
+
+        now = time.monotonic()
+        while self._served_at and now - self._served_at[0] >= 60:
+            self._served_at.popleft()
+        if len(self._served_at) >= self.config.per_minute:
+            return True
+
+        self._served_at.append(now)
+        return False
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        params = request.query
+        function = params.get("function", "")
+        self.requests[function] += 1
+
+        latency = self.config.latency + self._random.uniform(0, self.config.jitter)
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+        if self._random.random() < self.config.error_rate:
+            self.failed += 1
+            return web.Response(status=503, text="Service Unavailable")
+
+        if self._is_rate_limited():
+            self.rate_limited += 1
+            return web.json_response({"Information": RATE_LIMIT_MESSAGE})
+
+        try:
+            return web.json_response(self._payload(function, params))
+        except KeyError as err:
+            return web.json_response({
+                "Error Message": f"Invalid API call. Unknown symbol, currency or parameter: {err}"
+            })
+
+    def _payload(self, function: str, params) -> dict:
+        match function:
+            case "SYMBOL_SEARCH":
+                return {"bestMatches": symbol_search(params["keywords"])}
+
+            case "GLOBAL_QUOTE":
+                symbol = params["symbol"].upper()
+                if symbol not in STUB_INSTRUMENTS:
+                    # real API answers unknown symbols with an empty quote
+                    return {"Global Quote": {}}
+                return {"Global Quote": global_quote(symbol)}
+
+            case "REALTIME_BULK_QUOTES" if self.config.bulk_quotes:
+                symbols = [s.upper() for s in params["symbol"].split(",")]
+                return {
+                    "endpoint": "Realtime Bulk Quotes",
+                    "message": "",
+                    "data": [bulk_quote(s) for s in symbols if s in STUB_INSTRUMENTS],
+                }
+
+            case "REALTIME_BULK_QUOTES":
+                return {"Information": PREMIUM_MESSAGE}
+
+            case "CURRENCY_EXCHANGE_RATE":
+                code_from, code_to = params["from_currency"].upper(), params["to_currency"].upper()
+                return {"Realtime Currency Exchange Rate": exchange_rate(code_from, code_to)}
+
+            case "TIME_SERIES_DAILY":
+                symbol = params["symbol"].upper()
+                if symbol not in STUB_INSTRUMENTS:
+                    raise KeyError(symbol)
+                # 'compact' - last 100 trading days, 'full' - all of them (here: 2 years)
+                full = params.get("outputsize", "compact") == "full"
+                return time_series_daily(symbol, days=2 * 365 if full else 140)
+
+            case "DIGITAL_CURRENCY_DAILY":
+                return digital_currency_daily(params["symbol"].upper(), params["market"].upper())
+
+            case _:
+                raise KeyError(f"function={function}")
+
+
+async def _serve(stub: AlphaVantageStub) -> None:
+    async with stub:
+        await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in of Alpha Vantage API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds of random extra latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of HTTP 503 responses")
+    parser.add_argument("--per-minute", type=int, default=None, help="requests per minute before rate limiting")
+    parser.add_argument("--bulk-quotes", action="store_true", help="serve realtime bulk quotes (premium)")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        per_minute=args.per_minute,
+        bulk_quotes=args.bulk_quotes
+    )
+    asyncio.run(_serve(AlphaVantageStub(config, host=args.host, port=args.port)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import asyncio
+import csv
+from pathlib import Path
+from typing import AsyncIterator, Iterable, final
+
+from loguru import logger
+
+from tg_stonks.providers.models import QuoteTick
+from tg_stonks.providers.protocols import IDataProviderStreaming
+from tg_stonks.providers.provider_type import ProviderT
+
+
+@final
+class ReplayStreamProvider(IDataProviderStreaming):
+    """
+    Streaming data provider replaying recorded ticks (in order, one per `interval` seconds),
+    only ticks of subscribed symbols are streamed; with `repeat` the record is replayed over and over -
+    for offline runs and tests of the streaming pipeline
+    """
+
+    def __init__(
+            self,
+            ticks: Iterable[QuoteTick],
+            provider_name: str = "replay",
+            interval: float = 1.0,
+            repeat: bool = False):
+        self.ticks = list(ticks)
+        self.interval = interval
+        self.repeat = repeat
+        self._provider_name = provider_name
+        self._subscribed: set[str] = set()
+
+    @property
+    def provider_name(self) -> str:
+        return self._provider_name
+
+    @property
+    def provider_type(self) -> ProviderT:
+        return ProviderT.UNIVERSAL
+
+    @classmethod
+    def from_csv(cls, path: str | Path, provider_name: str = "replay", **kwargs) -> "ReplayStreamProvider":
+        """Replay of CSV file with 'symbol' and 'price' columns
+        """
+        with open(path, newline="") as file:
+            ticks = [
+                QuoteTick(symbol=row["symbol"], price=float(row["price"]), data_provider=provider_name)
+                for row in csv.DictReader(file)
+            ]
+
+        logger.info(f"<ReplayStreamProvider> loaded {len(ticks)} ticks of '{path}'")
+        return cls(ticks, provider_name=provider_name, **kwargs)
+
+    async def subscribe(self, symbols: list[str]) -> None:
+        self._subscribed.update(symbols)
+
+    async def unsubscribe(self, symbols: list[str]) -> None:
+        self._subscribed.difference_update(symbols)
+
+    async def stream_quotes(self, symbols: list[str]) -> AsyncIterator[QuoteTick]:
+        await self.subscribe(symbols)
+        while self.ticks:
+            for tick in self.ticks:
+                await asyncio.sleep(self.interval)
+                if tick.symbol in self._subscribed:
+                    yield tick
+
+            if not self.repeat:
+                return
@@ -1,13 +1,17 @@
-from typing import final, Any
+from typing import final, Any, Callable
 
 from loguru import logger
 from postgrest import APIResponse, APIError, SyncSelectRequestBuilder
+from postgrest.types import ReturnMethod
 from supabase import Client as SbClient
 
 from tg_stonks.database.entity_models import InstrumentType
 from tg_stonks.database.errors import DbError, DbUserNotFound
 from tg_stonks.database.protocols import IDatabase
 
+# rows per request of bulk selects (PostgREST limits rows of a response, 1000 by default)
+SELECT_PAGE_SIZE = 1000
+
 
 def _expected_exactly_one(resp: APIResponse) -> dict:
     if len(resp.data) == 1:
@@ -30,6 +34,35 @@ def build_select_query(query: SyncSelectRequestBuilder, fields: dict[str, Any]):
     return query
 
 
+def select_all(
+        query_of: Callable[[], SyncSelectRequestBuilder],
+        page_size: int = SELECT_PAGE_SIZE,
+        order_by: str = "id") -> list[dict]:
+    """All rows of the query, page by page: a single response is truncated at the row limit
+
+    `query_of` builds a new query for every page (query builders are not reusable);
+    pages are ordered by `order_by` - comma separated columns, which should end with a unique one
+    """
+    rows = []
+    while True:
+        # end of 'range' is exclusive (postgrest-py 0.11)
+        resp = query_of().order(order_by).range(len(rows), len(rows) + page_size).execute()
+        rows.extend(resp.data)
+        if len(resp.data) < page_size:
+            return rows
+
+
+def _count_tracked_instruments(tracking_rows: list[tuple[dict, dict]]) -> list[tuple[dict, int]]:
+    # rows are trackings paired with their instruments ('fin_instruments')
+    instruments: dict[str, dict] = {}
+    counts: dict[str, int] = {}
+    for _, instrument_obj in tracking_rows:
+        instruments[instrument_obj["id"]] = instrument_obj
+        counts[instrument_obj["id"]] = counts.get(instrument_obj["id"], 0) + 1
+
+    return [(instruments[id_], counts[id_]) for id_ in instruments]
+
+
 @final
 class SupabaseDB(IDatabase):
     def __init__(self, url: str, key: str):
@@ -110,6 +143,67 @@ class SupabaseDB(IDatabase):
 
         return resp.data
 
+    def trackings_with_tg_ids(self, fields: dict) -> list[tuple[dict, int]]:
+        # embed the user row via 'tracked_by' foreign key:
+        #   '!inner' makes PostgREST drop trackings without a matching user
+        tracking_objs = select_all(lambda: build_select_query(
+            self.sb_client.table("tracking").select("*, bot_users!inner(tg_user_id)"),
+            fields
+        ))
+
+        rows = []
+        for tracking_obj in tracking_objs:
+            user_obj = tracking_obj.pop("bot_users")
+            rows.append((tracking_obj, user_obj["tg_user_id"]))
+
+        return rows
+
+    def periodic_trackings(self, fields: dict | None = None) -> list[tuple[dict, dict, int]]:
+        tracking_objs = select_all(lambda: build_select_query(
+            self.sb_client.table("tracking").select(
+                "*, bot_users!inner(tg_user_id), fin_instruments!inner(*)"
+            ).not_.is_("notify_every", "null"),
+            fields or {}
+        ))
+
+        rows = []
+        for tracking_obj in tracking_objs:
+            user_obj = tracking_obj.pop("bot_users")
+            instrument_obj = tracking_obj.pop("fin_instruments")
+            rows.append((tracking_obj, instrument_obj, user_obj["tg_user_id"]))
+
+        return rows
+
+    def instruments_updated_since(self, since: str) -> list[dict]:
+        # all pages are read before any row is returned: the caller's high-water mark
+        #   is not advanced past rows of pages not read yet
+        return select_all(
+            lambda: self.sb_client.table("fin_instruments").select("*").gt("updated_at", since),
+            order_by="updated_at,id"
+        )
+
+    def tracking_instruments(self, fields: dict | None = None) -> list[tuple[dict, dict]]:
+        tracking_objs = select_all(lambda: build_select_query(
+            self.sb_client.table("tracking").select("*, fin_instruments!inner(*)"),
+            fields or {}
+        ))
+
+        return [(tracking_obj, tracking_obj.pop("fin_instruments")) for tracking_obj in tracking_objs]
+
+    def tracked_instruments(self) -> list[tuple[dict, int]]:
+        # one row per tracking: instruments are counted by their trackings
+        return _count_tracked_instruments(self.tracking_instruments())
+
+    def upsert_instruments(self, instruments: list[dict]):
+        try:
+            resp = self.sb_client.table("fin_instruments").upsert(
+                instruments, returning=ReturnMethod.minimal).execute()
+            return resp.data
+
+        except APIError as err:
+            logger.error(f"Failed to upsert {len(instruments)} instruments: {err}")
+            return None
+
     def add_new_user(self, tg_user_id: int):
         try:
             resp = self.sb_client.table("bot_users").insert(
@@ -0,0 +1,341 @@
+from typing import final, Any, Callable
+from uuid import UUID
+
+import httpx
+from loguru import logger
+from postgrest import APIResponse, APIError, AsyncPostgrestClient, AsyncSelectRequestBuilder
+from postgrest.types import ReturnMethod
+from postgrest.utils import AsyncClient
+
+from tg_stonks.database.entity_models import InstrumentType
+from tg_stonks.database.errors import DbUserNotFound
+from tg_stonks.database.helpers import to_settings
+from tg_stonks.database.instrument_index import InstrumentIndex
+from tg_stonks.database.protocols import IDatabaseAsync
+from tg_stonks.database.user_cache import CachedUser, UserCache
+from tg_stonks.impl.supabase_database import SELECT_PAGE_SIZE, _expected_exactly_one, _count_tracked_instruments
+
+
+def build_select_query_async(query: AsyncSelectRequestBuilder, fields: dict[str, Any]):
+    for key, value in fields.items():
+        query.eq(key, value)
+    return query
+
+
+async def select_all_async(
+        query_of: Callable[[], AsyncSelectRequestBuilder],
+        page_size: int = SELECT_PAGE_SIZE,
+        order_by: str = "id") -> list[dict]:
+    """See: `select_all`
+    """
+    rows = []
+    while True:
+        # end of 'range' is exclusive (postgrest-py 0.11)
+        resp = await query_of().order(order_by).range(len(rows), len(rows) + page_size).execute()
+        rows.extend(resp.data)
+        if len(resp.data) < page_size:
+            return rows
+
+
+@final
+class _PooledPostgrestClient(AsyncPostgrestClient):
+    """
+    PostgREST client with explicitly limited pool of keep-alive HTTP connections
+    """
+
+    def __init__(self, base_url: str, *, headers: dict[str, str], limits: httpx.Limits, timeout: float):
+        self._limits = limits
+        super().__init__(base_url, headers=headers, timeout=timeout)
+
+    def create_session(self, base_url: str, headers: dict[str, str], timeout) -> AsyncClient:
+        return AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=self._limits
+        )
+
+
+@final
+class SupabaseDBAsync(IDatabaseAsync):
+    """
+    Non-blocking supabase database: talks to PostgREST API directly
+    through one long-lived pool of HTTP connections;
+    call `close` at shutdown to release connections
+
+    Users (inner id & parsed settings) are cached by telegram id (see: `cached_user`),
+    changes made through this database drop them - changes made elsewhere are
+    delivered by realtime events (see: sync_on_user_change);
+    ids of instruments are looked up in in-memory index, its misses - in the database
+    (see: `load_instrument_index`, `instrument_id_of`)
+    """
+
+    def __init__(
+            self,
+            url: str,
+            key: str,
+            max_connections: int = 20,
+            max_keepalive: int = 10,
+            timeout: float = 5.0,
+            user_cache_size: int = 4096,
+            user_cache_ttl: float = 15 * 60.0):
+        self.pg_client = _PooledPostgrestClient(
+            f"{url}/rest/v1",
+            headers={
+                "apiKey": key,
+                "Authorization": f"Bearer {key}",
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive
+            ),
+            timeout=timeout
+        )
+        self.users = UserCache(max_size=user_cache_size, ttl=user_cache_ttl)
+        self.instruments = InstrumentIndex()
+
+    async def close(self) -> None:
+        await self.pg_client.aclose()
+
+    async def __find_instrument_of_type(
+            self,
+            type_of_instr: InstrumentType,
+            symbol: str,
+            data_provider: str
+    ) -> APIResponse:
+
+        resp = await self.pg_client.table("fin_instruments").select("*").eq(
+            "type", type_of_instr).eq(
+            "data_provider_code", data_provider).eq(
+            "symbol", symbol).execute()
+
+        return resp
+
+    async def user_with(self, fields: dict) -> list[dict]:
+        query = build_select_query_async(
+            self.pg_client.table("bot_users").select("*"),
+            fields
+        )
+
+        resp = await query.execute()
+        return resp.data
+
+    async def user_with_tg_id(self, tg_user_id: int) -> dict:
+        resp = await self.pg_client.table("bot_users").select("*").eq(
+            "tg_user_id", tg_user_id
+        ).execute()
+
+        return _expected_exactly_one(resp)
+
+    async def settings_of_tg_id(self, tg_user_id: int) -> dict:
+        user = await self.user_with_tg_id(tg_user_id)
+        return user["settings"]
+
+    async def cached_user(self, tg_user_id: int) -> CachedUser:
+        user = self.users.get(tg_user_id)
+        if user is not None:
+            return user
+
+        generation = self.users.generation
+        user_obj = await self.user_with_tg_id(tg_user_id)
+        user = CachedUser(
+            id=UUID(user_obj["id"]),
+            tg_user_id=tg_user_id,
+            settings=to_settings(user_obj["settings"])
+        )
+        # not cached if the user was changed while being read
+        self.users.put(user, generation)
+        return user
+
+    async def load_instrument_index(self) -> None:
+        """Load ids of all instruments into the index, page by page
+        """
+        instrument_objs = await select_all_async(lambda: self.pg_client.table("fin_instruments").select(
+            "id, type, data_provider_code, symbol"
+        ))
+
+        self.instruments.load(instrument_objs)
+        logger.info(f"Instrument index loaded: {len(self.instruments)} instruments")
+
+    async def instrument_id_of(self, type_of_instr: InstrumentType, symbol: str, data_provider: str) -> UUID | None:
+        instrument_id = self.instruments.id_of(type_of_instr, symbol, data_provider)
+        if instrument_id is not None:
+            return instrument_id
+
+        # index could miss rows inserted while realtime events were not delivered:
+        #   misses are checked in the database, so an existing instrument is not inserted again
+        resp = await self.__find_instrument_of_type(type_of_instr, symbol, data_provider)
+        if not resp.data:
+            return None
+
+        self.instruments.add(resp.data[0])
+        return UUID(resp.data[0]["id"])
+
+    async def find_curr_pair(self, code_from: str, code_to: str, data_provider: str) -> dict:
+        resp = await self.__find_instrument_of_type(
+            InstrumentType.curr_pair,
+            f"{code_from}_{code_to}",
+            data_provider
+        )
+
+        return _expected_exactly_one(resp)
+
+    async def find_crypto_pair(self, code_from: str, code_to: str, data_provider: str) -> dict:
+        resp = await self.__find_instrument_of_type(
+            InstrumentType.crypto_pair,
+            f"{code_from}_{code_to}",
+            data_provider
+        )
+
+        return _expected_exactly_one(resp)
+
+    async def find_stock_market_instrument(self, symbol: str, data_provider: str) -> dict:
+        resp = await self.__find_instrument_of_type(
+            InstrumentType.sm_instrument,
+            symbol,
+            data_provider
+        )
+
+        return _expected_exactly_one(resp)
+
+    async def trackings_with(self, fields: dict) -> list[dict[str, any]]:
+        query = build_select_query_async(
+            self.pg_client.table("tracking").select("*"),
+            fields
+        )
+
+        resp: APIResponse = await query.execute()
+        if len(resp.data) == 0:
+            raise DbUserNotFound("Query is empty")
+
+        return resp.data
+
+    async def trackings_with_tg_ids(self, fields: dict) -> list[tuple[dict, int]]:
+        # see: SupabaseDB.trackings_with_tg_ids
+        tracking_objs = await select_all_async(lambda: build_select_query_async(
+            self.pg_client.table("tracking").select("*, bot_users!inner(tg_user_id)"),
+            fields
+        ))
+
+        rows = []
+        for tracking_obj in tracking_objs:
+            user_obj = tracking_obj.pop("bot_users")
+            rows.append((tracking_obj, user_obj["tg_user_id"]))
+
+        return rows
+
+    async def periodic_trackings(self, fields: dict | None = None) -> list[tuple[dict, dict, int]]:
+        tracking_objs = await select_all_async(lambda: build_select_query_async(
+            self.pg_client.table("tracking").select(
+                "*, bot_users!inner(tg_user_id), fin_instruments!inner(*)"
+            ).not_.is_("notify_every", "null"),
+            fields or {}
+        ))
+
+        rows = []
+        for tracking_obj in tracking_objs:
+            user_obj = tracking_obj.pop("bot_users")
+            instrument_obj = tracking_obj.pop("fin_instruments")
+            rows.append((tracking_obj, instrument_obj, user_obj["tg_user_id"]))
+
+        return rows
+
+    async def instruments_updated_since(self, since: str) -> list[dict]:
+        # see: SupabaseDB.instruments_updated_since
+        return await select_all_async(
+            lambda: self.pg_client.table("fin_instruments").select("*").gt("updated_at", since),
+            order_by="updated_at,id"
+        )
+
+    async def tracking_instruments(self, fields: dict | None = None) -> list[tuple[dict, dict]]:
+        tracking_objs = await select_all_async(lambda: build_select_query_async(
+            self.pg_client.table("tracking").select("*, fin_instruments!inner(*)"),
+            fields or {}
+        ))
+
+        return [(tracking_obj, tracking_obj.pop("fin_instruments")) for tracking_obj in tracking_objs]
+
+    async def tracked_instruments(self) -> list[tuple[dict, int]]:
+        # one row per tracking: instruments are counted by their trackings
+        return _count_tracked_instruments(await self.tracking_instruments())
+
+    async def upsert_instruments(self, instruments: list[dict]):
+        try:
+            resp = await self.pg_client.table("fin_instruments").upsert(
+                instruments, returning=ReturnMethod.minimal).execute()
+            return resp.data
+
+        except APIError as err:
+            logger.error(f"Failed to upsert {len(instruments)} instruments: {err}")
+            return None
+
+    async def add_new_user(self, tg_user_id: int):
+        try:
+            resp = await self.pg_client.table("bot_users").insert(
+                {"tg_user_id": tg_user_id}).execute()
+            return resp.data[0]
+
+        except APIError as err:
+            logger.error(f"Failed to add user '{tg_user_id}': {err}")
+            return None
+
+    async def add_instrument(self, instrument_fields: dict):
+        try:
+            resp = await self.pg_client.table("fin_instruments").insert(
+                instrument_fields).execute()
+            self.instruments.add(resp.data[0])
+            return resp.data[0]
+
+        except APIError as err:
+            logger.error(f"Failed to add instrument: {err}")
+            return None
+
+    async def add_tracking(self, tracking_fields: dict):
+        try:
+            resp = await self.pg_client.table("tracking").insert(tracking_fields).execute()
+            return resp.data[0]
+
+        except APIError as err:
+            logger.error(f"Failed to add tracking: {err}")
+            return None
+
+    async def delete_user_by_tg_id(self, tg_user_id: int):
+        try:
+            resp = await self.pg_client.table("bot_users").delete().eq(
+                "tg_user_id", tg_user_id
+            ).execute()
+            return resp.data[0]
+
+        except APIError as err:
+            logger.error(f"Failed to delete '{tg_user_id}': {err}")
+            return None
+
+        finally:
+            self.users.invalidate(tg_user_id)
+
+    async def update_user(self, tg_user_id: int, fields: dict):
+        await self.pg_client.table("bot_users").update(fields).eq("tg_user_id", tg_user_id).execute()
+        # after the update: reads made meanwhile are not cached either (see: UserCache.put)
+        self.users.invalidate(tg_user_id)
+        logger.info(f"User settings updated: {fields}")
+
+    async def find_tracking_with(self, fields: dict) -> dict:
+        raise NotImplementedError
+
+    async def find_instrument_with(self, fields: dict) -> dict:
+        raise NotImplementedError
+
+    async def add_curr_pair(self):
+        raise NotImplementedError
+
+    async def add_crypto_pair(self):
+        raise NotImplementedError
+
+    async def delete_instrument(self):
+        raise NotImplementedError
+
+    async def delete_tracking(self):
+        raise NotImplementedError
+
+    async def update_instrument(self):
+        raise NotImplementedError
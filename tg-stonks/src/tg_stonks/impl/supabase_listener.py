@@ -1,47 +1,224 @@
 import asyncio
-from typing import final, Callable
+import datetime as dt
+import inspect
+import json
+from collections import defaultdict
+from functools import partial
+from typing import final, Awaitable, Callable
 
+from websockets.exceptions import ConnectionClosed
 from loguru import logger
 from realtime.channel import Channel
 from realtime.connection import Socket
+from realtime.message import ChannelEvents, Message
 
+from tg_stonks.upd_listener.coalescer import UpdateCoalescer
 from tg_stonks.upd_listener.protocol import IDatabaseListener
+from tg_stonks.upd_listener.work_queue import Job, OverflowPolicy, WorkQueue, WorkQueueStats
+
+
+def _as_utc(timestamp: str) -> dt.datetime:
+    # 'updated_at' may come without timezone: it is UTC then
+    moment = dt.datetime.fromisoformat(timestamp)
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=dt.timezone.utc)
 
 
 @final
 class SupabaseListener(IDatabaseListener):
-    def __init__(self, sb_id: str, sb_key: str):
+    def __init__(
+            self,
+            sb_id: str,
+            sb_key: str,
+            workers: int = 4,
+            queue_size: int = 1000,
+            overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+            coalesce_window: float = 0.0,
+            catch_up: Callable[[str], Awaitable[list[dict]]] | None = None,
+            catch_up_table: str = "fin_instruments",
+            reconnect_delay: float = 1.0,
+            reconnect_max_delay: float = 60.0):
         self.URL = \
             f"wss://{sb_id}.supabase.co" \
             "/realtime/v1/websocket?" \
             f"apikey={sb_key}&vsn=1.0.0"
 
         self.soc = Socket(self.URL)
-        # set default values
-        self.ch: Channel | None = None
+        # set default values: channel per table, all on the same socket
+        self.channels: dict[str, Channel] = {}
         self.ready_to_listen = False
+        # callbacks by (table, event), `None` table - any table, "*" event - any event;
+        #   called by workers of the queue, not by the socket
+        self._callbacks: dict[tuple[str | None, str], list[Callable]] = defaultdict(list)
+        self.work_queue = WorkQueue(
+            self._run_callbacks,
+            workers=workers,
+            max_size=queue_size,
+            policy=overflow_policy
+        )
+        # updates of the same instrument within the window are merged into one
+        self.coalescer = UpdateCoalescer(self.work_queue.put, coalesce_window, max_pending=queue_size) \
+            if coalesce_window > 0 else None
+        # after reconnect: rows updated since the high-water mark are queried
+        #   with `catch_up` and passed as 'UPDATE' events (missed while disconnected);
+        #   inserted rows are among them too (handlers of 'UPDATE' should expect new rows),
+        #   the mark starts at the moment of connection: nothing before it was listened
+        self.catch_up = catch_up
+        self.catch_up_table = catch_up_table
+        self.high_water_mark: str | None = None
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self._backoff = reconnect_delay
 
-    async def set_up(self, table_name: str):
+    async def set_up(self, *table_names: str):
         await self.soc._connect()
-        self.ch = self.soc.set_channel(f"realtime:public:{table_name}")
-        await self.ch._join()
+        if self.high_water_mark is None:
+            self.high_water_mark = dt.datetime.now(dt.timezone.utc).isoformat()
+
+        for table_name in table_names:
+            ch = self.soc.set_channel(f"realtime:public:{table_name}")
+            await ch._join()
+            self.channels[ch.topic] = ch
+
         self.ready_to_listen = True
 
+    def stats(self) -> WorkQueueStats:
+        return self.work_queue.stats()
+
     async def start_listening(self):
-        if not self.ready_to_listen or self.ch is None:
+        if not self.ready_to_listen or not self.channels:
             raise RuntimeError(
                 "Could not start listening when"
                 " channels not set; set_up' method first"
             )
 
-        # TODO: which "asyncio approach" is more appropriate in this case?
-        # loop = asyncio.get_running_loop()
-        # loop.create_task(self.soc._listen())
-        # loop.create_task(self.soc._keep_alive())
-        await asyncio.gather(self.soc._listen(), self.soc._keep_alive())
+        self.work_queue.start()
+        coalescing = asyncio.create_task(self.coalescer.run()) \
+            if self.coalescer is not None else None
+
+        try:
+            while True:
+                keep_alive = asyncio.create_task(self.soc._keep_alive())
+                try:
+                    # returns only when connection is closed
+                    await self._listen()
+                finally:
+                    keep_alive.cancel()
+
+                await self._reconnect()
+                await self._catch_up()
+        finally:
+            if coalescing is not None:
+                coalescing.cancel()
+            await self.work_queue.stop()
+
+    async def _reconnect(self):
+        # exponential backoff: reset only when messages are received again,
+        #   so a connection dropped right after reconnect does not spin
+        while True:
+            logger.info(f"<SbListener> reconnecting in {self._backoff}s")
+            await asyncio.sleep(self._backoff)
+            self._backoff = min(self._backoff * 2, self.reconnect_max_delay)
+            try:
+                await self.soc._connect()
+                for channels in self.soc.channels.values():
+                    for ch in channels:
+                        await ch._join()
+
+                logger.info("<SbListener> reconnected")
+                return
+
+            # 'Socket._connect' raises bare 'Exception' when connection is not open
+            except Exception as err:
+                logger.warning(f"<SbListener> failed to reconnect: {err}")
+
+    async def _catch_up(self):
+        if self.catch_up is None or self.high_water_mark is None:
+            return
+
+        try:
+            # all pages are read first: high-water mark is advanced by dispatched rows only,
+            #   a failed read leaves it where it was
+            missed = await self.catch_up(self.high_water_mark)
+        except Exception as err:
+            logger.error(f"<SbListener> failed to catch up since {self.high_water_mark}: {err}")
+            return
+
+        logger.info(f"<SbListener> catching up: {len(missed)} rows updated since {self.high_water_mark}")
+        # rows are ordered by 'updated_at': fed in the same order
+        for record in missed:
+            await self._dispatch("UPDATE", {
+                "schema": "public",
+                "table": self.catch_up_table,
+                "type": "UPDATE",
+                "record": record,
+                "old_record": None
+            })
+
+    def _advance_high_water_mark(self, payload: dict):
+        if payload.get("table") != self.catch_up_table:
+            return
+
+        updated_at = (payload.get("record") or {}).get("updated_at")
+        if updated_at is None:
+            return
+
+        if self.high_water_mark is None or _as_utc(updated_at) > _as_utc(self.high_water_mark):
+            self.high_water_mark = updated_at
+
+    async def _dispatch(self, event: str, payload: dict):
+        self._advance_high_water_mark(payload)
+        if not self._callbacks_of(payload.get("table"), event):
+            return
+
+        if self.coalescer is not None:
+            await self.coalescer.put(event, payload)
+        else:
+            await self.work_queue.put(event, payload)
+
+    async def _listen(self):
+        # same as `Socket._listen`, but payloads are put into the bounded
+        #   work queue (awaiting it, when overflow policy says so)
+        while True:
+            try:
+                msg = Message(**json.loads(await self.soc.ws_connection.recv()))
+            except ConnectionClosed:
+                logger.warning("<SbListener> connection with the server closed")
+                return
+
+            self._backoff = self.reconnect_delay
+            if msg.event == ChannelEvents.reply or msg.topic not in self.channels:
+                continue
+
+            await self._dispatch(msg.event, msg.payload)
+
+    def _callbacks_of(self, table: str | None, event: str) -> list[Callable]:
+        return [
+            cb
+            for key in ((table, event), (table, "*"), (None, event), (None, "*"))
+            for cb in self._callbacks.get(key, [])
+        ]
+
+    async def _run_callbacks(self, job: Job):
+        for cb in self._callbacks_of(job.payload.get("table"), job.event):
+            res = cb(job.payload)
+            if inspect.isawaitable(res):
+                await res
+
+    def on(self, table: str | None, event_str: str, handler: Callable):
+        """Route events ('INSERT', 'UPDATE', 'DELETE' or '*') of the table
+        (`None` - of any table) to the handler: called with payload only
+        """
+        if table is not None and f"realtime:public:{table}" not in self.channels:
+            raise RuntimeError(
+                f"Could not add handler for '{table}' table:"
+                " its channel not set up, pass it to 'set_up' method first"
+            )
+
+        self._callbacks[(table, event_str)].append(handler)
+        logger.info(f"<SbListener> added handler on {event_str} of '{table or 'any table'}'")
 
-    def add_callback(self, event_str: str, cb_func: Callable, **kwargs):
-        if not self.ready_to_listen or self.ch is None:
+    def add_callback(self, event_str: str, cb_func: Callable, table: str | None = None, **kwargs):
+        if not self.ready_to_listen or not self.channels:
             raise RuntimeError(
                 "Could not add callback for channel when"
                 " channel not set up: run 'set_up' method first"
@@ -56,15 +233,5 @@ class SupabaseListener(IDatabaseListener):
                 "\n  - 'database': database provider impl. 'IDatabase'"
             )
 
-        if asyncio.iscoroutinefunction(cb_func):
-            def _wrapped(payload):
-                loop = asyncio.get_running_loop()
-                loop.create_task(
-                    cb_func(payload, tg_client=tg, database=db)
-                )
-
-            self.ch.on(event_str, _wrapped)
-            logger.info(f"<SbListener> added wrapped async callback on {event_str}")
-        else:
-            self.ch.on(event_str, lambda payload: cb_func(payload, tg_client=tg, database=db))
-            logger.info(f"<SbListener> wrapped async callback on {event_str}")
+        # all kwargs (not only required ones) are passed to the callback
+        self.on(table, event_str, partial(cb_func, **kwargs))
@@ -1,5 +1,6 @@
 import asyncio
 
+import aiohttp
 from loguru import logger
 from pyrogram import Client, idle
 
@@ -8,52 +9,230 @@ import tg_stonks.config as config
 import tg_stonks.bot.handlers_callbacks as handle_cb
 import tg_stonks.bot.handlers_messages as handle_msg
 from tg_stonks.bot.app_container import AppContainer
-from tg_stonks.bot.handlers_db_updates import notify_on_instrument_upd
+from tg_stonks.bot.digest import DigestScheduler
+from tg_stonks.bot.handlers_db_updates import (
+    notify_on_instrument_upd,
+    sync_on_instrument_change,
+    sync_on_tracking_change,
+    sync_on_user_change
+)
+from tg_stonks.bot.notify_dispatcher import NotificationDispatcher
+from tg_stonks.bot.periodic_quotes import PeriodicQuotes
+from tg_stonks.bot.price_refresher import PriceRefresher
+from tg_stonks.bot.streamed_quotes import StreamedQuotes
+from tg_stonks.bot.threshold_index import ThresholdIndex
 
 from tg_stonks.impl.alpha_vantage_provider import AlphaVantageAPI
-from tg_stonks.impl.supabase_database import SupabaseDB
+from tg_stonks.impl.replay_stream import ReplayStreamProvider
+from tg_stonks.impl.supabase_database_async import SupabaseDBAsync
 from tg_stonks.impl.supabase_listener import SupabaseListener
+from tg_stonks.providers.circuit_breaker import CircuitBreakerProvider
+from tg_stonks.providers.metrics import MeteredProvider, ProviderMetrics
+from tg_stonks.providers.price_history import PriceHistoryStore
+from tg_stonks.providers.quota import QuotaProvider
+from tg_stonks.providers.quote_cache import CachedProvider
+from tg_stonks.providers.search_cache import SearchCache
+from tg_stonks.providers.single_flight import SingleFlightProvider
+from tg_stonks.providers.stored_history import StoredHistoryProvider
 
 BOT_SESSION_NAME = "stonks-tg-stonks"
 
-db = SupabaseDB(
+db = SupabaseDBAsync(
     url=config.SUPABASE_URL,
-    key=config.SUPABASE_KEY
+    key=config.SUPABASE_KEY,
+    user_cache_size=config.USER_CACHE_SIZE,
+    user_cache_ttl=config.USER_CACHE_TTL
+)
+
+av_provider = AlphaVantageAPI(
+    key=config.ALPHA_VANTAGE_KEY,
+    base_url=config.ALPHA_VANTAGE_BASE_URL,
+    max_connections=config.ALPHA_VANTAGE_MAX_CONNECTIONS,
+    trusted_payloads=config.ALPHA_VANTAGE_TRUSTED_PAYLOADS,
+    request_timeout=config.ALPHA_VANTAGE_REQUEST_TIMEOUT
 )
 
+provider_metrics = ProviderMetrics()
+
 app = AppContainer(
     data_providers=[
-        AlphaVantageAPI(key=config.ALPHA_VANTAGE_KEY)
+        # cache misses of concurrent requests are coalesced into one API call,
+        #   failing API is not called (nor its quota spent) while its circuit breaker is open -
+        #   the breaker is next to the API calls, so its half-open probe does not wait behind rejected calls;
+        #   latency of API calls (not of waiting for quota) is measured for routing;
+        #   daily history is read from local store, only its missing tail is requested
+        StoredHistoryProvider(
+            CachedProvider(
+                SingleFlightProvider(
+                    QuotaProvider(
+                        CircuitBreakerProvider(
+                            MeteredProvider(av_provider, provider_metrics),
+                            provider_metrics,
+                            failure_threshold=config.BREAKER_FAILURE_THRESHOLD,
+                            cool_down=config.BREAKER_COOL_DOWN,
+                            failures=(TimeoutError, aiohttp.ClientError)
+                        ),
+                        config.ALPHA_VANTAGE_QUOTA
+                    )
+                ),
+                ttl=config.QUOTE_CACHE_TTL,
+                max_size=config.QUOTE_CACHE_SIZE,
+                stale_ttl=config.QUOTE_CACHE_STALE_TTL,
+                search_cache=SearchCache(
+                    max_size=config.SEARCH_CACHE_SIZE,
+                    ttl=config.SEARCH_CACHE_TTL,
+                    derive_from_prefix=config.SEARCH_CACHE_DERIVE_FROM_PREFIX
+                )
+            ),
+            PriceHistoryStore(config.PRICE_HISTORY_DIR)
+        )
     ],
-    database=db
+    database=db,
+    provider_metrics=provider_metrics,
+    hedge_percentile=config.HEDGE_PERCENTILE
 )
 
 
+def _log_if_failed(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.opt(exception=task.exception()).error(f"Background task '{task.get_name()}' failed")
+
+
+async def start_periodic_quotes(periodic: PeriodicQuotes, retry_delay: float = 1.0, retry_max_delay: float = 60.0):
+    # trackings added meanwhile (by 'tracking' events) are kept: loaded ones are merged into them
+    while True:
+        try:
+            await periodic.load()
+            break
+        except Exception as err:
+            logger.error(f"Failed to load periodic trackings, retrying in {retry_delay}s: {err}")
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, retry_max_delay)
+
+    await periodic.run()
+
+
 async def start_listener():
     lis = SupabaseListener(
         sb_id=config.SUPABASE_ID,
         sb_key=config.SUPABASE_KEY,
+        workers=config.LISTENER_WORKERS,
+        queue_size=config.LISTENER_QUEUE_SIZE,
+        overflow_policy=config.LISTENER_OVERFLOW_POLICY,
+        coalesce_window=config.LISTENER_COALESCE_WINDOW,
+        catch_up=db.instruments_updated_since
     )
 
-    await lis.set_up("fin_instruments")
-    logger.info(f"<listener> socket and channel set up: {lis.ready_to_listen}")
+    # all tables share the same socket
+    await lis.set_up("fin_instruments", "tracking", "bot_users")
+    logger.info(f"<listener> socket and channels set up: {lis.ready_to_listen}")
 
     c_for_listener = Client(
         f"{BOT_SESSION_NAME}_upd-listener",
         api_id=config.TELEGRAM_API_ID,
         api_hash=config.TELEGRAM_API_HASH,
-        bot_token=config.TELEGRAM_BOT_TOKEN
+        bot_token=config.TELEGRAM_BOT_TOKEN,
+        # flood waits are handled by the dispatcher (rescheduling)
+        sleep_threshold=0
+    )
+
+    dispatcher = NotificationDispatcher(
+        c_for_listener,
+        workers=config.NOTIFY_WORKERS,
+        global_rate=config.NOTIFY_GLOBAL_RATE,
+        per_chat_rate=config.NOTIFY_PER_CHAT_RATE
+    )
+
+    digest = DigestScheduler(dispatcher, default_window=config.DIGEST_DEFAULT_WINDOW)
+
+    # trackings are kept current by 'tracking' table events: no reloading by age
+    thresholds = ThresholdIndex(db, max_age=None)
+    periodic = PeriodicQuotes(
+        app, dispatcher,
+        tick=config.PERIODIC_QUOTES_TICK
     )
+    # writes fresh prices into 'fin_instruments': source of the listened updates
+    refresher = PriceRefresher(
+        app,
+        interval=config.PRICE_REFRESH_INTERVAL,
+        batch_size=config.PRICE_REFRESH_BATCH_SIZE
+    )
+
+    # quotes pushed by streaming provider reach users directly, not through 'fin_instruments'
+    streamed = None
+    if config.QUOTE_REPLAY_FEED:
+        streamed = StreamedQuotes(
+            ReplayStreamProvider.from_csv(
+                config.QUOTE_REPLAY_FEED,
+                provider_name=config.DEFAULT_DATA_PROVIDER,
+                interval=config.QUOTE_REPLAY_INTERVAL,
+                repeat=True
+            ),
+            db, digest, thresholds
+        )
 
     lis.add_callback(
         "UPDATE", notify_on_instrument_upd,
+        table="fin_instruments",
+        tg_client=c_for_listener,
+        database=db,
+        digest=digest,
+        thresholds=thresholds
+    )
+
+    # caught-up rows (after reconnect) are passed as updates: instruments inserted meanwhile too
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        lis.add_callback(
+            event, sync_on_instrument_change,
+            table="fin_instruments",
+            tg_client=c_for_listener,
+            database=db,
+            instruments=db.instruments
+        )
+
+    lis.add_callback(
+        "*", sync_on_tracking_change,
+        table="tracking",
         tg_client=c_for_listener,
-        database=db
+        database=db,
+        thresholds=thresholds,
+        periodic=periodic,
+        streamed=streamed
+    )
+
+    lis.add_callback(
+        "*", sync_on_user_change,
+        table="bot_users",
+        tg_client=c_for_listener,
+        database=db,
+        users=db.users
     )
 
     await c_for_listener.start()
-    await asyncio.gather(lis.start_listening(), idle())
-    await c_for_listener.stop()
+    await dispatcher.start()
+    # background loops run forever: stopped (cancelled) once the bot is stopped
+    background = {
+        "listener": lis.start_listening(),
+        "digest": digest.run(),
+        "periodic-quotes": start_periodic_quotes(periodic),
+        "price-refresher": refresher.run(),
+        **({"streamed-quotes": streamed.run()} if streamed is not None else {}),
+    }
+    tasks = [asyncio.create_task(coro, name=name) for name, coro in background.items()]
+    for task in tasks:
+        task.add_done_callback(_log_if_failed)
+
+    try:
+        await idle()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # pending digests are sent before the dispatcher drains its queue
+        await digest.flush()
+        await dispatcher.stop()
+        await c_for_listener.stop()
 
 
 async def start_main_bot():
@@ -76,10 +255,22 @@ async def start_main_bot():
 
 
 async def main():
-    await asyncio.gather(
-        start_listener(),
-        start_main_bot()
-    )
+    # provider's HTTP session is shared by both bots
+    await av_provider.open()
+    try:
+        # instruments are looked up in-process from now on (kept current by realtime events)
+        await db.load_instrument_index()
+    except Exception as err:
+        logger.error(f"Failed to load instrument index, instruments are queried: {err}")
+
+    try:
+        await asyncio.gather(
+            start_listener(),
+            start_main_bot()
+        )
+    finally:
+        await av_provider.close()
+        await db.close()
 
 
 if __name__ == "__main__":
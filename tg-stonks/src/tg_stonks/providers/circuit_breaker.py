@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Any, Callable, final
+
+from loguru import logger
+
+from tg_stonks.providers.metrics import ProviderMetrics
+from tg_stonks.providers.protocols import IDataProvider
+from tg_stonks.providers.wrapper import ProviderWrapper
+from tg_stonks.utils.circuit_breaker import BreakerState, CircuitBreaker
+
+
+@final
+class CircuitBreakerProvider(ProviderWrapper):
+    """
+    Data provider failing fast while its endpoint keeps failing: calls of each method go through
+    a circuit breaker (see: CircuitBreaker); only `failures` (timeouts, connection errors) count -
+    other errors (e.g. unknown symbol) count neither as failures nor as successes;
+    breakers are registered in `metrics`: routing sees their state (see: FailoverProvider)
+
+    Wraps the API client itself, under QuotaProvider: a half-open probe is made as soon as it is let
+    through the quota, and calls rejected by the breaker do not spend quota (see: `quota_cost`)
+    """
+
+    def __init__(
+            self,
+            provider: IDataProvider,
+            metrics: ProviderMetrics,
+            failure_threshold: int = 5,
+            cool_down: float = 30.0,
+            failures: tuple[type[BaseException], ...] = (TimeoutError, ConnectionError),
+            clock: Callable[[], float] = time.monotonic):
+        super().__init__(provider)
+        self.metrics = metrics
+        self.failure_threshold = failure_threshold
+        self.cool_down = cool_down
+        self.failures = failures
+        self._clock = clock
+
+    def breaker(self, method: str) -> CircuitBreaker:
+        key = (self.provider_name, method)
+        if key not in self.metrics.breakers:
+            self.metrics.breakers[key] = CircuitBreaker(
+                f"{self.provider_name}.{method}",
+                failure_threshold=self.failure_threshold,
+                cool_down=self.cool_down,
+                clock=self._clock
+            )
+        return self.metrics.breakers[key]
+
+    def quota_cost(self, method: str, *args, **kwargs) -> int:
+        """Number of API requests made by a call of the method: none if the breaker would reject it
+        """
+        if not self.breaker(method).allows_call:
+            return 0
+
+        return super().quota_cost(method, *args, **kwargs)
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        breaker = self.breaker(method)
+        breaker.acquire()
+        try:
+            res = await super()._call(method, *args, **kwargs)
+        except self.failures as err:
+            breaker.record_failure()
+            if breaker.state == BreakerState.OPEN:
+                logger.warning(f"<CircuitBreakerProvider> '{breaker.name}' is open for {self.cool_down}s: {err!r}")
+            raise
+        except (Exception, asyncio.CancelledError):
+            # not a failure of the endpoint, nor a proof it works
+            breaker.release()
+            raise
+
+        breaker.record_success()
+        return res
@@ -0,0 +1,22 @@
+from typing import final
+
+
+@final
+class BulkQuotesUnavailable(Exception):
+    """
+    Should be raised by 'get_securities_by_tickers' when provider's bulk quotes
+    turned out to be unavailable (e.g. premium endpoint on a free plan) and nothing was fetched.
+
+    The call should be made again: then quotes are fetched one by one,
+    and quota is spent according to it (see: QuotaProvider).
+    """
+    pass
+
+
+@final
+class QuotaWaitTimeout(TimeoutError):
+    """
+    Raised by a call which was not let through the quota of the provider's API in time
+    (see: QuotaLimits.interactive_max_wait) - nothing was requested.
+    """
+    pass
@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any, final
+
+from loguru import logger
+
+from tg_stonks.providers.metrics import ProviderMetrics
+from tg_stonks.providers.protocols import IDataProvider
+from tg_stonks.providers.wrapper import ProviderWrapper
+from tg_stonks.utils.circuit_breaker import BreakerState
+
+
+@final
+class FailoverProvider(ProviderWrapper):
+    """
+    Data provider routing calls to the preferred provider or its alternates:
+    - failover: when a provider fails, the call is made by the next one;
+    - hedging: when a provider is slower than `hedge_percentile` of its recent latency,
+    a second (hedged) call is made by the next one - whichever succeeds first wins;
+    providers with too many recent errors or open circuit breaker are tried last (see: ProviderMetrics)
+    """
+
+    def __init__(
+            self,
+            provider: IDataProvider,
+            alternates: list[IDataProvider],
+            metrics: ProviderMetrics,
+            hedge_percentile: float = 0.95,
+            min_samples: int = 20,
+            max_error_rate: float = 0.5):
+        super().__init__(provider)
+        self.alternates = alternates
+        self.metrics = metrics
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+
+    def _is_healthy(self, provider: IDataProvider) -> bool:
+        return self.metrics[provider.provider_name].error_rate < self.max_error_rate
+
+    def _is_open(self, provider: IDataProvider, method: str) -> bool:
+        return self.metrics.breaker_state(provider.provider_name, method) == BreakerState.OPEN
+
+    def candidates(self, method: str) -> list[IDataProvider]:
+        """Providers able to make the call: preferred one first, unhealthy ones last,
+        ones failing fast (open circuit breaker) - the very last
+        """
+        providers = [self.provider] + [alt for alt in self.alternates if hasattr(alt, method)]
+        return sorted(providers, key=lambda prov: (self._is_open(prov, method), not self._is_healthy(prov)))
+
+    def _hedge_delay(self, provider: IDataProvider) -> float | None:
+        # no hedging until enough latency samples are collected
+        stats = self.metrics[provider.provider_name]
+        if stats.samples < self.min_samples:
+            return None
+        return stats.percentile(self.hedge_percentile)
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        candidates = iter(self.candidates(method))
+        in_flight: dict[asyncio.Task, IDataProvider] = {}
+        hedged = False
+        last_err: Exception | None = None
+
+        def call_next() -> bool:
+            prov = next(candidates, None)
+            if prov is None:
+                return False
+            task = asyncio.create_task(getattr(prov, method)(*args, **kwargs))
+            in_flight[task] = prov
+            return True
+
+        call_next()
+        try:
+            while in_flight:
+                hedge_delay = None
+                if not hedged and len(in_flight) == 1:
+                    hedge_delay = self._hedge_delay(next(iter(in_flight.values())))
+
+                done, _ = await asyncio.wait(
+                    in_flight,
+                    timeout=hedge_delay,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    if call_next():
+                        logger.debug(f"<FailoverProvider> '{method}' is slow, hedged")
+                    continue
+
+                for task in done:
+                    prov = in_flight.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+
+                    last_err = task.exception()
+                    logger.warning(f"<FailoverProvider> '{prov.provider_name}' failed '{method}': {last_err}")
+
+                # failover: nothing else is in flight
+                if not in_flight:
+                    call_next()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        raise last_err
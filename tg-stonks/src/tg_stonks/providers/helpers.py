@@ -6,7 +6,8 @@ def filter_by_name(providers: list[IDataProvider], name: str) -> IDataProvider:
     for prov in providers:
         if prov.provider_name == name:
             return prov
-        raise RuntimeError(f"No data providers with name '{name}' found")
+
+    raise RuntimeError(f"No data providers with name '{name}' found")
 
 
 def filter_by_prov_type(providers: list[IDataProvider], prov_type: ProviderT) -> list:
@@ -0,0 +1,97 @@
+import time
+from collections import deque
+from typing import Any, final
+
+from tg_stonks.providers.errors import BulkQuotesUnavailable
+from tg_stonks.providers.protocols import IDataProvider
+from tg_stonks.providers.wrapper import ProviderWrapper
+from tg_stonks.utils.circuit_breaker import BreakerState, CircuitBreaker, CircuitOpenError
+
+
+class ProviderStats:
+    """
+    Latency and errors of the last `window` calls of a data provider
+    """
+
+    def __init__(self, window: int = 100):
+        self.calls = 0
+        self.errors = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._failed: deque[bool] = deque(maxlen=window)
+
+    def record(self, latency: float, failed: bool = False) -> None:
+        self.calls += 1
+        self.errors += failed
+        self._failed.append(failed)
+        # latency of failed calls says nothing about how long a result takes
+        if not failed:
+            self._latencies.append(latency)
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self._failed) / len(self._failed) if self._failed else 0.0
+
+    def percentile(self, q: float) -> float | None:
+        """Latency (seconds) which `q` (0..1) of recent successful calls did not exceed
+        """
+        if not self._latencies:
+            return None
+
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ProviderMetrics:
+    """
+    Stats of data providers by provider name,
+    and circuit breakers of their methods (see: CircuitBreakerProvider)
+    """
+
+    def __init__(self, window: int = 100):
+        self.window = window
+        self._stats: dict[str, ProviderStats] = {}
+        # (provider name, method) -> breaker
+        self.breakers: dict[tuple[str, str], CircuitBreaker] = {}
+
+    def __getitem__(self, provider_name: str) -> ProviderStats:
+        if provider_name not in self._stats:
+            self._stats[provider_name] = ProviderStats(self.window)
+        return self._stats[provider_name]
+
+    def items(self):
+        return self._stats.items()
+
+    def breaker_state(self, provider_name: str, method: str) -> BreakerState:
+        breaker = self.breakers.get((provider_name, method))
+        return breaker.state if breaker is not None else BreakerState.CLOSED
+
+
+@final
+class MeteredProvider(ProviderWrapper):
+    """
+    Data provider recording latency and errors of its calls into `metrics`;
+    should wrap the API client under QuotaProvider: waiting for local quota is not latency of the provider
+    """
+
+    def __init__(self, provider: IDataProvider, metrics: ProviderMetrics):
+        super().__init__(provider)
+        self.stats = metrics[provider.provider_name]
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        started_at = time.monotonic()
+        try:
+            res = await super()._call(method, *args, **kwargs)
+        except (CircuitOpenError, BulkQuotesUnavailable):
+            # rejected without being made / to be made again in another way: neither an error of the provider,
+            #   nor latency of a result
+            raise
+        except Exception:
+            self.stats.record(time.monotonic() - started_at, failed=True)
+            raise
+
+        self.stats.record(time.monotonic() - started_at)
+        return res
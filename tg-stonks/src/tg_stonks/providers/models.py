@@ -1,3 +1,4 @@
+import datetime as dt
 from typing import Optional
 
 from pydantic import BaseModel
@@ -10,7 +11,7 @@ class StockMarketInstrument(BaseModel):
     symbol: str
     price: float
     data_provider: str
-    exchange: Optional[str]
+    exchange: Optional[str] = None
 
 
 class ExchangePair(BaseModel):
@@ -23,7 +24,17 @@ class ExchangePair(BaseModel):
     name_from: Optional[str]
     name_to: Optional[str]
     data_provider: str
-    exchange: Optional[str]
+    exchange: Optional[str] = None
+
+
+class QuoteTick(BaseModel):
+    """
+    Represents a price (or exchange rate) of instrument pushed by streaming data provider
+    """
+    symbol: str
+    price: float
+    data_provider: str
+    at: Optional[dt.datetime] = None
 
 
 class SearchQueryRes(BaseModel):
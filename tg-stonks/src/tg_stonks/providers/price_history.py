@@ -0,0 +1,126 @@
+import datetime as dt
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import final
+
+import numpy as np
+
+# columns of daily price history: day + values
+HISTORY_COLUMNS: dict[str, np.dtype] = {
+    "day": np.dtype("datetime64[D]"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+
+
+@dataclass(frozen=True)
+class PriceHistory:
+    """
+    Daily prices of an instrument: columns of equal length ordered by day
+    """
+    day: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    @classmethod
+    def empty(cls) -> "PriceHistory":
+        return cls(**{name: np.empty(0, dtype=dtype) for name, dtype in HISTORY_COLUMNS.items()})
+
+    @classmethod
+    def from_rows(cls, rows: dict[dt.date, tuple[float, float, float, float, float]]) -> "PriceHistory":
+        """Build history of rows `day -> (open, high, low, close, volume)` in any order
+        """
+        days = sorted(rows)
+        values = np.array([rows[day] for day in days], dtype="<f8").reshape(len(days), 5)
+        return cls(np.array(days, dtype="datetime64[D]"), *(values[:, i].copy() for i in range(5)))
+
+    def since(self, day: dt.date) -> "PriceHistory":
+        start = int(np.searchsorted(self.day, np.datetime64(day, "D")))
+        return self[start:]
+
+    def __getitem__(self, rows: slice) -> "PriceHistory":
+        # slices of arrays are views: no copying
+        return PriceHistory(**{name: getattr(self, name)[rows] for name in HISTORY_COLUMNS})
+
+
+@final
+class PriceHistoryStore:
+    """
+    Local columnar store of daily prices: one directory per (provider, symbol)
+    with an append-only file per column, read through memory maps;
+    ranges are served as slices of the maps - nothing is copied or parsed
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._maps: dict[tuple[str, str], PriceHistory] = {}
+
+    def _dir_of(self, provider_name: str, symbol: str) -> Path:
+        return self.root / provider_name / symbol.upper()
+
+    def _length(self, path: Path) -> int:
+        meta = path / "meta.json"
+        return json.loads(meta.read_text())["length"] if meta.exists() else 0
+
+    def history(self, provider_name: str, symbol: str) -> PriceHistory:
+        key = (provider_name, symbol.upper())
+        if key not in self._maps:
+            path = self._dir_of(provider_name, symbol)
+            length = self._length(path)
+            if length == 0:
+                return PriceHistory.empty()
+
+            self._maps[key] = PriceHistory(**{
+                name: np.memmap(path / f"{name}.bin", dtype=dtype, mode="r", shape=(length,))
+                for name, dtype in HISTORY_COLUMNS.items()
+            })
+
+        return self._maps[key]
+
+    def read(self, provider_name: str, symbol: str, start: dt.date, end: dt.date | None = None) -> PriceHistory:
+        """Stored prices of days from `start` to `end` (inclusive)
+        """
+        history = self.history(provider_name, symbol)
+        lo = int(np.searchsorted(history.day, np.datetime64(start, "D")))
+        hi = len(history) if end is None else int(np.searchsorted(history.day, np.datetime64(end, "D"), side="right"))
+        return history[lo:hi]
+
+    def last_day(self, provider_name: str, symbol: str) -> dt.date | None:
+        history = self.history(provider_name, symbol)
+        return history.day[-1].item() if len(history) else None
+
+    def append(self, provider_name: str, symbol: str, history: PriceHistory) -> int:
+        """Append days after the last stored one; returns number of appended days
+        """
+        last_day = self.last_day(provider_name, symbol)
+        if last_day is not None:
+            history = history.since(last_day + dt.timedelta(days=1))
+        if len(history) == 0:
+            return 0
+
+        path = self._dir_of(provider_name, symbol)
+        path.mkdir(parents=True, exist_ok=True)
+        length = self._length(path)
+        for name, dtype in HISTORY_COLUMNS.items():
+            with open(path / f"{name}.bin", "r+b" if length else "wb") as column:
+                # anything after the committed length is a leftover of an interrupted append
+                column.truncate(length * dtype.itemsize)
+                column.seek(length * dtype.itemsize)
+                column.write(np.ascontiguousarray(getattr(history, name), dtype=dtype).tobytes())
+
+        # length is committed last: columns are consistent even if appending was interrupted
+        meta = path / "meta.json.tmp"
+        meta.write_text(json.dumps({"length": length + len(history)}))
+        meta.replace(path / "meta.json")
+        self._maps.pop((provider_name, symbol.upper()), None)
+        return len(history)
@@ -1,10 +1,13 @@
+import datetime as dt
 from abc import abstractmethod
-from typing import Protocol, runtime_checkable
+from typing import AsyncIterator, Protocol, runtime_checkable
 
+from tg_stonks.providers.price_history import PriceHistory
 from tg_stonks.providers.provider_type import ProviderT
 from tg_stonks.providers.models import (
     StockMarketInstrument,
     ExchangePair,
+    QuoteTick,
     SearchQueryRes
 )
 
@@ -28,6 +31,8 @@ class IDataProvider(Protocol):
 #   - IDataProviderStockMarket      -- async methods for getting stock market prices
 #   - IDataProviderCurrencyEx       -- async methods for getting currency exchange rates
 #   - IDataProviderCryptoEx         -- async methods for getting cryptocurrency exchange rates
+#   - IDataProviderTimeSeries       -- async methods for getting price history of stock market instruments
+#   - IDataProviderStreaming        -- push-based quotes (e.g. exchange websockets or a replay feed)
 
 
 @runtime_checkable
@@ -40,6 +45,13 @@ class IDataProviderStockMarket(IDataProvider, Protocol):
     async def get_security_by_ticker(self, ticker: str) -> StockMarketInstrument:
         ...
 
+    @abstractmethod
+    async def get_securities_by_tickers(self, tickers: list[str]) -> dict[str, StockMarketInstrument]:
+        """Quotes of many instruments at once, by requested ticker (failed ones are missing);
+        raises BulkQuotesUnavailable when bulk quotes turned out to be unavailable (call it again)
+        """
+        ...
+
 
 @runtime_checkable
 class IDataProviderCurrencyEx(IDataProvider, Protocol):
@@ -53,3 +65,30 @@ class IDataProviderCryptoEx(IDataProvider, Protocol):
     @abstractmethod
     async def get_crypto_pair(self, symbol_from: str, symbol_to: str) -> ExchangePair:
         ...
+
+
+@runtime_checkable
+class IDataProviderTimeSeries(IDataProvider, Protocol):
+    @abstractmethod
+    async def get_daily_history(self, symbol: str, since: dt.date) -> PriceHistory:
+        """Daily prices of stock market instrument from `since` day up to the latest one
+        """
+        ...
+
+
+@runtime_checkable
+class IDataProviderStreaming(IDataProvider, Protocol):
+    @abstractmethod
+    def stream_quotes(self, symbols: list[str]) -> AsyncIterator[QuoteTick]:
+        """Ticks of subscribed symbols as they come: subscribes `symbols` and streams until closed;
+        set of symbols may be changed while streaming (see: subscribe / unsubscribe)
+        """
+        ...
+
+    @abstractmethod
+    async def subscribe(self, symbols: list[str]) -> None:
+        ...
+
+    @abstractmethod
+    async def unsubscribe(self, symbols: list[str]) -> None:
+        ...
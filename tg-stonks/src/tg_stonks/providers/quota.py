@@ -0,0 +1,142 @@
+import asyncio
+import heapq
+import itertools
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum, unique
+from typing import Any, final
+
+from loguru import logger
+
+from tg_stonks.providers.errors import QuotaWaitTimeout
+from tg_stonks.providers.protocols import IDataProvider
+from tg_stonks.providers.wrapper import ProviderWrapper
+from tg_stonks.utils.rate_limit import TokenBucket
+
+
+@unique
+class CallPriority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# priority of provider calls made by the current task:
+#   user commands are interactive by default, background services set it for their own tasks
+CALL_PRIORITY: ContextVar[CallPriority] = ContextVar("call_priority", default=CallPriority.INTERACTIVE)
+
+
+@dataclass(frozen=True)
+class QuotaLimits:
+    per_minute: int
+    per_day: int | None = None
+    # share of each bucket background calls may not spend: kept for interactive ones
+    interactive_reserve: float = 0.0
+    # interactive calls not let through in this many seconds fail (QuotaWaitTimeout), `None` - never
+    interactive_max_wait: float | None = None
+
+
+@final
+class QuotaScheduler:
+    """
+    Lets provider calls through within quota: per-minute and per-day token buckets;
+    calls over the quota are queued (not failed) and let through by priority,
+    then in order of arrival
+
+    Background calls leave `interactive_reserve` of every bucket untouched,
+    so busy background services do not use up budget of user commands;
+    interactive calls wait for at most `interactive_max_wait` seconds
+    """
+
+    def __init__(self, limits: QuotaLimits, name: str = ""):
+        self.name = name
+        self.limits = limits
+        self._buckets = {"per_minute": TokenBucket(rate=limits.per_minute / 60, capacity=limits.per_minute)}
+        if limits.per_day is not None:
+            self._buckets["per_day"] = TokenBucket(rate=limits.per_day / (24 * 60 * 60), capacity=limits.per_day)
+
+        self._waiters: list[tuple[CallPriority, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump_task: asyncio.Task | None = None
+        # set on every arrival: a call of higher priority does not wait out the sleep of a lower one
+        self._arrived = asyncio.Event()
+
+    def remaining(self) -> dict[str, float]:
+        """Remaining budget by bucket: calls that may be made right now
+        """
+        return {name: bucket.available for name, bucket in self._buckets.items()}
+
+    def queued(self) -> dict[CallPriority, int]:
+        counts = {priority: 0 for priority in CallPriority}
+        for priority, _, fut in self._waiters:
+            if not fut.done():
+                counts[priority] += 1
+
+        return counts
+
+    async def acquire(self, priority: CallPriority = CallPriority.INTERACTIVE) -> None:
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._arrived.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+
+        max_wait = self.limits.interactive_max_wait if priority == CallPriority.INTERACTIVE else None
+        try:
+            # cancelled on timeout: skipped by the pump, no quota is spent
+            await asyncio.wait_for(fut, max_wait)
+        except TimeoutError:
+            raise QuotaWaitTimeout(f"'{self.name}' is out of quota: not let through in {max_wait}s") from None
+
+    def _wait_time(self, priority: CallPriority) -> float:
+        if priority == CallPriority.INTERACTIVE:
+            return max(bucket.wait_time() for bucket in self._buckets.values())
+
+        # at least one token is left to take, whatever the reserve is
+        return max(
+            bucket.wait_time(1 + min(self.limits.interactive_reserve * bucket.capacity, bucket.capacity - 1))
+            for bucket in self._buckets.values()
+        )
+
+    async def _pump(self) -> None:
+        while self._waiters:
+            # cancelled callers do not spend quota
+            if self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+                continue
+
+            wait_for = self._wait_time(self._waiters[0][0])
+            if wait_for > 0:
+                logger.debug(f"<QuotaScheduler> '{self.name}' is out of quota for {wait_for:.1f}s")
+                self._arrived.clear()
+                try:
+                    await asyncio.wait_for(self._arrived.wait(), wait_for)
+                except TimeoutError:
+                    pass
+                continue
+
+            for bucket in self._buckets.values():
+                bucket.try_acquire()
+
+            _, _, fut = heapq.heappop(self._waiters)
+            fut.set_result(None)
+
+
+@final
+class QuotaProvider(ProviderWrapper):
+    """
+    Data provider making calls within quota of its API (see: QuotaScheduler);
+    priority of a call is taken from CALL_PRIORITY of the calling task,
+    number of API requests a call makes - from `quota_cost` of the provider (if it has one)
+    """
+
+    def __init__(self, provider: IDataProvider, limits: QuotaLimits):
+        super().__init__(provider)
+        self.scheduler = QuotaScheduler(limits, name=provider.provider_name)
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        quota_cost = getattr(self.provider, "quota_cost", None)
+        cost = quota_cost(method, *args, **kwargs) if quota_cost is not None else 1
+        for _ in range(cost):
+            await self.scheduler.acquire(CALL_PRIORITY.get())
+
+        return await super()._call(method, *args, **kwargs)
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from typing import Any, Callable, Hashable, final
+
+from loguru import logger
+
+from tg_stonks.providers.protocols import IDataProvider
+from tg_stonks.providers.provider_type import ProviderT
+from tg_stonks.providers.quota import CALL_PRIORITY, CallPriority
+from tg_stonks.providers.search_cache import SearchCache
+from tg_stonks.providers.wrapper import ProviderWrapper
+from tg_stonks.utils.ttl_cache import CacheStats, TTLCache
+
+# quote methods of data provider protocols and kinds of quotes they return
+QUOTE_METHODS: dict[str, ProviderT] = {
+    "get_security_by_ticker": ProviderT.STOCK_MARKET,
+    "get_curr_pair": ProviderT.CURR_FOREX,
+    "get_crypto_pair": ProviderT.CURR_CRYPTO,
+}
+
+DEFAULT_QUOTE_TTL = 60.0
+
+
+def quote_symbol(*args, **kwargs) -> str:
+    # 'aapl' and 'AAPL' are the same ticker, pairs are joined as in 'fin_instruments': 'USD_EUR'
+    return "_".join(str(arg).strip().upper() for arg in (*args, *kwargs.values()))
+
+
+@final
+class CachedProvider(ProviderWrapper):
+    """
+    Quote cache in front of a data provider: quotes are keyed by (provider, kind, symbol),
+    kept for TTL of their kind in a bounded LRU cache;
+    with `stale_ttl` set, an expired quote is still served for that long
+    while it is refreshed in the background;
+    stock market search results are cached by `search_cache` (if given)
+    """
+
+    def __init__(
+            self,
+            provider: IDataProvider,
+            ttl: dict[ProviderT, float] | None = None,
+            max_size: int = 1024,
+            stale_ttl: float = 0.0,
+            search_cache: SearchCache | None = None,
+            clock: Callable[[], float] = time.monotonic):
+        super().__init__(provider)
+        self.ttl = ttl or {}
+        self.stale_ttl = stale_ttl
+        self.search_cache = search_cache
+        self._clock = clock
+        self._cache = TTLCache(max_size, clock=clock)
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+
+    def stats(self) -> CacheStats:
+        return self._cache.stats
+
+    def _ttl_of(self, kind: ProviderT) -> float:
+        return self.ttl.get(kind, DEFAULT_QUOTE_TTL)
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        if method == "search_stock_market" and self.search_cache is not None:
+            return await self._search(*args, **kwargs)
+
+        if method == "get_securities_by_tickers":
+            return await self._securities(*args, **kwargs)
+
+        kind = QUOTE_METHODS.get(method)
+        if kind is None:
+            return await super()._call(method, *args, **kwargs)
+
+        key = (self.provider_name, kind, quote_symbol(*args, **kwargs))
+        entry = self._cache.get(key)
+        if entry is not None:
+            if not entry.is_fresh(self._clock()):
+                self._revalidate(key, method, args, kwargs)
+            return entry.value
+
+        quote = await super()._call(method, *args, **kwargs)
+        self._cache.put(key, quote, self._ttl_of(kind), self.stale_ttl)
+        return quote
+
+    async def _search(self, query: str) -> list:
+        results = self.search_cache.get(query)
+        if results is None:
+            results = await super()._call("search_stock_market", query)
+            self.search_cache.put(query, results)
+
+        return results
+
+    async def _securities(self, tickers: list[str]) -> dict:
+        # cached quotes are served as is, only missing ones are requested (all at once)
+        kind = QUOTE_METHODS["get_security_by_ticker"]
+        securities, missing = {}, []
+        for ticker in tickers:
+            entry = self._cache.get((self.provider_name, kind, quote_symbol(ticker)))
+            if entry is not None and entry.is_fresh(self._clock()):
+                securities[ticker] = entry.value
+            else:
+                missing.append(ticker)
+
+        if missing:
+            fetched = await super()._call("get_securities_by_tickers", missing)
+            for ticker, security in fetched.items():
+                self._cache.put((self.provider_name, kind, quote_symbol(ticker)), security,
+                                self._ttl_of(kind), self.stale_ttl)
+            securities.update(fetched)
+
+        return securities
+
+    def _revalidate(self, key: tuple, method: str, args: tuple, kwargs: dict) -> None:
+        # only one background refresh per quote
+        if key in self._refreshing:
+            return
+
+        task = asyncio.create_task(self._refresh(key, method, args, kwargs))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: tuple, method: str, args: tuple, kwargs: dict) -> None:
+        _, kind, symbol = key
+        # refresh runs in its own task: nobody waits for it
+        CALL_PRIORITY.set(CallPriority.BACKGROUND)
+        try:
+            quote = await super()._call(method, *args, **kwargs)
+        except Exception as err:
+            # stale quote is served until it is dropped from cache
+            logger.warning(f"<CachedProvider> failed to refresh '{symbol}' ({kind}): {err}")
+            return
+
+        self._cache.put(key, quote, self._ttl_of(kind), self.stale_ttl)
+        self._cache.stats.refreshes += 1
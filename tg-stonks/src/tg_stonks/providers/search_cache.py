@@ -0,0 +1,84 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, final
+
+from tg_stonks.providers.models import SearchQueryRes
+from tg_stonks.utils.ttl_cache import CacheStats, TTLCache
+
+
+def normalize_query(query: str) -> str:
+    # "APPLE ", "apple" and " Apple" are the same query
+    return " ".join(query.casefold().split())
+
+
+def matches_query(res: SearchQueryRes, norm_query: str) -> bool:
+    """Matching rule of search queries: symbol starts with the query or name contains it
+    """
+    return res.symbol.casefold().startswith(norm_query) or norm_query in normalize_query(res.name)
+
+
+@dataclass(frozen=True)
+class _SearchResults:
+    results: list[SearchQueryRes]
+    # provider returned every match of the query, not only the best `max_results` of them
+    complete: bool
+
+
+@final
+class SearchCache:
+    """
+    Cache of search results keyed by normalized query (answers repeated queries only)
+
+    With `derive_from_prefix` results of a longer query are also derived from cached
+    results of its prefix when the provider returned fewer results than its limit:
+    an approximation - they are filtered by `matches_query`, not by provider's own
+    (fuzzy) matching, so results provider would give for the longer query may be missed
+    """
+
+    def __init__(
+            self,
+            max_size: int = 256,
+            ttl: float = 3600.0,
+            max_results: int = 10,
+            min_prefix_len: int = 2,
+            derive_from_prefix: bool = False,
+            clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_results = max_results
+        self.min_prefix_len = min_prefix_len
+        self.derive_from_prefix = derive_from_prefix
+        self.prefix_hits = 0
+        self._cache: TTLCache[_SearchResults] = TTLCache(max_size, clock=clock)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._cache.stats
+
+    def get(self, query: str) -> list[SearchQueryRes] | None:
+        norm_query = normalize_query(query)
+        if (entry := self._cache.get(norm_query)) is not None:
+            return entry.value.results
+
+        if not self.derive_from_prefix:
+            return None
+
+        # longest complete prefix gives the smallest set to filter
+        for prefix_len in range(len(norm_query) - 1, self.min_prefix_len - 1, -1):
+            prefix_entry = self._cache.peek(norm_query[:prefix_len])
+            if prefix_entry is None or not prefix_entry.value.complete:
+                continue
+
+            results = [res for res in prefix_entry.value.results if matches_query(res, norm_query)]
+            # as complete as the prefix's results (by the matching rule above)
+            self._cache.put(norm_query, _SearchResults(results, complete=True), self.ttl)
+            self.prefix_hits += 1
+            return results
+
+        return None
+
+    def put(self, query: str, results: list[SearchQueryRes]) -> None:
+        self._cache.put(
+            normalize_query(query),
+            _SearchResults(results, complete=len(results) < self.max_results),
+            self.ttl
+        )
@@ -0,0 +1,43 @@
+from typing import Any, final
+
+from tg_stonks.providers.protocols import IDataProvider
+from tg_stonks.providers.quota import CALL_PRIORITY, CallPriority
+from tg_stonks.providers.wrapper import ProviderWrapper
+from tg_stonks.utils.single_flight import SingleFlight
+
+
+def _hashable(args: tuple) -> tuple:
+    # e.g. list of tickers of bulk quotes
+    return tuple(
+        _hashable(tuple(arg)) if isinstance(arg, (list, tuple)) else arg
+        for arg in args
+    )
+
+
+@final
+class SingleFlightProvider(ProviderWrapper):
+    """
+    Data provider making at most one request per distinct call at a time:
+    concurrent calls of the same method with identical arguments share one in-flight request
+
+    A shared request is made with explicit priority (see: CALL_PRIORITY): calls join requests
+    of the same or higher priority only - an interactive call does not wait behind a background one
+    """
+
+    def __init__(self, provider: IDataProvider):
+        super().__init__(provider)
+        self.flights = SingleFlight()
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        key = (method, _hashable(args), _hashable(tuple(sorted(kwargs.items()))))
+        priority = CALL_PRIORITY.get()
+        # flight of the highest priority (the lowest value) which is not lower than the caller's one
+        joinable = [p for p in sorted(CallPriority) if p <= priority and (p, key) in self.flights]
+        flight_priority = joinable[0] if joinable else priority
+
+        async def call():
+            # the shared task runs with priority of its flight, not of the context it was created in
+            CALL_PRIORITY.set(flight_priority)
+            return await super(SingleFlightProvider, self)._call(method, *args, **kwargs)
+
+        return await self.flights.do((flight_priority, key), call)
@@ -0,0 +1,57 @@
+import datetime as dt
+import time
+from typing import Any, Callable, final
+
+import numpy as np
+from loguru import logger
+
+from tg_stonks.providers.price_history import PriceHistory, PriceHistoryStore
+from tg_stonks.providers.protocols import IDataProvider
+from tg_stonks.providers.wrapper import ProviderWrapper
+
+
+@final
+class StoredHistoryProvider(ProviderWrapper):
+    """
+    Data provider serving price history from local store (see: PriceHistoryStore):
+    the wrapped provider is called only for the missing tail - days after the last stored one;
+    only complete days (before today) are stored
+    """
+
+    def __init__(
+            self,
+            provider: IDataProvider,
+            store: PriceHistoryStore,
+            max_depth: dt.timedelta = dt.timedelta(days=365),
+            recheck_after: float = 60 * 60.0,
+            clock: Callable[[], float] = time.monotonic):
+        super().__init__(provider)
+        self.store = store
+        self.max_depth = max_depth
+        self.recheck_after = recheck_after
+        self._clock = clock
+        # tails are not re-requested too often: weekends and holidays have no new days
+        self._checked_at: dict[str, float] = {}
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        if method == "get_daily_history":
+            return await self._daily_history(*args, **kwargs)
+
+        return await super()._call(method, *args, **kwargs)
+
+    async def _daily_history(self, symbol: str, since: dt.date) -> PriceHistory:
+        today = dt.date.today()
+        last_day = self.store.last_day(self.provider_name, symbol)
+        checked_at = self._checked_at.get(symbol.upper())
+        recently_checked = checked_at is not None and self._clock() - checked_at < self.recheck_after
+
+        if (last_day is None or last_day < today - dt.timedelta(days=1)) and not recently_checked:
+            # empty store is filled from the deepest day needed
+            tail_since = last_day + dt.timedelta(days=1) if last_day else min(since, today - self.max_depth)
+            tail = await super()._call("get_daily_history", symbol, tail_since)
+            complete = tail[:int((tail.day < np.datetime64(today, "D")).sum())]
+            appended = self.store.append(self.provider_name, symbol, complete)
+            self._checked_at[symbol.upper()] = self._clock()
+            logger.debug(f"<StoredHistoryProvider> '{symbol}' tail since {tail_since}: {appended} days stored")
+
+        return self.store.read(self.provider_name, symbol, since)
@@ -0,0 +1,54 @@
+import functools
+from typing import Any
+
+from tg_stonks.providers.protocols import (
+    IDataProvider,
+    IDataProviderStockMarket,
+    IDataProviderCurrencyEx,
+    IDataProviderCryptoEx,
+    IDataProviderTimeSeries
+)
+from tg_stonks.providers.provider_type import ProviderT
+
+# methods of every kind of request/response data provider protocol
+#   (streaming providers are not wrapped: their quotes are pushed, not requested)
+PROTOCOL_METHODS: dict[type, tuple[str, ...]] = {
+    IDataProviderStockMarket: ("search_stock_market", "get_security_by_ticker", "get_securities_by_tickers"),
+    IDataProviderCurrencyEx: ("get_curr_pair",),
+    IDataProviderCryptoEx: ("get_crypto_pair",),
+    IDataProviderTimeSeries: ("get_daily_history",),
+}
+
+
+class ProviderWrapper(IDataProvider):
+    """
+    Base of data providers wrapping another data provider:
+    implements exactly the same protocols as the wrapped provider does,
+    every protocol method call goes through `_call` - override it to add behaviour
+    """
+
+    def __init__(self, provider: IDataProvider):
+        self.provider = provider
+        # protocols are checked by attributes of an instance (see: `isinstance` of runtime protocols),
+        #   so only methods of protocols implemented by the wrapped provider are bound
+        for protocol, methods in PROTOCOL_METHODS.items():
+            if isinstance(provider, protocol):
+                for method in methods:
+                    setattr(self, method, functools.partial(self._call, method))
+
+    @property
+    def provider_type(self) -> ProviderT:
+        return self.provider.provider_type
+
+    @property
+    def provider_name(self) -> str:
+        return self.provider.provider_name
+
+    def quota_cost(self, method: str, *args, **kwargs) -> int:
+        """Number of API requests made by a call of the method (see: QuotaProvider) - as of the wrapped provider
+        """
+        quota_cost = getattr(self.provider, "quota_cost", None)
+        return quota_cost(method, *args, **kwargs) if quota_cost is not None else 1
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        return await getattr(self.provider, method)(*args, **kwargs)
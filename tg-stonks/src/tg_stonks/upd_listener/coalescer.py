@@ -0,0 +1,94 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import final, Awaitable, Callable, Hashable
+
+from tg_stonks.upd_listener.work_queue import merge_payloads, record_key
+
+
+@dataclass
+class _Pending:
+    event: str
+    payload: dict
+    deadline: float
+
+
+@final
+class UpdateCoalescer:
+    """
+    Holds each record's update for `window` seconds and passes on
+    only the latest one; superseded payloads are dropped right here,
+    before any query or message is made for them
+
+    'old_record' of the first payload is kept, so the passed on update
+    still spans the whole change made within the window
+
+    Only 'UPDATE' events of `table` are held, other events are passed on at once;
+    at most `max_pending` records are held: when full, the oldest one is passed on
+    before its window ends (waiting for the sink, so its backpressure applies)
+    """
+
+    def __init__(
+            self,
+            sink: Callable[[str, dict], Awaitable[None]],
+            window: float = 1.0,
+            max_pending: int = 1000,
+            table: str = "fin_instruments"):
+        self.sink = sink
+        self.window = window
+        self.max_pending = max_pending
+        self.table = table
+        self._pending: dict[Hashable, _Pending] = {}
+        # window is the same for everyone: keys are ordered by deadline
+        self._order: deque[Hashable] = deque()
+        self._wake_up = asyncio.Event()
+        self._superseded = 0
+
+    @property
+    def superseded(self) -> int:
+        return self._superseded
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def put(self, event: str, payload: dict) -> None:
+        key = record_key(event, payload) \
+            if event == "UPDATE" and payload.get("table") == self.table else None
+        # e.g. changes of users and trackings: not delayed
+        if key is None:
+            await self.sink(event, payload)
+            return
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.payload = merge_payloads(pending.payload, payload)
+            self._superseded += 1
+            return
+
+        if len(self._pending) >= self.max_pending:
+            await self.sink(*self._pop_oldest())
+
+        self._pending[key] = _Pending(event, payload, time.monotonic() + self.window)
+        self._order.append(key)
+        self._wake_up.set()
+
+    async def run(self) -> None:
+        while True:
+            if not self._order:
+                self._wake_up.clear()
+                await self._wake_up.wait()
+                continue
+
+            delay = self._pending[self._order[0]].deadline - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                # the oldest one may be passed on meanwhile (see: put): checked again
+                continue
+
+            await self.sink(*self._pop_oldest())
+
+    def _pop_oldest(self) -> tuple[str, dict]:
+        pending = self._pending.pop(self._order.popleft())
+        return pending.event, pending.payload
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import unique, StrEnum
+from typing import final, Awaitable, Callable, Hashable
+
+from loguru import logger
+
+
+@unique
+class OverflowPolicy(StrEnum):
+    """
+    What to do with a new payload when the queue is full:
+    - 'block' - wait for a free slot (stops reading from the socket)
+    - 'drop_oldest' - drop the oldest queued payload
+    - 'coalesce' - merge the new payload into the queued one with the same key
+        ('old_record' of the queued one is kept), blocks when the key is new
+    """
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+
+
+@dataclass
+class Job:
+    event: str
+    payload: dict
+    enqueued_at: float
+    key: Hashable | None = None
+
+
+@dataclass(frozen=True)
+class WorkQueueStats:
+    depth: int
+    max_size: int
+    processed: int
+    dropped: int
+    coalesced: int
+    lag: float      # seconds the oldest queued payload is waiting
+    lag_max: float  # max seconds a payload waited before processing
+
+
+def record_key(event: str, payload: dict) -> Hashable | None:
+    record = payload.get("record") or payload.get("old_record") or {}
+    if record.get("id") is None:
+        return None
+    return payload.get("table"), event, record["id"]
+
+
+def merge_payloads(earlier: dict, later: dict) -> dict:
+    """Later payload of the same record, spanning both changes: 'old_record' of the earlier one is kept
+    """
+    old_record = earlier.get("old_record")
+    return later if old_record is None else {**later, "old_record": old_record}
+
+
+@final
+class WorkQueue:
+    """
+    Bounded queue of database events drained by a fixed number of workers
+    """
+
+    def __init__(
+            self,
+            handle: Callable[[Job], Awaitable[None]],
+            workers: int = 4,
+            max_size: int = 1000,
+            policy: OverflowPolicy = OverflowPolicy.BLOCK):
+        self.handle = handle
+        self.workers_num = workers
+        self.policy = policy
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=max_size)
+        # same jobs in the same order: depth and lag are read from here
+        self._queued: deque[Job] = deque()
+        self._queued_by_key: dict[Hashable, Job] = {}
+        self._workers: list[asyncio.Task] = []
+
+        self._processed = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._lag_max = 0.0
+
+    async def put(self, event: str, payload: dict) -> None:
+        job = Job(event, payload, time.monotonic())
+
+        match self.policy:
+            case OverflowPolicy.DROP_OLDEST:
+                if self._queue.full():
+                    self._queue.get_nowait()
+                    self._queued.popleft()
+                    self._queue.task_done()
+                    self._dropped += 1
+                self._queue.put_nowait(job)
+
+            case OverflowPolicy.COALESCE:
+                job.key = record_key(event, payload)
+                queued = self._queued_by_key.get(job.key) if job.key is not None else None
+                # only when there is no room: otherwise every payload is handled
+                if queued is not None and self._queue.full():
+                    # keep position (and age) in the queue, merge the data only
+                    queued.payload = merge_payloads(queued.payload, payload)
+                    self._coalesced += 1
+                    return
+
+                await self._queue.put(job)
+                if job.key is not None:
+                    self._queued_by_key[job.key] = job
+
+            case _:
+                await self._queue.put(job)
+
+        self._queued.append(job)
+
+    def start(self) -> None:
+        for i in range(self.workers_num):
+            self._workers.append(asyncio.create_task(self._work(), name=f"listener-worker-{i}"))
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def stats(self) -> WorkQueueStats:
+        oldest = self._queued[0] if self._queued else None
+        return WorkQueueStats(
+            depth=len(self._queued),
+            max_size=self._queue.maxsize,
+            processed=self._processed,
+            dropped=self._dropped,
+            coalesced=self._coalesced,
+            lag=time.monotonic() - oldest.enqueued_at if oldest is not None else 0.0,
+            lag_max=self._lag_max
+        )
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._queued.popleft()
+            if job.key is not None and self._queued_by_key.get(job.key) is job:
+                del self._queued_by_key[job.key]
+
+            self._lag_max = max(self._lag_max, time.monotonic() - job.enqueued_at)
+            try:
+                await self.handle(job)
+            except Exception as err:
+                logger.exception(f"<WorkQueue> failed to handle '{job.event}' event: {err}")
+            finally:
+                self._processed += 1
+                self._queue.task_done()
@@ -0,0 +1,89 @@
+import time
+from enum import StrEnum, unique
+from typing import Callable, final
+
+
+@unique
+class BreakerState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Call is rejected without being made: circuit breaker is open
+    """
+
+
+@final
+class CircuitBreaker:
+    """
+    Circuit breaker of calls to an unreliable dependency:
+    - closed: calls are made, `failure_threshold` consecutive failures open it;
+    - open: calls fail fast (CircuitOpenError) for `cool_down` seconds;
+    - half-open: a single probe call is made - its success closes the breaker, failure opens it again
+    """
+
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int = 5,
+            cool_down: float = 30.0,
+            clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cool_down = cool_down
+        self._clock = clock
+        self.failures = 0   # consecutive ones
+        self.opened = 0     # times it was opened
+        self.rejected = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> BreakerState:
+        if self._opened_at is None:
+            return BreakerState.CLOSED
+        if self._clock() - self._opened_at < self.cool_down:
+            return BreakerState.OPEN
+        return BreakerState.HALF_OPEN
+
+    @property
+    def allows_call(self) -> bool:
+        """Whether a call would be let through (by `acquire`), nothing is claimed
+        """
+        state = self.state
+        return state == BreakerState.CLOSED or (state == BreakerState.HALF_OPEN and not self._probing)
+
+    def acquire(self) -> None:
+        """Let a call through or raise CircuitOpenError
+        """
+        state = self.state
+        if state == BreakerState.CLOSED:
+            return
+        if state == BreakerState.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+
+        self.rejected += 1
+        retry_in = max(0.0, self._opened_at + self.cool_down - self._clock())
+        raise CircuitOpenError(f"'{self.name}' is failing: circuit is open, retry in {retry_in:.0f}s")
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+            self.opened += 1
+        self._probing = False
+
+    def release(self) -> None:
+        """Call was cancelled or failed for a reason other than the dependency failing:
+        neither success nor failure, another probe may be made
+        """
+        self._probing = False
@@ -1,3 +1,4 @@
+import re
 from typing import Any
 
 
@@ -10,3 +11,46 @@ def ensure_has_key(the_kwargs: dict, key: str) -> Any:
             " in function kwargs"
         )
     return arg_v
+
+
+_INTERVAL_UNITS = {
+    "s": 1, "sec": 1, "second": 1, "seconds": 1,
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+    "h": 3600, "hour": 3600, "hours": 3600,
+    "d": 86400, "day": 86400, "days": 86400,
+}
+
+
+# '<number><unit>' token of interval text, e.g. '15m' or '1 hour'
+_INTERVAL_TOKEN = r"(\d+(?:\.\d+)?)\s*([a-z]+)"
+# the whole text is a sequence of tokens: anything else in it is an error, not skipped
+_INTERVAL_TOKENS = re.compile(rf"(?:{_INTERVAL_TOKEN}\s*)+")
+
+# postgres 'interval' text: optional days and HH:MM[:SS], e.g. '1 day 02:00:00'
+_PG_INTERVAL = re.compile(r"(?:(\d+)\s*days?\s+)?(\d+):(\d{1,2})(?::(\d{1,2}(?:\.\d+)?))?")
+
+
+def parse_interval(interval: str) -> float:
+    """Parse interval string to seconds:
+    '90', '15m', '15 minutes', '1 hour 30 min' or postgres-like '01:30:00', '00:15', '1 day 02:00:00'
+    """
+    interval = interval.strip().lower()
+    if re.fullmatch(r"\d+(\.\d+)?", interval):
+        return float(interval)
+
+    if ":" in interval:
+        match = _PG_INTERVAL.fullmatch(interval)
+        if match is None:
+            raise ValueError(f"Incorrect interval: '{interval}'")
+        days, hours, minutes, seconds = match.groups()
+        # two parts are HH:MM (as in postgres), not MM:SS
+        return int(days or 0) * 86400 + int(hours) * 3600 + int(minutes) * 60 + float(seconds or 0)
+
+    if _INTERVAL_TOKENS.fullmatch(interval) is None:
+        raise ValueError(f"Incorrect interval: '{interval}'")
+
+    matches = re.findall(_INTERVAL_TOKEN, interval)
+    if any(unit not in _INTERVAL_UNITS for _, unit in matches):
+        raise ValueError(f"Incorrect interval: '{interval}'")
+
+    return sum(float(num) * _INTERVAL_UNITS[unit] for num, unit in matches)
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: holds up to `capacity` tokens,
+    refilled continuously at `rate` tokens per second
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate should be positive, got: {rate}")
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    @property
+    def is_full(self) -> bool:
+        return self.available >= self.capacity
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Number of seconds until enough tokens are available (0 if they are), nothing is taken
+        """
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available;
+        returns 0 on success, otherwise the number of seconds to wait until enough tokens are refilled
+        """
+        if (wait_for := self.wait_time(tokens)) > 0:
+            return wait_for
+
+        self._tokens -= tokens
+        return 0.0
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        # lock keeps waiters in FIFO order, so nobody starves
+        async with self._lock:
+            while (wait_for := self.try_acquire(tokens)) > 0:
+                await asyncio.sleep(wait_for)
@@ -0,0 +1,52 @@
+import heapq
+import itertools
+from typing import Hashable
+
+
+class TimerHeap:
+    """
+    Min-heap of timers keyed by any hashable key:
+    `schedule` and popping due timers are O(log n), `cancel` is O(1)
+    (cancelled and re-scheduled entries are dropped lazily when popped)
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._due: dict[Hashable, float] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._due
+
+    def schedule(self, key: Hashable, due: float) -> None:
+        # re-scheduling a key makes its older heap entry outdated
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, next(self._seq), key))
+
+    def cancel(self, key: Hashable) -> None:
+        self._due.pop(key, None)
+
+    def _drop_outdated(self) -> None:
+        while self._heap:
+            due, _, key = self._heap[0]
+            if self._due.get(key) == due:
+                return
+            heapq.heappop(self._heap)
+
+    def next_due(self) -> float | None:
+        self._drop_outdated()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> list[Hashable]:
+        """Remove and return keys of all timers due at `now` (or earlier)
+        """
+        keys = []
+        while (due := self.next_due()) is not None and due <= now:
+            _, _, key = heapq.heappop(self._heap)
+            del self._due[key]
+            keys.append(key)
+
+        return keys
@@ -0,0 +1,97 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, TypeVar
+
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    refreshes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / lookups if lookups else 0.0
+
+
+@dataclass
+class CacheEntry(Generic[V]):
+    value: V
+    expires_at: float
+    # expired entry still may be served (as stale) until this moment
+    stale_until: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+
+class TTLCache(Generic[V]):
+    """
+    Bounded cache: entries expire after their TTL (optionally kept a bit longer as stale),
+    least recently used entries are evicted when the cache is full
+    """
+
+    def __init__(self, max_size: int, clock: Callable[[], float] = time.monotonic):
+        if max_size <= 0:
+            raise ValueError(f"Cache size should be positive, got: {max_size}")
+
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, CacheEntry[V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> CacheEntry[V] | None:
+        """Look up an entry: it is either fresh or stale (check with `is_fresh`), or None if missing
+        """
+        entry = self._entries.get(key)
+        now = self._clock()
+        if entry is not None and now >= entry.stale_until:
+            del self._entries[key]
+            entry = None
+
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if entry.is_fresh(now):
+            self.stats.hits += 1
+        else:
+            self.stats.stale_hits += 1
+
+        return entry
+
+    def peek(self, key: Hashable) -> CacheEntry[V] | None:
+        """Look up an entry (fresh or stale) without counting it in stats and without touching LRU order
+        """
+        entry = self._entries.get(key)
+        if entry is not None and self._clock() >= entry.stale_until:
+            return None
+
+        return entry
+
+    def put(self, key: Hashable, value: V, ttl: float, stale_ttl: float = 0.0) -> None:
+        now = self._clock()
+        self._entries[key] = CacheEntry(value, now + ttl, now + ttl + stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,65 @@
+import pytest
+
+from tg_stonks.impl.alpha_vantage_models import (
+    construct_trusted,
+    parse_pair,
+    parse_quote,
+    parse_quotes,
+    parse_search_results,
+    SearchQueryResAV,
+    StockMarketInstrumentAV,
+)
+from tg_stonks.impl.alpha_vantage_provider import AlphaVantageAPI
+from tg_stonks.impl.alpha_vantage_stub import AlphaVantageStub, exchange_rate, global_quote, symbol_search
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+def with_provider(payloads: list[dict]) -> list[dict]:
+    return [{**p, "data_provider": "alpha_vantage"} for p in payloads]
+
+
+def test_batches_parsed_as_model_by_model():
+    quotes = with_provider([global_quote("AAPL"), global_quote("IBM")])
+    found = with_provider(symbol_search("apple"))
+
+    assert parse_quotes(quotes) == [parse_quote(q) for q in quotes]
+    assert parse_search_results(found) == [SearchQueryResAV.model_validate(r, strict=True) for r in found]
+    assert parse_quotes(quotes)[0].price > 0 and isinstance(parse_quotes(quotes)[0].price, float)
+
+
+def test_trusted_mode_builds_same_models():
+    quotes = with_provider([global_quote("AAPL"), global_quote("IBM")])
+    found = with_provider(symbol_search("apple"))
+    pair = with_provider([exchange_rate("USD", "EUR")])[0]
+    pair["8. Bid Price"] = "-"
+
+    assert parse_quotes(quotes, trusted=True) == parse_quotes(quotes)
+    assert parse_search_results(found, trusted=True) == parse_search_results(found)
+    assert parse_pair(pair, trusted=True) == parse_pair(pair)
+    assert parse_pair(pair, trusted=True).price_bid is None
+
+
+def test_trusted_mode_reports_missing_fields():
+    quote = with_provider([global_quote("AAPL")])[0]
+    del quote["05. price"]
+
+    with pytest.raises(ValueError):
+        construct_trusted(StockMarketInstrumentAV, quote)
+    with pytest.raises(ValueError):
+        parse_quotes([quote])
+
+
+@pytest.mark.asyncio
+async def test_provider_in_trusted_mode():
+    async with AlphaVantageStub() as stub:
+        async with AlphaVantageAPI("stub", base_url=stub.url, trusted_payloads=True) as av_api:
+            found = await av_api.search_stock_market("apple")
+            security = await av_api.get_security_by_ticker("AAPL")
+            pair = await av_api.get_curr_pair("USD", "EUR")
+
+    assert "AAPL" in [res.symbol for res in found]
+    assert security.price > 0 and isinstance(security.price, float)
+    assert pair.rate > 0
@@ -0,0 +1,165 @@
+import asyncio
+
+import pytest
+
+from tg_stonks.bot.app_container import AppContainer
+from tg_stonks.impl.alpha_vantage_provider import AlphaVantageAPI
+from tg_stonks.impl.alpha_vantage_stub import AlphaVantageStub, StubConfig
+from tg_stonks.providers.circuit_breaker import CircuitBreakerProvider
+from tg_stonks.providers.metrics import ProviderMetrics
+from tg_stonks.providers.provider_type import ProviderT
+from tg_stonks.providers.quota import QuotaLimits, QuotaProvider
+from tg_stonks.utils.circuit_breaker import BreakerState, CircuitOpenError
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeStockProvider:
+    provider_type = ProviderT.STOCK_MARKET
+
+    def __init__(self, name: str):
+        self.provider_name = name
+        self.error: Exception | None = None
+        self.calls = 0
+
+    async def search_stock_market(self, query: str):
+        return []
+
+    async def get_security_by_ticker(self, ticker: str):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.provider_name
+
+    async def get_securities_by_tickers(self, tickers: list[str]):
+        return {}
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_probes():
+    clock = FakeClock()
+    metrics = ProviderMetrics()
+    fake = FakeStockProvider("av")
+    prov = CircuitBreakerProvider(fake, metrics, failure_threshold=2, cool_down=30.0, clock=clock)
+
+    # errors of answered calls do not count
+    fake.error = ValueError("unknown symbol")
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            await prov.get_security_by_ticker("XXX")
+    assert metrics.breaker_state("av", "get_security_by_ticker") == BreakerState.CLOSED
+
+    fake.error = TimeoutError()
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            await prov.get_security_by_ticker("IBM")
+    assert metrics.breaker_state("av", "get_security_by_ticker") == BreakerState.OPEN
+
+    # fails fast: provider is not called, other methods are not affected
+    with pytest.raises(CircuitOpenError):
+        await prov.get_security_by_ticker("IBM")
+    assert fake.calls == 5
+    assert await prov.search_stock_market("ibm") == []
+
+    # failed probe opens it again
+    clock.now = 31.0
+    assert metrics.breaker_state("av", "get_security_by_ticker") == BreakerState.HALF_OPEN
+    with pytest.raises(TimeoutError):
+        await prov.get_security_by_ticker("IBM")
+    assert metrics.breaker_state("av", "get_security_by_ticker") == BreakerState.OPEN
+
+    # successful probe closes it
+    clock.now = 62.0
+    fake.error = None
+    assert await prov.get_security_by_ticker("IBM") == "av"
+    assert metrics.breaker_state("av", "get_security_by_ticker") == BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_successes():
+    clock = FakeClock()
+    metrics = ProviderMetrics()
+    fake = FakeStockProvider("av")
+    prov = CircuitBreakerProvider(fake, metrics, failure_threshold=2, cool_down=30.0, clock=clock)
+
+    # consecutive failures are not reset by an error of answered call
+    for error in (TimeoutError(), ValueError("unknown symbol"), TimeoutError()):
+        fake.error = error
+        with pytest.raises(type(error)):
+            await prov.get_security_by_ticker("IBM")
+    assert metrics.breaker_state("av", "get_security_by_ticker") == BreakerState.OPEN
+
+    # nor is it a successful probe: breaker stays half-open, the next call probes again
+    clock.now = 31.0
+    fake.error = ValueError("unknown symbol")
+    with pytest.raises(ValueError):
+        await prov.get_security_by_ticker("XXX")
+    assert metrics.breaker_state("av", "get_security_by_ticker") == BreakerState.HALF_OPEN
+    fake.error = None
+    assert await prov.get_security_by_ticker("IBM") == "av"
+    assert metrics.breaker_state("av", "get_security_by_ticker") == BreakerState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_under_quota_spends_nothing():
+    clock = FakeClock()
+    metrics = ProviderMetrics()
+    fake = FakeStockProvider("av")
+    fake.error = TimeoutError()
+    prov = QuotaProvider(
+        CircuitBreakerProvider(fake, metrics, failure_threshold=1, clock=clock),
+        QuotaLimits(per_minute=1)
+    )
+
+    with pytest.raises(TimeoutError):
+        await prov.get_security_by_ticker("IBM")
+
+    # out of quota, but rejected right away: neither waits for quota nor spends it
+    with pytest.raises(CircuitOpenError):
+        await asyncio.wait_for(prov.get_security_by_ticker("IBM"), timeout=1.0)
+    assert fake.calls == 1
+    assert sum(prov.scheduler.queued().values()) == 0
+
+
+@pytest.mark.asyncio
+async def test_routing_avoids_open_breaker():
+    clock = FakeClock()
+    metrics = ProviderMetrics()
+    main_prov, alt_prov = FakeStockProvider("main"), FakeStockProvider("alt")
+    main_prov.error = ConnectionError("down")
+    app = AppContainer(
+        database=None,
+        data_providers=[
+            CircuitBreakerProvider(main_prov, metrics, failure_threshold=1, clock=clock),
+            CircuitBreakerProvider(alt_prov, metrics, clock=clock),
+        ],
+        provider_metrics=metrics
+    )
+
+    prov = app.provider_stock_market_by_name("main", allow_fallback=True)
+    # failed over, breaker of the main one is opened
+    assert await prov.get_security_by_ticker("IBM") == "alt"
+    assert [p.provider_name for p in prov.candidates("get_security_by_ticker")] == ["alt", "main"]
+
+    assert await prov.get_security_by_ticker("IBM") == "alt"
+    assert main_prov.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_request_deadline_of_hanging_api():
+    async with AlphaVantageStub(StubConfig(latency=1.0)) as stub:
+        async with AlphaVantageAPI("stub", base_url=stub.url, request_timeout=0.1) as av_api:
+            started_at = asyncio.get_running_loop().time()
+            with pytest.raises(TimeoutError):
+                await av_api.get_security_by_ticker("AAPL")
+            assert asyncio.get_running_loop().time() - started_at < 1.0
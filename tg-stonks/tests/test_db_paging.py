@@ -0,0 +1,107 @@
+import httpx
+import pytest
+
+from tg_stonks.impl.supabase_database import SELECT_PAGE_SIZE
+from tg_stonks.impl.supabase_database_async import SupabaseDBAsync
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+def _db_serving(rows: list[dict], orders: list[str] | None = None) -> tuple[SupabaseDBAsync, list[str]]:
+    """Database answering every select with `rows`, capped like PostgREST ('max-rows');
+    'order' params of requests are appended to `orders`
+    """
+    db = SupabaseDBAsync("http://localhost", "key")
+    ranges = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        ranges.append(request.headers.get("Range"))
+        if orders is not None:
+            orders.append(request.url.params.get("order"))
+        start, end = 0, len(rows) - 1
+        if "Range" in request.headers:
+            start, end = map(int, request.headers["Range"].split("-"))
+        end = min(end, start + SELECT_PAGE_SIZE - 1)
+        return httpx.Response(200, json=rows[start:end + 1])
+
+    db.pg_client.session = httpx.AsyncClient(
+        base_url="http://localhost/rest/v1",
+        transport=httpx.MockTransport(handler)
+    )
+    return db, ranges
+
+
+@pytest.mark.asyncio
+async def test_trackings_with_tg_ids_read_page_by_page():
+    trackers = 2 * SELECT_PAGE_SIZE + 500
+    db, ranges = _db_serving([
+        {"id": f"{i:05}", "instrument": "i1", "bot_users": {"tg_user_id": i}}
+        for i in range(trackers)
+    ])
+
+    rows = await db.trackings_with_tg_ids({"instrument": "i1"})
+    assert [tg_user_id for _, tg_user_id in rows] == list(range(trackers))
+    assert ranges == ["0-999", "1000-1999", "2000-2999"]
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_periodic_trackings_read_page_by_page():
+    trackings = SELECT_PAGE_SIZE + 1
+    db, ranges = _db_serving([
+        {
+            "id": f"{i:05}", "notify_every": "01:00:00",
+            "bot_users": {"tg_user_id": i}, "fin_instruments": {"id": "i1"}
+        }
+        for i in range(trackings)
+    ])
+
+    rows = await db.periodic_trackings()
+    assert len(rows) == trackings and rows[-1][2] == trackings - 1
+    assert ranges == ["0-999", "1000-1999"]
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_tracked_instruments_counted_over_all_pages():
+    db, ranges = _db_serving([
+        {"id": f"{i:05}", "instrument": f"i{i % 3}", "fin_instruments": {"id": f"i{i % 3}"}}
+        for i in range(SELECT_PAGE_SIZE + 3)
+    ])
+
+    counts = {instrument_obj["id"]: count for instrument_obj, count in await db.tracked_instruments()}
+    assert sum(counts.values()) == SELECT_PAGE_SIZE + 3 and len(ranges) == 2
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_instrument_index_loaded_page_by_page():
+    instruments = SELECT_PAGE_SIZE + 1
+    db, ranges = _db_serving([
+        {"id": f"00000000-0000-0000-0000-{i:012}", "type": "stock_market_instrument",
+         "data_provider_code": "alpha_vantage", "symbol": f"S{i}"}
+        for i in range(instruments)
+    ])
+
+    await db.load_instrument_index()
+    assert len(db.instruments) == instruments
+    assert ranges == ["0-999", "1000-1999"]
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_instruments_updated_since_read_page_by_page():
+    updated = SELECT_PAGE_SIZE + 10
+    orders = []
+    db, ranges = _db_serving([
+        {"id": f"{i:05}", "updated_at": f"2024-01-01T00:00:{i % 60:02}"}
+        for i in range(updated)
+    ], orders)
+
+    assert len(await db.instruments_updated_since("2024-01-01T00:00:00")) == updated
+    assert ranges == ["0-999", "1000-1999"]
+    # ties of 'updated_at' are broken by 'id': pages neither skip nor repeat rows
+    assert orders == ["updated_at,id", "updated_at,id"]
+    await db.close()
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from tg_stonks.bot.digest import DigestScheduler
+from tg_stonks.utils.other import parse_interval
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+class FakeDispatcher:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id: int, text: str):
+        self.sent.append((chat_id, text))
+
+
+def _instrument(_id: str, price: float) -> dict:
+    return {
+        "id": _id,
+        "symbol": _id.upper(),
+        "updated_at": "2023-08-01T10:00:00",
+        "price": price,
+        "data_provider_code": "alpha_vantage"
+    }
+
+
+def test_parse_interval():
+    assert parse_interval("90") == 90
+    assert parse_interval("15m") == 900
+    assert parse_interval("1 hour 30 minutes") == 5400
+    assert parse_interval("00:15:00") == 900
+    # postgres 'interval' text: two parts are HH:MM, days are optional
+    assert parse_interval("00:15") == 900
+    assert parse_interval("1 day 02:00:00") == 93600
+    assert parse_interval("2 days 00:00:30.5") == 172830.5
+
+    with pytest.raises(ValueError):
+        parse_interval("every now and then")
+    # text around or between tokens is not skipped
+    for garbage in ("every 5 m", "5m please", "1 hour, 30 min", "1h and 30m"):
+        with pytest.raises(ValueError):
+            parse_interval(garbage)
+
+
+@pytest.mark.asyncio
+async def test_updates_of_user_sent_as_one_message():
+    dispatcher = FakeDispatcher()
+    digest = DigestScheduler(dispatcher, default_window=0.05)
+    runner = asyncio.create_task(digest.run())
+
+    digest.add(1, _instrument("aapl", 100), {"on_price": 99})
+    digest.add(1, _instrument("msft", 300), {"on_price": 290})
+    digest.add(1, _instrument("aapl", 101), {"on_price": 99})
+    digest.add(2, _instrument("aapl", 101), {"on_price": 99, "notify_every": "0.01s"})
+
+    await asyncio.sleep(0.1)
+    runner.cancel()
+
+    assert [chat_id for chat_id, _ in dispatcher.sent] == [2, 1]
+    text = dispatcher.sent[1][1]
+    assert "2 instruments updated" in text
+    assert "`101`" in text and "`100`" not in text
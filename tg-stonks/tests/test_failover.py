@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from tg_stonks.bot.app_container import AppContainer
+from tg_stonks.providers.failover import FailoverProvider
+from tg_stonks.providers.metrics import MeteredProvider, ProviderMetrics
+from tg_stonks.providers.provider_type import ProviderT
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+class FakeStockProvider:
+    provider_type = ProviderT.STOCK_MARKET
+
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        self.provider_name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    async def search_stock_market(self, query: str):
+        return []
+
+    async def get_security_by_ticker(self, ticker: str):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.provider_name} is down")
+        return self.provider_name
+
+    async def get_securities_by_tickers(self, tickers: list[str]):
+        return {}
+
+
+def _metered(metrics: ProviderMetrics, *providers) -> list[MeteredProvider]:
+    return [MeteredProvider(prov, metrics) for prov in providers]
+
+
+@pytest.mark.asyncio
+async def test_fails_over_to_alternate():
+    metrics = ProviderMetrics()
+    primary, alternate = _metered(metrics, FakeStockProvider("a", fail=True), FakeStockProvider("b"))
+    routed = FailoverProvider(primary, [alternate], metrics)
+
+    assert await routed.get_security_by_ticker("AAPL") == "b"
+    assert metrics["a"].error_rate == 1.0
+
+
+@pytest.mark.asyncio
+async def test_slow_provider_hedged():
+    metrics = ProviderMetrics()
+    slow, fast = FakeStockProvider("a", delay=0.0), FakeStockProvider("b")
+    primary, alternate = _metered(metrics, slow, fast)
+    routed = FailoverProvider(primary, [alternate], metrics, min_samples=5)
+
+    # usual latency of 'a' is collected, then it becomes slow
+    for _ in range(5):
+        assert await routed.get_security_by_ticker("AAPL") == "a"
+    slow.delay = 1.0
+
+    assert await asyncio.wait_for(routed.get_security_by_ticker("AAPL"), timeout=0.5) == "b"
+    assert fast.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_fallback_only_when_allowed():
+    app = AppContainer(database=None, data_providers=[FakeStockProvider("a"), FakeStockProvider("b")])
+    assert isinstance(app.provider_stock_market_by_name("a", allow_fallback=True), FailoverProvider)
+    assert app.provider_stock_market_by_name("a").provider_name == "a"
@@ -0,0 +1,99 @@
+import uuid
+
+import httpx
+import pytest
+
+from tg_stonks.bot.handlers_db_updates import sync_on_instrument_change
+from tg_stonks.database.entity_models import InstrumentType
+from tg_stonks.database.instrument_index import InstrumentIndex
+from tg_stonks.impl.supabase_database_async import SupabaseDBAsync
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+def _instrument_obj(symbol: str, instrument_type: InstrumentType = InstrumentType.sm_instrument) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "type": instrument_type.value,
+        "data_provider_code": "alpha_vantage",
+        "symbol": symbol,
+    }
+
+
+def test_index_lookups():
+    ibm, pair = _instrument_obj("IBM"), _instrument_obj("USD_EUR", InstrumentType.curr_pair)
+    index = InstrumentIndex()
+    index.load([ibm, pair])
+
+    assert index.loaded and len(index) == 2
+    assert index.id_of(InstrumentType.sm_instrument, "IBM", "alpha_vantage") == uuid.UUID(ibm["id"])
+    # keyed by type and provider too
+    assert index.id_of(InstrumentType.curr_pair, "IBM", "alpha_vantage") is None
+    assert index.id_of(InstrumentType.sm_instrument, "IBM", "other") is None
+
+    # re-added instrument replaces its old key
+    index.add({**ibm, "symbol": "IBM.X"})
+    assert index.id_of(InstrumentType.sm_instrument, "IBM", "alpha_vantage") is None
+    assert len(index) == 2
+
+    index.remove(uuid.UUID(pair["id"]))
+    assert index.id_of(InstrumentType.curr_pair, "USD_EUR", "alpha_vantage") is None
+    assert len(index) == 1
+
+
+def _db_storing(instrument_objs: list[dict]) -> tuple[SupabaseDBAsync, list[httpx.Request]]:
+    """Database answering selects of 'fin_instruments' with stored rows matching 'eq' filters
+    """
+    db = SupabaseDBAsync("http://localhost", "key")
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        filters = {k: v.removeprefix("eq.") for k, v in request.url.params.items() if v.startswith("eq.")}
+        return httpx.Response(200, json=[
+            obj for obj in instrument_objs if all(obj[k] == v for k, v in filters.items())
+        ])
+
+    db.pg_client.session = httpx.AsyncClient(
+        base_url="http://localhost/rest/v1",
+        transport=httpx.MockTransport(handler)
+    )
+    return db, requests
+
+
+@pytest.mark.asyncio
+async def test_index_follows_realtime_events():
+    ibm = _instrument_obj("IBM")
+    db, requests = _db_storing([])
+    db.instruments.load([])
+
+    await sync_on_instrument_change({"type": "INSERT", "record": ibm}, instruments=db.instruments)
+    # answered by the index: no queries
+    assert await db.instrument_id_of(InstrumentType.sm_instrument, "IBM", "alpha_vantage") == uuid.UUID(ibm["id"])
+    assert requests == []
+
+    # inserted while disconnected: caught up as an update
+    caught_up = _instrument_obj("MSFT")
+    await sync_on_instrument_change({"type": "UPDATE", "record": caught_up}, instruments=db.instruments)
+    assert await db.instrument_id_of(InstrumentType.sm_instrument, "MSFT", "alpha_vantage") == uuid.UUID(caught_up["id"])
+
+    # DELETE payload has 'id' only
+    await sync_on_instrument_change({"type": "DELETE", "old_record": {"id": ibm["id"]}}, instruments=db.instruments)
+    assert await db.instrument_id_of(InstrumentType.sm_instrument, "IBM", "alpha_vantage") is None
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_index_miss_is_looked_up_in_database():
+    # inserted while its realtime event was missed
+    missed = _instrument_obj("AAPL")
+    db, requests = _db_storing([missed])
+    db.instruments.load([])
+
+    assert await db.instrument_id_of(InstrumentType.sm_instrument, "AAPL", "alpha_vantage") == uuid.UUID(missed["id"])
+    assert await db.instrument_id_of(InstrumentType.sm_instrument, "AAPL", "alpha_vantage") == uuid.UUID(missed["id"])
+    # found once, then answered by the index
+    assert len(requests) == 1
+    await db.close()
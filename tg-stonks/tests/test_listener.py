@@ -0,0 +1,48 @@
+import pytest
+
+from tg_stonks.impl.supabase_listener import SupabaseListener
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+def _listener(connect_failures: int = 0, **kwargs) -> tuple[SupabaseListener, list[int]]:
+    lis = SupabaseListener("test", "key", reconnect_delay=0.001, **kwargs)
+    attempts = []
+
+    async def connect():
+        attempts.append(len(attempts))
+        if len(attempts) <= connect_failures:
+            # as 'realtime.connection.Socket._connect' does
+            raise Exception("Connection Failed")
+
+    lis.soc._connect = connect
+    return lis, attempts
+
+
+@pytest.mark.asyncio
+async def test_reconnect_survives_failed_connections():
+    lis, attempts = _listener(connect_failures=2)
+    await lis._reconnect()
+    assert len(attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_catch_up_after_outage_before_first_update():
+    asked_since = []
+
+    async def catch_up(since: str) -> list[dict]:
+        asked_since.append(since)
+        return [{"id": "i1", "price": 10.0, "updated_at": "2100-01-01T00:00:00"}]
+
+    lis, _ = _listener(catch_up=catch_up)
+    await lis.set_up()
+    lis.on(None, "UPDATE", lambda payload: None)
+    seeded = lis.high_water_mark
+
+    # nothing received yet: caught up since the moment of connection
+    await lis._catch_up()
+    assert seeded is not None and asked_since == [seeded]
+    assert lis.stats().depth == 1
+    assert lis.high_water_mark == "2100-01-01T00:00:00"
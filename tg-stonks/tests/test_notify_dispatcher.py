@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from pyrogram.errors import FloodWait
+
+from tg_stonks.bot.notify_dispatcher import NotificationDispatcher
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+class FakeClient:
+    def __init__(self, errors: list[Exception] | None = None):
+        # raised by the first calls, one per call
+        self.errors = errors or []
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+
+
+async def _dispatched(
+        client: FakeClient,
+        messages: list[tuple[int, str]],
+        stop: bool = True,
+        **kwargs) -> NotificationDispatcher:
+    dispatcher = NotificationDispatcher(client, workers=2, report_every=0, retry_delay=0.01, **kwargs)
+    await dispatcher.start()
+    for chat_id, text in messages:
+        await dispatcher.send_message(chat_id, text)
+
+    for _ in range(100):
+        stats = dispatcher.stats()
+        if stats.queued == 0 and stats.sent + stats.failed == len(messages):
+            break
+        await asyncio.sleep(0.01)
+
+    if stop:
+        await dispatcher.stop()
+    return dispatcher
+
+
+@pytest.mark.asyncio
+async def test_flood_wait_reschedules_message():
+    client = FakeClient([FloodWait(value=0)])
+    dispatcher = await _dispatched(client, [(1, "a")])
+
+    assert client.sent == [(1, "a")]
+    assert dispatcher.stats().rescheduled == 1
+
+
+@pytest.mark.asyncio
+async def test_network_errors_do_not_stop_workers():
+    client = FakeClient([ConnectionError("reset"), TimeoutError(), OSError("unreachable"), RuntimeError("bug")])
+    dispatcher = await _dispatched(client, [(1, "a"), (2, "b"), (3, "c")], stop=False)
+
+    # retried with backoff, an unexpected error fails its message only
+    assert len(client.sent) == 2
+    assert dispatcher.stats().sent == 2 and dispatcher.stats().failed == 1
+    assert all(not worker.done() for worker in dispatcher._workers)
+    await dispatcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts():
+    client = FakeClient([ConnectionError("reset")] * 3)
+    dispatcher = await _dispatched(client, [(1, "a")], max_attempts=3)
+
+    assert client.sent == []
+    assert dispatcher.stats().failed == 1 and dispatcher.stats().rescheduled == 2
+
+
+@pytest.mark.asyncio
+async def test_per_chat_bucket_reschedules_busy_chat():
+    client = FakeClient()
+    dispatcher = await _dispatched(
+        client, [(1, "a"), (1, "b"), (2, "c")],
+        per_chat_rate=50.0, per_chat_burst=1.0
+    )
+
+    # second message of the same chat waits for its bucket, other chats are not held
+    assert sorted(client.sent) == [(1, "a"), (1, "b"), (2, "c")]
+    assert client.sent.index((2, "c")) < client.sent.index((1, "b"))
+    assert dispatcher.stats().rescheduled >= 1
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from tg_stonks.bot.app_container import AppContainer
+from tg_stonks.bot.periodic_quotes import PeriodicQuotes
+from tg_stonks.providers.models import StockMarketInstrument
+from tg_stonks.providers.provider_type import ProviderT
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+class FakeStockProvider:
+    provider_type = ProviderT.STOCK_MARKET
+    provider_name = "fake"
+
+    def __init__(self):
+        self.released = asyncio.Event()
+        self.requests = []
+
+    async def search_stock_market(self, query: str):
+        return []
+
+    async def get_security_by_ticker(self, ticker: str) -> StockMarketInstrument:
+        self.requests.append(ticker)
+        # e.g. waiting for quota
+        if ticker == "SLOW":
+            await self.released.wait()
+        return StockMarketInstrument(symbol=ticker, price=1.0, data_provider="fake", exchange=None)
+
+    async def get_securities_by_tickers(self, tickers: list[str]):
+        return {}
+
+
+class FakeDispatcher:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        self.sent.append(chat_id)
+
+
+def _periodic_row(_id: str, symbol: str, tg_user_id: int) -> tuple[dict, dict, int]:
+    tracking_obj = {"id": _id, "notify_every": "0.02", "on_price": None, "on_rate": None}
+    instrument_obj = {
+        "id": symbol, "symbol": symbol, "price": 1.0, "exchange_rate": None,
+        "type": "stock_market_instrument", "data_provider_code": "fake", "updated_at": None
+    }
+    return tracking_obj, instrument_obj, tg_user_id
+
+
+@pytest.mark.asyncio
+async def test_slow_fetch_does_not_hold_timers_back():
+    prov, dispatcher = FakeStockProvider(), FakeDispatcher()
+    periodic = PeriodicQuotes(AppContainer(database=None, data_providers=[prov]), dispatcher, tick=0.01)
+    periodic.add(*_periodic_row("a", "SLOW", 1))
+    periodic.add(*_periodic_row("b", "FAST", 2))
+
+    runner = asyncio.create_task(periodic.run())
+    await asyncio.sleep(0.15)
+    # timers kept going: the slow quote is fetched once, the others joined it
+    assert dispatcher.sent.count(2) >= 3
+    assert prov.requests.count("SLOW") == 1 and 1 not in dispatcher.sent
+
+    prov.released.set()
+    await asyncio.sleep(0.005)
+    assert dispatcher.sent.count(1) >= 3
+
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
@@ -0,0 +1,102 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+
+from tg_stonks.impl.alpha_vantage_provider import AlphaVantageAPI
+from tg_stonks.impl.alpha_vantage_stub import AlphaVantageStub
+from tg_stonks.providers.price_history import PriceHistory, PriceHistoryStore
+from tg_stonks.providers.protocols import IDataProviderTimeSeries
+from tg_stonks.providers.provider_type import ProviderT
+from tg_stonks.providers.stored_history import StoredHistoryProvider
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+def days_history(first: dt.date, days: int) -> PriceHistory:
+    return PriceHistory.from_rows({
+        first + dt.timedelta(days=i): (i, i + 1, i - 1, i + 0.5, 1000 + i)
+        for i in range(days)
+    })
+
+
+class FakeTimeSeries(IDataProviderTimeSeries):
+    def __init__(self):
+        self.calls: list[tuple[str, dt.date]] = []
+
+    @property
+    def provider_type(self) -> ProviderT:
+        return ProviderT.STOCK_MARKET
+
+    @property
+    def provider_name(self) -> str:
+        return "fake"
+
+    async def get_daily_history(self, symbol: str, since: dt.date) -> PriceHistory:
+        self.calls.append((symbol, since))
+        today = dt.date.today()
+        # includes today: incomplete day
+        return days_history(since, (today - since).days + 1)
+
+
+def test_store_appends_and_reads_memory_maps(tmp_path):
+    store = PriceHistoryStore(tmp_path)
+    first = dt.date(2023, 1, 1)
+
+    assert store.last_day("av", "ibm") is None
+    assert store.append("av", "ibm", days_history(first, 10)) == 10
+    # overlapping days are not stored twice
+    assert store.append("av", "IBM", days_history(first + dt.timedelta(days=5), 10)) == 5
+    assert store.last_day("av", "ibm") == first + dt.timedelta(days=14)
+
+    part = store.read("av", "ibm", first + dt.timedelta(days=3), first + dt.timedelta(days=6))
+    assert len(part) == 4
+    assert part.close.tolist() == [3.5, 4.5, 5.5, 6.5]
+    # ranges are views of the memory maps: nothing is copied
+    assert isinstance(part.close, np.memmap) and not part.close.flags.owndata
+
+    # history survives reopening
+    reopened = PriceHistoryStore(tmp_path)
+    assert len(reopened.read("av", "ibm", first)) == 15
+
+
+@pytest.mark.asyncio
+async def test_only_missing_tail_is_requested(tmp_path):
+    today = dt.date.today()
+    since = today - dt.timedelta(days=30)
+    fake = FakeTimeSeries()
+    store = PriceHistoryStore(tmp_path)
+    prov = StoredHistoryProvider(fake, store, max_depth=dt.timedelta(days=60), recheck_after=0)
+
+    history = await prov.get_daily_history("ibm", since)
+    # empty store is filled to max depth, today is not stored
+    assert fake.calls == [("ibm", today - dt.timedelta(days=60))]
+    assert len(history) == 30
+    assert store.last_day("fake", "IBM") == today - dt.timedelta(days=1)
+
+    # nothing is missing: no calls
+    await prov.get_daily_history("ibm", since)
+    assert len(fake.calls) == 1
+
+    # days after the last stored one are requested
+    store.root.joinpath("fake", "IBM", "meta.json").write_text('{"length": 55}')
+    store._maps.clear()
+    await prov.get_daily_history("ibm", since)
+    assert fake.calls[-1] == ("ibm", today - dt.timedelta(days=5))
+    assert store.last_day("fake", "IBM") == today - dt.timedelta(days=1)
+
+
+@pytest.mark.asyncio
+async def test_daily_history_from_stub(tmp_path):
+    since = dt.date.today() - dt.timedelta(days=30)
+    async with AlphaVantageStub() as stub:
+        async with AlphaVantageAPI("stub", base_url=stub.url) as av_api:
+            prov = StoredHistoryProvider(av_api, PriceHistoryStore(tmp_path))
+            history = await prov.get_daily_history("IBM", since)
+            await prov.get_daily_history("IBM", since)
+
+    assert 0 < len(history) <= 30
+    assert np.all(np.diff(history.day.astype(np.int64)) > 0)
+    assert stub.requests == {"TIME_SERIES_DAILY": 1}
@@ -0,0 +1,67 @@
+import pytest
+
+from tg_stonks.bot.app_container import AppContainer
+from tg_stonks.bot.price_refresher import PriceRefresher
+from tg_stonks.providers.models import StockMarketInstrument
+from tg_stonks.providers.provider_type import ProviderT
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+class FakeStockProvider:
+    provider_type = ProviderT.STOCK_MARKET
+    provider_name = "fake"
+
+    def __init__(self, prices: dict[str, float]):
+        self.prices = prices
+        self.bulk_requests = []
+
+    async def search_stock_market(self, query: str):
+        return []
+
+    async def get_security_by_ticker(self, ticker: str) -> StockMarketInstrument:
+        return StockMarketInstrument(symbol=ticker, price=self.prices[ticker], data_provider="fake", exchange=None)
+
+    async def get_securities_by_tickers(self, tickers: list[str]) -> dict[str, StockMarketInstrument]:
+        self.bulk_requests.append(tickers)
+        return {ticker: await self.get_security_by_ticker(ticker) for ticker in tickers}
+
+
+class FakeDb:
+    def __init__(self, tracked: list[tuple[dict, int]]):
+        self.tracked = tracked
+        self.upserted = []
+
+    async def tracked_instruments(self) -> list[tuple[dict, int]]:
+        return self.tracked
+
+    async def upsert_instruments(self, instruments: list[dict]):
+        self.upserted.append(instruments)
+
+
+def _instrument(_id: str, symbol: str, price: float) -> dict:
+    return {
+        "id": _id, "symbol": symbol, "price": price, "exchange_rate": None,
+        "type": "stock_market_instrument", "data_provider_code": "fake", "updated_at": None
+    }
+
+
+@pytest.mark.asyncio
+async def test_only_changed_prices_written_in_batches():
+    prov = FakeStockProvider({"AAPL": 190.0, "IBM": 140.0, "MSFT": 400.0})
+    db = FakeDb([
+        (_instrument("i1", "AAPL", 180.0), 1),
+        (_instrument("i2", "IBM", 140.0), 5),
+        (_instrument("i3", "MSFT", 390.0), 3),
+    ])
+    refresher = PriceRefresher(AppContainer(database=db, data_providers=[prov]), batch_size=2)
+
+    await refresher.refresh()
+
+    # most tracked first
+    assert prov.bulk_requests == [["IBM", "MSFT"], ["AAPL"]]
+    assert [[row["id"] for row in batch] for batch in db.upserted] == [["i3"], ["i1"]]
+    assert db.upserted[1][0]["price"] == 190.0
+    assert (refresher.written, refresher.unchanged) == (2, 1)
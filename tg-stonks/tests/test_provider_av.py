@@ -3,6 +3,7 @@ import pprint
 
 import tg_stonks.utils.creds as creds
 from tg_stonks.impl.alpha_vantage_provider import AlphaVantageAPI
+from tg_stonks.providers.errors import BulkQuotesUnavailable
 
 pytest_plugins = (
     'pytest_asyncio',
@@ -23,3 +24,16 @@ async def test_search_stock_market_not_empty():
         pprint.pprint(x)
 
     assert not len(query_res) == 0
+
+
+@pytest.mark.asyncio
+async def test_securities_by_tickers_mapped_by_ticker():
+    tickers = ["AAPL", "IBM"]
+    async with AlphaVantageAPI(creds.get_from_env("ALPHA_VANTAGE_TOKEN")) as av_api:
+        try:
+            securities = await av_api.get_securities_by_tickers(tickers)
+        except BulkQuotesUnavailable:
+            # free plan: fetched one by one
+            securities = await av_api.get_securities_by_tickers(tickers)
+
+    assert set(securities) == set(tickers)
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from tg_stonks.bot.app_container import AppContainer
+from tg_stonks.bot.quotes import fetch_instrument_quotes
+from tg_stonks.impl.alpha_vantage_provider import AlphaVantageAPI
+from tg_stonks.impl.alpha_vantage_stub import AlphaVantageStub, StubConfig
+from tg_stonks.providers.circuit_breaker import CircuitBreakerProvider
+from tg_stonks.providers.metrics import MeteredProvider, ProviderMetrics
+from tg_stonks.providers.quota import QuotaLimits, QuotaProvider
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+def _instrument(_id: str, symbol: str) -> dict:
+    return {"id": _id, "symbol": symbol, "type": "stock_market_instrument", "data_provider_code": "alpha_vantage"}
+
+
+@pytest.mark.asyncio
+async def test_provider_against_stub():
+    async with AlphaVantageStub() as stub:
+        async with AlphaVantageAPI("stub", base_url=stub.url) as av_api:
+            found = await av_api.search_stock_market("apple")
+            security = await av_api.get_security_by_ticker("AAPL")
+            pair = await av_api.get_curr_pair("USD", "EUR")
+            crypto_pair = await av_api.get_crypto_pair("BTC", "USD")
+
+    assert "AAPL" in [res.symbol for res in found]
+    assert security.symbol == "AAPL" and security.price > 0
+    assert (pair.code_from, pair.code_to) == ("USD", "EUR")
+    assert crypto_pair.rate > pair.rate
+    assert stub.requests["CURRENCY_EXCHANGE_RATE"] == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_quotes_fall_back_without_premium():
+    async with AlphaVantageStub() as stub:
+        async with AlphaVantageAPI("stub", base_url=stub.url) as av_api:
+            quota_prov = QuotaProvider(av_api, QuotaLimits(per_minute=6000, per_day=100))
+            app = AppContainer(database=None, data_providers=[quota_prov])
+            quotes = await fetch_instrument_quotes(app, [_instrument("1", "AAPL"), _instrument("2", "ibm")])
+
+    assert set(quotes) == {"1", "2"}
+    assert not av_api.bulk_quotes_available
+    assert stub.requests == {"REALTIME_BULK_QUOTES": 1, "GLOBAL_QUOTE": 2}
+    # every request made is charged: rejected bulk one, then quotes one by one
+    assert round(100 - quota_prov.scheduler.remaining()["per_day"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_metered_under_quota_as_in_main():
+    metrics = ProviderMetrics()
+    async with AlphaVantageStub() as stub:
+        async with AlphaVantageAPI("stub", base_url=stub.url) as av_api:
+            quota_prov = QuotaProvider(
+                CircuitBreakerProvider(MeteredProvider(av_api, metrics), metrics),
+                QuotaLimits(per_minute=6000, per_day=100)
+            )
+            app = AppContainer(database=None, data_providers=[quota_prov])
+            await fetch_instrument_quotes(app, [_instrument("1", "AAPL"), _instrument("2", "ibm")])
+
+    # bulk cost is seen through the wrappers
+    assert round(100 - quota_prov.scheduler.remaining()["per_day"]) == 3
+    # premium-only bulk endpoint is not an error of the provider
+    stats = metrics[av_api.provider_name]
+    assert stats.calls == 1 and stats.samples == 1 and stats.error_rate == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_quotes_stay_available_when_rate_limited():
+    async with AlphaVantageStub(StubConfig(per_minute=1)) as stub:
+        async with AlphaVantageAPI("stub", base_url=stub.url) as av_api:
+            await av_api.get_security_by_ticker("AAPL")
+            with pytest.raises(ValueError):
+                await av_api.get_securities_by_tickers(["AAPL", "ibm"])
+
+    assert av_api.bulk_quotes_available
+    assert stub.rate_limited == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_quotes_in_one_request():
+    async with AlphaVantageStub(StubConfig(bulk_quotes=True)) as stub:
+        async with AlphaVantageAPI("stub", base_url=stub.url) as av_api:
+            securities = await av_api.get_securities_by_tickers(["AAPL", "ibm", "MSFT"])
+
+    assert set(securities) == {"AAPL", "ibm", "MSFT"}
+    assert stub.requests == {"REALTIME_BULK_QUOTES": 1}
+
+
+@pytest.mark.asyncio
+async def test_stub_rate_limit_and_errors():
+    async with AlphaVantageStub(StubConfig(per_minute=2)) as stub:
+        async with AlphaVantageAPI("stub", base_url=stub.url) as av_api:
+            results = await asyncio.gather(
+                *(av_api.get_security_by_ticker("AAPL") for _ in range(3)),
+                return_exceptions=True
+            )
+
+    assert sum(isinstance(res, ValueError) for res in results) == 1
+    assert stub.rate_limited == 1
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from tg_stonks.providers.errors import QuotaWaitTimeout
+from tg_stonks.providers.provider_type import ProviderT
+from tg_stonks.providers.quota import (
+    CALL_PRIORITY,
+    CallPriority,
+    QuotaLimits,
+    QuotaProvider,
+    QuotaScheduler
+)
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+class FakeStockProvider:
+    provider_type = ProviderT.STOCK_MARKET
+    provider_name = "fake"
+
+    def __init__(self):
+        self.tickers = []
+
+    async def search_stock_market(self, query: str):
+        return []
+
+    async def get_security_by_ticker(self, ticker: str):
+        self.tickers.append(ticker)
+        return ticker
+
+    async def get_securities_by_tickers(self, tickers: list[str]):
+        return {ticker: await self.get_security_by_ticker(ticker) for ticker in tickers}
+
+
+@pytest.mark.asyncio
+async def test_calls_over_quota_are_queued():
+    scheduler = QuotaScheduler(QuotaLimits(per_minute=6000, per_day=2))
+    await scheduler.acquire()
+    await scheduler.acquire()
+    assert scheduler.remaining()["per_day"] < 1
+
+    waiter = asyncio.create_task(scheduler.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    assert scheduler.queued()[CallPriority.INTERACTIVE] == 1
+    waiter.cancel()
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_go_first():
+    # 1 call per 10ms, starting with no budget: all calls are queued
+    prov = FakeStockProvider()
+    quota_prov = QuotaProvider(prov, QuotaLimits(per_minute=6000))
+    quota_prov.scheduler._buckets["per_minute"]._tokens = 0
+
+    async def background(ticker: str):
+        CALL_PRIORITY.set(CallPriority.BACKGROUND)
+        return await quota_prov.get_security_by_ticker(ticker)
+
+    await asyncio.gather(
+        background("BG1"),
+        background("BG2"),
+        quota_prov.get_security_by_ticker("USER")
+    )
+
+    assert prov.tickers == ["USER", "BG1", "BG2"]
+
+
+@pytest.mark.asyncio
+async def test_background_calls_leave_reserve_for_interactive():
+    scheduler = QuotaScheduler(QuotaLimits(per_minute=6000, per_day=5, interactive_reserve=0.4))
+
+    async def background():
+        await scheduler.acquire(CallPriority.BACKGROUND)
+
+    # 3 of 5 calls a day are let through for background services, the rest is kept
+    background_calls = [asyncio.create_task(background()) for _ in range(4)]
+    await asyncio.sleep(0.01)
+    assert sum(call.done() for call in background_calls) == 3
+
+    # arriving interactive calls are not held behind the waiting background one
+    await asyncio.wait_for(scheduler.acquire(), timeout=1.0)
+    await asyncio.wait_for(scheduler.acquire(), timeout=1.0)
+    assert not background_calls[3].done()
+    background_calls[3].cancel()
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_wait_for_quota_in_time():
+    scheduler = QuotaScheduler(QuotaLimits(per_minute=6000, per_day=1, interactive_max_wait=0.05))
+    await scheduler.acquire()
+
+    with pytest.raises(QuotaWaitTimeout):
+        await scheduler.acquire()
+    # timed out call is not left in the queue
+    assert scheduler.queued()[CallPriority.INTERACTIVE] == 0
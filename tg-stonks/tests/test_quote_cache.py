@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from tg_stonks.providers.models import StockMarketInstrument
+from tg_stonks.providers.protocols import (
+    IDataProviderStockMarket,
+    IDataProviderCurrencyEx,
+    IDataProviderCryptoEx
+)
+from tg_stonks.providers.provider_type import ProviderT
+from tg_stonks.providers.quote_cache import CachedProvider
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+class FakeStockProvider:
+    provider_type = ProviderT.STOCK_MARKET
+    provider_name = "fake"
+
+    def __init__(self):
+        self.calls = 0
+        self.price = 100.0
+        self.bulk_requests = []
+
+    async def search_stock_market(self, query: str):
+        return []
+
+    async def get_security_by_ticker(self, ticker: str) -> StockMarketInstrument:
+        self.calls += 1
+        return StockMarketInstrument(symbol=ticker, price=self.price, data_provider="fake", exchange=None)
+
+    async def get_securities_by_tickers(self, tickers: list[str]) -> dict[str, StockMarketInstrument]:
+        self.bulk_requests.append(tickers)
+        return {ticker: await self.get_security_by_ticker(ticker) for ticker in tickers}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_wrapper_keeps_protocols_of_provider():
+    cached = CachedProvider(FakeStockProvider())
+    assert isinstance(cached, IDataProviderStockMarket)
+    assert not isinstance(cached, IDataProviderCurrencyEx)
+    assert not isinstance(cached, IDataProviderCryptoEx)
+    assert cached.provider_name == "fake"
+
+
+@pytest.mark.asyncio
+async def test_quote_served_from_cache_until_expired():
+    prov, clock = FakeStockProvider(), FakeClock()
+    cached = CachedProvider(prov, ttl={ProviderT.STOCK_MARKET: 10.0}, clock=clock)
+
+    await cached.get_security_by_ticker("aapl")
+    await cached.get_security_by_ticker("AAPL")
+    assert prov.calls == 1
+
+    clock.now = 11.0
+    await cached.get_security_by_ticker("AAPL")
+    assert prov.calls == 2
+    assert (cached.stats().hits, cached.stats().misses) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_stale_quote_served_while_refreshed():
+    prov, clock = FakeStockProvider(), FakeClock()
+    cached = CachedProvider(prov, ttl={ProviderT.STOCK_MARKET: 10.0}, stale_ttl=5.0, clock=clock)
+    await cached.get_security_by_ticker("AAPL")
+
+    prov.price = 120.0
+    clock.now = 12.0
+    stale = await cached.get_security_by_ticker("AAPL")
+    assert stale.price == 100.0
+
+    await asyncio.sleep(0)
+    fresh = await cached.get_security_by_ticker("AAPL")
+    assert fresh.price == 120.0
+    assert prov.calls == 2
+    assert cached.stats().stale_hits == 1
+    assert cached.stats().refreshes == 1
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_quote_evicted():
+    prov = FakeStockProvider()
+    cached = CachedProvider(prov, max_size=2)
+    for ticker in ("A", "B", "A", "C"):
+        await cached.get_security_by_ticker(ticker)
+
+    await cached.get_security_by_ticker("A")
+    assert prov.calls == 3
+    assert cached.stats().evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_quotes_request_only_missing():
+    prov = FakeStockProvider()
+    cached = CachedProvider(prov)
+    await cached.get_security_by_ticker("AAPL")
+
+    securities = await cached.get_securities_by_tickers(["AAPL", "MSFT", "IBM"])
+    assert set(securities) == {"AAPL", "MSFT", "IBM"}
+    assert prov.bulk_requests == [["MSFT", "IBM"]]
+
+    await cached.get_securities_by_tickers(["IBM", "MSFT"])
+    assert len(prov.bulk_requests) == 1
@@ -0,0 +1,24 @@
+import pytest
+
+from tg_stonks.utils.rate_limit import TokenBucket
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+def test_token_bucket_burst_then_wait():
+    bucket = TokenBucket(rate=2.0, capacity=3.0)
+    for _ in range(3):
+        assert bucket.try_acquire() == 0
+
+    wait_for = bucket.try_acquire()
+    assert 0 < wait_for <= 0.5
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_acquire_waits_for_refill():
+    bucket = TokenBucket(rate=100.0, capacity=1.0)
+    await bucket.acquire()
+    await bucket.acquire()
+    assert bucket.available < 1.0
@@ -0,0 +1,74 @@
+import pytest
+
+from tg_stonks.providers.models import SearchQueryRes
+from tg_stonks.providers.provider_type import ProviderT
+from tg_stonks.providers.quote_cache import CachedProvider
+from tg_stonks.providers.search_cache import SearchCache
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+def search_res(symbol: str, name: str) -> SearchQueryRes:
+    return SearchQueryRes(
+        symbol=symbol, name=name, instrument_type="Equity",
+        data_provider="fake", region=None, currency=None
+    )
+
+
+class FakeSearchProvider:
+    provider_type = ProviderT.STOCK_MARKET
+    provider_name = "fake"
+
+    def __init__(self, results: list[SearchQueryRes]):
+        self.results = results
+        self.queries = []
+
+    async def search_stock_market(self, query: str) -> list[SearchQueryRes]:
+        self.queries.append(query)
+        return self.results
+
+    async def get_security_by_ticker(self, ticker: str):
+        raise NotImplementedError
+
+    async def get_securities_by_tickers(self, tickers: list[str]):
+        raise NotImplementedError
+
+
+def test_search_queries_normalized():
+    cache = SearchCache()
+    cache.put("APPLE ", [search_res("AAPL", "Apple Inc")])
+    assert cache.get("  apple") == [search_res("AAPL", "Apple Inc")]
+
+
+def test_longer_query_not_derived_by_default():
+    cache = SearchCache(max_results=3)
+    cache.put("ap", [search_res("AAPL", "Apple Inc")])
+    assert cache.get("appl") is None
+
+
+def test_longer_query_derived_from_complete_prefix():
+    cache = SearchCache(max_results=3, derive_from_prefix=True)
+    cache.put("ap", [search_res("AAPL", "Apple Inc"), search_res("APD", "Air Products")])
+
+    assert cache.get("appl") == [search_res("AAPL", "Apple Inc")]
+    assert cache.get("apd") == [search_res("APD", "Air Products")]
+    assert cache.prefix_hits == 2
+
+
+def test_longer_query_not_derived_from_truncated_prefix():
+    cache = SearchCache(max_results=2, derive_from_prefix=True)
+    cache.put("ap", [search_res("AAPL", "Apple Inc"), search_res("APD", "Air Products")])
+    assert cache.get("appl") is None
+
+
+@pytest.mark.asyncio
+async def test_cached_provider_searches_once():
+    prov = FakeSearchProvider([search_res("AAPL", "Apple Inc")])
+    cached = CachedProvider(prov, search_cache=SearchCache(derive_from_prefix=True))
+
+    for query in ("appl", "APPL ", "apple"):
+        assert await cached.search_stock_market(query) == [search_res("AAPL", "Apple Inc")]
+
+    assert prov.queries == ["appl"]
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from tg_stonks.providers.protocols import IDataProviderCurrencyEx
+from tg_stonks.providers.provider_type import ProviderT
+from tg_stonks.providers.quota import CALL_PRIORITY, CallPriority
+from tg_stonks.providers.single_flight import SingleFlightProvider
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+class SlowForexProvider:
+    provider_type = ProviderT.CURR_FOREX
+    provider_name = "fake"
+
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def get_curr_pair(self, symbol_from: str, symbol_to: str):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("API is down")
+        return f"{symbol_from}_{symbol_to}"
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_share_one_request():
+    prov = SlowForexProvider()
+    single = SingleFlightProvider(prov)
+    assert isinstance(single, IDataProviderCurrencyEx)
+
+    results = await asyncio.gather(
+        *(single.get_curr_pair("USD", "EUR") for _ in range(10)),
+        single.get_curr_pair("USD", "RUB")
+    )
+
+    assert results == ["USD_EUR"] * 10 + ["USD_RUB"]
+    assert prov.calls == 2
+    assert single.flights.shared == 9
+    assert len(single.flights) == 0
+
+
+@pytest.mark.asyncio
+async def test_all_callers_get_the_same_exception():
+    single = SingleFlightProvider(SlowForexProvider(fail=True))
+    results = await asyncio.gather(
+        *(single.get_curr_pair("USD", "EUR") for _ in range(3)),
+        return_exceptions=True
+    )
+
+    assert len({id(err) for err in results}) == 1
+    assert isinstance(results[0], RuntimeError)
+
+
+@pytest.mark.asyncio
+async def test_flights_run_with_explicit_priority():
+    priorities = []
+
+    class PriorityProvider(SlowForexProvider):
+        async def get_curr_pair(self, symbol_from: str, symbol_to: str):
+            priorities.append(CALL_PRIORITY.get())
+            return await super().get_curr_pair(symbol_from, symbol_to)
+
+    prov = PriorityProvider()
+    single = SingleFlightProvider(prov)
+
+    async def background():
+        CALL_PRIORITY.set(CallPriority.BACKGROUND)
+        return await single.get_curr_pair("USD", "EUR")
+
+    # background caller joins the interactive flight, interactive one does not join the background flight
+    await asyncio.gather(single.get_curr_pair("USD", "EUR"), background())
+    await asyncio.gather(background(), single.get_curr_pair("USD", "EUR"))
+
+    assert priorities == [CallPriority.INTERACTIVE, CallPriority.BACKGROUND, CallPriority.INTERACTIVE]
@@ -0,0 +1,101 @@
+import pytest
+
+from tg_stonks.bot.streamed_quotes import StreamedQuotes
+from tg_stonks.bot.threshold_index import ThresholdIndex
+from tg_stonks.impl.replay_stream import ReplayStreamProvider
+from tg_stonks.providers.models import QuoteTick
+from tg_stonks.providers.protocols import IDataProviderStreaming
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+class FakeDb:
+    def __init__(self, tracking_instruments: list[tuple[dict, dict]], trackings: list[tuple[dict, int]]):
+        self.tracking_instrument_rows = tracking_instruments
+        self.trackings = trackings
+        self.queried = []
+
+    async def tracking_instruments(self, fields: dict | None = None) -> list[tuple[dict, dict]]:
+        self.queried.append(fields)
+        return [r for r in self.tracking_instrument_rows if all(r[0][k] == v for k, v in (fields or {}).items())]
+
+    async def trackings_with_tg_ids(self, fields: dict):
+        return [r for r in self.trackings if r[0]["instrument"] == fields["instrument"]]
+
+
+class FakeDigest:
+    def __init__(self):
+        self.added = []
+
+    def add(self, tg_user_id: int, instrument_obj: dict, tracking_obj: dict) -> None:
+        self.added.append((tg_user_id, instrument_obj["symbol"], instrument_obj["price"], tracking_obj["id"]))
+
+
+def _instrument(_id: str, symbol: str, price: float, provider: str = "replay") -> dict:
+    return {
+        "id": _id, "symbol": symbol, "price": price, "exchange_rate": None,
+        "type": "stock_market_instrument", "data_provider_code": provider, "updated_at": None
+    }
+
+
+def _ticks(*prices: tuple[str, float]) -> list[QuoteTick]:
+    return [QuoteTick(symbol=symbol, price=price, data_provider="replay") for symbol, price in prices]
+
+
+def _tracking(_id: str, instrument_obj: dict) -> tuple[dict, dict]:
+    return {"id": _id, "instrument": instrument_obj["id"]}, instrument_obj
+
+
+@pytest.mark.asyncio
+async def test_ticks_notify_crossed_thresholds():
+    feed = ReplayStreamProvider(_ticks(("AAPL", 99.0), ("IBM", 150.0), ("AAPL", 101.0), ("AAPL", 102.0)), interval=0)
+    db = FakeDb(
+        tracking_instruments=[
+            _tracking("t1", _instrument("i1", "AAPL", 98.0)),
+            _tracking("t2", _instrument("i2", "MSFT", 400.0, provider="other"))
+        ],
+        trackings=[({"id": "t1", "instrument": "i1", "on_price": 100.0, "on_rate": None}, 42)]
+    )
+    digest = FakeDigest()
+    thresholds = ThresholdIndex(db, max_age=None)
+    streamed = StreamedQuotes(feed, db, digest, thresholds)
+
+    assert isinstance(feed, IDataProviderStreaming)
+    await streamed.run()
+
+    # only symbols tracked with the provider are streamed, 100 is crossed once
+    assert digest.added == [(42, "AAPL", 101.0, "t1")]
+    assert streamed.ticks == 3
+
+    # stored prices (refreshed from another provider) stay below the streamed ones:
+    #   each source is compared with its own previous values - no flip-flop around 100
+    assert await thresholds.crossed(_instrument("i1", "AAPL", 99.0), _instrument("i1", "AAPL", 98.0)) == []
+    await streamed.on_tick(QuoteTick(symbol="AAPL", price=101.0, data_provider="replay"))
+    assert await thresholds.crossed(_instrument("i1", "AAPL", 99.5), _instrument("i1", "AAPL", 99.0)) == []
+    assert digest.added == [(42, "AAPL", 101.0, "t1")]
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_follow_trackings():
+    feed = ReplayStreamProvider(_ticks(("AAPL", 1.0), ("IBM", 2.0)), interval=0)
+    aapl, ibm = _instrument("i1", "AAPL", 1.0), _instrument("i2", "IBM", 2.0)
+    db = FakeDb(tracking_instruments=[_tracking("t1", aapl)], trackings=[])
+    streamed = StreamedQuotes(feed, db, FakeDigest(), ThresholdIndex(db))
+
+    await streamed.on_tracking_change({"type": "INSERT", "record": {"id": "t1", "instrument": "i1"}})
+    assert [tick.symbol async for tick in feed.stream_quotes([])] == ["AAPL"]
+
+    # second tracking of the same instrument: subscribed once, kept until the last one is deleted
+    db.tracking_instrument_rows = [_tracking("t1", aapl), _tracking("t2", aapl), _tracking("t3", ibm)]
+    await streamed.on_tracking_change({"type": "INSERT", "record": {"id": "t2", "instrument": "i1"}})
+    await streamed.on_tracking_change({"type": "INSERT", "record": {"id": "t3", "instrument": "i2"}})
+    await streamed.on_tracking_change({"type": "DELETE", "old_record": {"id": "t1"}})
+    assert sorted([tick.symbol async for tick in feed.stream_quotes([])]) == ["AAPL", "IBM"]
+
+    await streamed.on_tracking_change({"type": "DELETE", "old_record": {"id": "t2"}})
+    assert [tick.symbol async for tick in feed.stream_quotes([])] == ["IBM"]
+
+    # only the changed tracking is queried
+    assert db.queried == [{"id": "t1"}, {"id": "t2"}, {"id": "t3"}]
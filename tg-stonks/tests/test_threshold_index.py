@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from tg_stonks.bot.threshold_index import ThresholdIndex
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+class FakeDb:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def trackings_with_tg_ids(self, fields: dict):
+        self.queries += 1
+        return [r for r in self.rows if r[0]["instrument"] == fields["instrument"]]
+
+
+def _tracking(_id: str, on_price: float | None = None, on_rate: float | None = None):
+    return {"id": _id, "instrument": "i1", "on_price": on_price, "on_rate": on_rate}
+
+
+def _ids(rows):
+    return sorted(tracking["id"] for tracking, _ in rows)
+
+
+@pytest.mark.asyncio
+async def test_only_crossed_thresholds_selected():
+    db = FakeDb([
+        (_tracking("a", on_price=100), 1),
+        (_tracking("b", on_price=105), 2),
+        (_tracking("c", on_price=110), 3),
+        (_tracking("d", on_rate=1.5), 4),
+    ])
+    index = ThresholdIndex(db)
+
+    # moving up 99 -> 105: 100 and 105 are crossed
+    assert _ids(await index.crossed({"id": "i1", "price": 105}, {"id": "i1", "price": 99})) == ["a", "b"]
+    # moving down without old record: previous value (105) is remembered
+    assert _ids(await index.crossed({"id": "i1", "price": 99.5})) == ["a"]
+    # small move: nothing crossed
+    assert await index.crossed({"id": "i1", "price": 99.7}) == []
+    assert db.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_previous_value_crosses_nothing():
+    index = ThresholdIndex(FakeDb([(_tracking("a", on_price=100), 1)]))
+    assert await index.crossed({"id": "i1", "price": 120}) == []
+
+
+@pytest.mark.asyncio
+async def test_invalidate_and_remove_tracking():
+    db = FakeDb([])
+    index = ThresholdIndex(db)
+    await index.crossed({"id": "i1", "price": 10})
+
+    db.rows.append((_tracking("a", on_price=15), 1))
+    index.invalidate("i1")
+    assert _ids(await index.crossed({"id": "i1", "price": 20})) == ["a"]
+
+    index.remove("a")
+    assert await index.crossed({"id": "i1", "price": 10}) == []
+
+
+@pytest.mark.asyncio
+async def test_tracking_changed_while_loading():
+    db = FakeDb([])
+    loading = asyncio.Event()
+    loaded = asyncio.Event()
+
+    async def trackings_with_tg_ids(fields: dict):
+        rows = [r for r in db.rows if r[0]["instrument"] == fields["instrument"]]
+        loading.set()
+        await loaded.wait()
+        return rows
+
+    db.trackings_with_tg_ids = trackings_with_tg_ids
+    index = ThresholdIndex(db, max_age=None)
+    update = asyncio.create_task(index.crossed({"id": "i1", "price": 11}, {"id": "i1", "price": 10}))
+    await loading.wait()
+
+    # inserted after the snapshot was read: as sync_on_tracking_change does
+    db.rows.append((_tracking("a", on_price=15), 1))
+    index.remove("a")
+    index.invalidate("i1")
+    loaded.set()
+    assert await update == []
+
+    # outdated snapshot was not kept: reloaded with the new tracking
+    assert _ids(await index.crossed({"id": "i1", "price": 20}, {"id": "i1", "price": 11})) == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_removed_tracking_with_both_thresholds():
+    index = ThresholdIndex(FakeDb([(_tracking("a", on_price=15, on_rate=1.5), 1)]))
+    await index.crossed({"id": "i1", "price": 10, "exchange_rate": 1.0})
+
+    index.remove("a")
+    # neither threshold is left behind
+    assert await index.crossed({"id": "i1", "price": 20, "exchange_rate": 2.0}) == []
@@ -0,0 +1,26 @@
+from tg_stonks.utils.timers import TimerHeap
+
+
+def test_pop_due_in_order():
+    timers = TimerHeap()
+    timers.schedule("b", 2.0)
+    timers.schedule("a", 1.0)
+    timers.schedule("c", 3.0)
+
+    assert timers.next_due() == 1.0
+    assert timers.pop_due(2.0) == ["a", "b"]
+    assert timers.pop_due(2.5) == []
+    assert len(timers) == 1
+
+
+def test_cancel_and_reschedule():
+    timers = TimerHeap()
+    timers.schedule("a", 1.0)
+    timers.schedule("b", 1.0)
+    timers.cancel("a")
+    # re-scheduled timer fires once, at the new time
+    timers.schedule("b", 5.0)
+
+    assert timers.pop_due(4.0) == []
+    assert timers.pop_due(5.0) == ["b"]
+    assert len(timers) == 0 and timers.next_due() is None
@@ -0,0 +1,87 @@
+import asyncio
+import uuid
+
+import pytest
+
+from tg_stonks.bot.handlers_db_updates import sync_on_user_change
+from tg_stonks.database.helpers import try_get_settings_of_user_async
+from tg_stonks.impl.supabase_database_async import SupabaseDBAsync
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+USER_ID = str(uuid.uuid4())
+
+
+def _user_obj(tg_user_id: int, fallback: bool = False) -> dict:
+    return {
+        "id": USER_ID,
+        "created_at": "2023-09-01T12:00:00+00:00",
+        "tg_user_id": tg_user_id,
+        "settings": {"allow_fallback_providers": fallback},
+    }
+
+
+def _db_with_users(users: dict[int, dict], delay: float = 0.0) -> tuple[SupabaseDBAsync, list[int]]:
+    db = SupabaseDBAsync("http://localhost", "key", user_cache_size=2)
+    queries = []
+
+    async def user_with_tg_id(tg_user_id: int) -> dict:
+        queries.append(tg_user_id)
+        user_obj = dict(users[tg_user_id])
+        await asyncio.sleep(delay)
+        return user_obj
+
+    # no real queries: users are read from the dict
+    db.user_with_tg_id = user_with_tg_id
+    return db, queries
+
+
+@pytest.mark.asyncio
+async def test_settings_read_through_cache():
+    users = {1: _user_obj(1)}
+    db, queries = _db_with_users(users)
+
+    first = (await try_get_settings_of_user_async(db, 1)).unwrap()
+    first.allow_fallback_providers = True
+    second = (await try_get_settings_of_user_async(db, 1)).unwrap()
+
+    # parsed once, callers' changes do not leak into the cache
+    assert queries == [1]
+    assert not second.allow_fallback_providers
+    assert (await db.cached_user(1)).id == uuid.UUID(USER_ID)
+
+    # realtime event of the user drops it
+    users[1] = _user_obj(1, fallback=True)
+    await sync_on_user_change({"type": "UPDATE", "record": users[1]}, users=db.users)
+    assert (await try_get_settings_of_user_async(db, 1)).unwrap().allow_fallback_providers
+    assert queries == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_user_changed_while_read_is_not_cached():
+    users = {1: _user_obj(1)}
+    db, queries = _db_with_users(users, delay=0.01)
+
+    read = asyncio.create_task(db.cached_user(1))
+    await asyncio.sleep(0)
+    # e.g. 'update_user' done meanwhile
+    users[1] = _user_obj(1, fallback=True)
+    db.users.invalidate(1)
+    await read
+
+    assert (await db.cached_user(1)).settings.allow_fallback_providers
+    assert queries == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded_and_dropped_on_delete_without_tg_id():
+    db, queries = _db_with_users({i: _user_obj(i) for i in range(3)})
+    for tg_user_id in (0, 1, 2):
+        await db.cached_user(tg_user_id)
+    # least recently used one is evicted
+    assert db.users.get(0) is None and db.users.get(2) is not None
+
+    await sync_on_user_change({"type": "DELETE", "old_record": {"id": USER_ID}}, users=db.users)
+    assert db.users.get(2) is None
@@ -1,9 +1,21 @@
 import pprint
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from tg_stonks.bot.app_container import AppContainer
+from tg_stonks.bot.handlers_callbacks import provider_set_handler
 from tg_stonks.bot.helpers import make_prov_settings
-from tg_stonks.database.user_settings import DataProviderConfig
+from tg_stonks.database.user_cache import CachedUser
+from tg_stonks.database.user_settings import DataProviderConfig, UserSettings
 
 from tg_stonks.providers.provider_type import ProviderT
 
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
 
 def test_make_provider_dict_by_type():
     settings = make_prov_settings(
@@ -20,3 +32,47 @@ def test_make_provider_dict_by_type():
     assert settings["provider_stock_market"]["name"] == "alpha-vantage"
     assert settings["provider_currency"]["name"] == "alpha-vantage"
     assert settings["provider_crypto"]["name"] == "alpha-vantage"
+
+
+class FakeDb:
+    def __init__(self, settings: dict):
+        self.settings = settings
+
+    async def cached_user(self, tg_user_id: int) -> CachedUser:
+        return CachedUser(id=uuid.uuid4(), tg_user_id=tg_user_id, settings=UserSettings.model_validate(self.settings))
+
+    async def update_user(self, tg_user_id: int, fields: dict):
+        self.settings = fields["settings"]
+
+
+class FakeMessage:
+    async def reply(self, text: str):
+        pass
+
+    async def delete(self):
+        pass
+
+
+class FakeProvider:
+    provider_name = "alpha_vantage"
+    provider_type = ProviderT.UNIVERSAL
+
+
+@pytest.mark.asyncio
+async def test_provider_set_keeps_other_settings():
+    db = FakeDb({
+        "provider_crypto": {"name": "other", "type": "crp"},
+        "allow_fallback_providers": True
+    })
+    query = SimpleNamespace(
+        data="confirmed --cmd prov sm alpha_vantage",
+        from_user=SimpleNamespace(id=1),
+        message=FakeMessage()
+    )
+
+    await provider_set_handler(None, query, AppContainer(database=db, data_providers=[FakeProvider()]))
+
+    settings = UserSettings.model_validate(db.settings)
+    assert settings.provider_stock_market.name == "alpha_vantage"
+    assert settings.provider_crypto.name == "other"
+    assert settings.allow_fallback_providers
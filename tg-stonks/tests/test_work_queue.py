@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from tg_stonks.upd_listener.coalescer import UpdateCoalescer
+from tg_stonks.upd_listener.work_queue import OverflowPolicy, WorkQueue
+
+pytest_plugins = (
+    'pytest_asyncio',
+)
+
+
+def _upd(_id: str, price: float) -> dict:
+    return {"table": "fin_instruments", "record": {"id": _id, "price": price}}
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_keeps_newest():
+    handled = []
+
+    async def handle(job):
+        handled.append(job.payload["record"]["price"])
+
+    queue = WorkQueue(handle, workers=1, max_size=2, policy=OverflowPolicy.DROP_OLDEST)
+    for price in (1, 2, 3):
+        await queue.put("UPDATE", _upd("a", price))
+
+    assert queue.stats().dropped == 1
+    queue.start()
+    await asyncio.sleep(0)
+    await queue.stop()
+    assert handled == [2, 3]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_merges_into_queued_payload_when_full():
+    handled = []
+
+    async def handle(job):
+        record, old_record = job.payload["record"], job.payload.get("old_record") or {}
+        handled.append((record["id"], old_record.get("price"), record["price"]))
+
+    queue = WorkQueue(handle, workers=1, max_size=3, policy=OverflowPolicy.COALESCE)
+    # room left: queued as is
+    await queue.put("UPDATE", {**_upd("a", 1), "old_record": {"id": "a", "price": 0}})
+    await queue.put("UPDATE", {**_upd("a", 2), "old_record": {"id": "a", "price": 1}})
+    await queue.put("UPDATE", _upd("b", 1))
+    assert queue.stats().coalesced == 0
+
+    # full: merged into the last queued payload of the record
+    await queue.put("UPDATE", {**_upd("a", 3), "old_record": {"id": "a", "price": 2}})
+
+    stats = queue.stats()
+    assert stats.depth == 3 and stats.coalesced == 1
+    queue.start()
+    await asyncio.sleep(0)
+    await queue.stop()
+    assert handled == [("a", 0, 1), ("a", 1, 3), ("b", None, 1)]
+
+
+@pytest.mark.asyncio
+async def test_coalescer_passes_latest_record_with_first_old_record():
+    passed = []
+
+    async def sink(event, payload):
+        passed.append(payload)
+
+    coalescer = UpdateCoalescer(sink, window=0.05)
+    await coalescer.put("UPDATE", {**_upd("a", 2), "old_record": {"id": "a", "price": 1}})
+    await coalescer.put("UPDATE", {**_upd("a", 3), "old_record": {"id": "a", "price": 2}})
+    await coalescer.put("UPDATE", _upd("b", 5))
+
+    runner = asyncio.create_task(coalescer.run())
+    await asyncio.sleep(0.1)
+    runner.cancel()
+
+    assert coalescer.superseded == 1
+    assert [(p["record"]["id"], p["record"]["price"], p.get("old_record")) for p in passed] == [
+        ("a", 3, {"id": "a", "price": 1}),
+        ("b", 5, None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_coalescer_is_bounded_and_holds_instrument_updates_only():
+    passed = []
+    queue = WorkQueue(lambda job: asyncio.sleep(0), workers=1, max_size=1)
+
+    async def sink(event, payload):
+        # through the bounded queue: waits for a free slot
+        await queue.put(event, payload)
+        passed.append((event, payload["record"]["id"]))
+
+    coalescer = UpdateCoalescer(sink, window=60.0, max_pending=2)
+    # e.g. change of user settings: passed on at once
+    await coalescer.put("UPDATE", {"table": "bot_users", "record": {"id": "u"}})
+    await coalescer.put("UPDATE", _upd("a", 1))
+    await coalescer.put("UPDATE", _upd("b", 1))
+    assert passed == [("UPDATE", "u")] and coalescer.pending == 2
+
+    # full: the oldest one is passed on, after the queue makes room for it
+    putting = asyncio.create_task(coalescer.put("UPDATE", _upd("c", 1)))
+    await asyncio.sleep(0.01)
+    assert not putting.done() and queue.stats().depth == 1
+
+    queue.start()
+    await putting
+    await queue.stop()
+    assert passed == [("UPDATE", "u"), ("UPDATE", "a")] and coalescer.pending == 2